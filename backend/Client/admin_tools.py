@@ -1,6 +1,6 @@
 import getpass
 import requests
-from requests.auth import HTTPBasicAuth
+from session_auth import login
 from client_logger import log_client_event
 import pprint
 
@@ -12,14 +12,14 @@ def admin_login():
         username = input("Admin username: ").strip()
         password = getpass.getpass("Password: ")
         try:
-            res = requests.get(f"{BASE_URL}/admin/auth/check", auth=HTTPBasicAuth(username, password))
-            if res.status_code == 200:
+            auth = login(BASE_URL, username, password, role="admin")
+            if auth:
                 print("✅ Admin authentication successful!\n")
                 log_client_event(username, "admin_login", "success", "login succeeded", is_admin=True)
-                return username, password
+                return auth
             else:
                 print("❌ Incorrect admin credentials. Please try again.\n")
-                log_client_event(username, "admin_login", "fail", f"login failed: {res.text}", is_admin=True)
+                log_client_event(username, "admin_login", "fail", "login failed", is_admin=True)
         except Exception as e:
             print(f"❌ Error connecting to server: {e}\n")
             log_client_event(username, "admin_login", "fail", f"connection error: {e}", is_admin=True)
@@ -188,8 +188,7 @@ def vectordb_management_menu(auth):
             print("Invalid option.")
 
 def main():
-    username, password = admin_login()
-    auth = HTTPBasicAuth(username, password)
+    auth = admin_login()
     while True:
         print("\n=== Admin Main Menu ===")
         print("1. User Management")
@@ -1,9 +1,25 @@
 import streamlit as st
 import requests
-from requests.auth import HTTPBasicAuth
+from session_auth import login
 
 BASE_URL = "http://127.0.0.1:8000"
 
+def fetch_all(path, key, auth):
+    """
+    Every item of a paginated list endpoint, following next_cursor. Returns (items, res),
+    where res is the last response: check its status_code before using the items.
+    """
+    items, cursor = [], None
+    while True:
+        res = requests.get(f"{BASE_URL}{path}", params={"limit": 1000, "cursor": cursor}, auth=auth)
+        if res.status_code != 200:
+            return items, res
+        data = res.json()
+        items.extend(data.get(key, []))
+        cursor = data.get("next_cursor")
+        if cursor is None:
+            return items, res
+
 st.set_page_config(page_title="RAG Chatbot Admin/User Portal", layout="wide")
 
 if 'role' not in st.session_state:
@@ -26,10 +42,9 @@ if not st.session_state['logged_in']:
     username = st.sidebar.text_input("Username")
     password = st.sidebar.text_input("Password", type="password")
     if st.sidebar.button("Login"):
-        auth = HTTPBasicAuth(username, password)
         if role == "Admin":
-            res = requests.get(f"{BASE_URL}/admin/auth/check", auth=auth)
-            if res.status_code == 200:
+            auth = login(BASE_URL, username, password, role="admin")
+            if auth:
                 st.session_state['role'] = 'admin'
                 st.session_state['username'] = username
                 st.session_state['password'] = password
@@ -40,8 +55,8 @@ if not st.session_state['logged_in']:
             else:
                 st.error("Admin login failed: Incorrect credentials.")
         else:
-            res = requests.get(f"{BASE_URL}/user/auth/check", auth=auth)
-            if res.status_code == 200:
+            auth = login(BASE_URL, username, password)
+            if auth:
                 st.session_state['role'] = 'user'
                 st.session_state['username'] = username
                 st.session_state['password'] = password
@@ -82,9 +97,8 @@ if role == 'admin':
         with tab1:
             st.write("### List Users")
             try:
-                res = requests.get(f"{BASE_URL}/admin/users", auth=auth)
+                users, res = fetch_all("/admin/users", "users", auth)
                 if res.status_code == 200:
-                    users = res.json()
                     st.table(users)
                 else:
                     st.error(f"Failed to fetch users: {res.text}")
@@ -109,9 +123,8 @@ if role == 'admin':
         with tab3:
             st.write("### Delete User")
             try:
-                res = requests.get(f"{BASE_URL}/admin/users", auth=auth)
+                users, res = fetch_all("/admin/users", "users", auth)
                 if res.status_code == 200:
-                    users = res.json()
                     usernames = [u['username'] for u in users]
                 else:
                     usernames = []
@@ -133,9 +146,8 @@ if role == 'admin':
         with tab4:
             st.write("### Reset User Password")
             try:
-                res = requests.get(f"{BASE_URL}/admin/users", auth=auth)
+                users, res = fetch_all("/admin/users", "users", auth)
                 if res.status_code == 200:
-                    users = res.json()
                     usernames = [u['username'] for u in users]
                 else:
                     usernames = []
@@ -159,9 +171,8 @@ if role == 'admin':
         st.subheader("Chat Management")
         # Fetch users for selection
         try:
-            res = requests.get(f"{BASE_URL}/admin/users", auth=auth)
+            users, res = fetch_all("/admin/users", "users", auth)
             if res.status_code == 200:
-                users = res.json()
                 usernames = [u['username'] for u in users]
             else:
                 usernames = []
@@ -236,9 +247,8 @@ if role == 'admin':
         with tab3:
             st.write("### List All PDFs")
             try:
-                res = requests.get(f"{BASE_URL}/admin/pdf", auth=auth)
+                pdfs, res = fetch_all("/admin/pdf", "pdfs", auth)
                 if res.status_code == 200:
-                    pdfs = res.json().get("pdfs", [])
                     st.table(pdfs)
                 else:
                     st.error(f"Failed to fetch PDFs: {res.text}")
@@ -247,9 +257,8 @@ if role == 'admin':
         with tab4:
             st.write("### Delete PDFs")
             try:
-                res = requests.get(f"{BASE_URL}/admin/pdf", auth=auth)
+                pdfs, res = fetch_all("/admin/pdf", "pdfs", auth)
                 if res.status_code == 200:
-                    pdfs = res.json().get("pdfs", [])
                     filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
                 else:
                     filenames = []
@@ -297,9 +306,8 @@ if role == 'admin':
         with tab2:
             st.write("### Ingest PDF (public/private)")
             try:
-                res = requests.get(f"{BASE_URL}/admin/pdf", auth=auth)
+                pdfs, res = fetch_all("/admin/pdf", "pdfs", auth)
                 if res.status_code == 200:
-                    pdfs = res.json().get("pdfs", [])
                     filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
                 else:
                     filenames = []
@@ -325,9 +333,8 @@ if role == 'admin':
         with tab3:
             st.write("### Remove PDF Data by Filename")
             try:
-                res = requests.get(f"{BASE_URL}/admin/pdf", auth=auth)
+                pdfs, res = fetch_all("/admin/pdf", "pdfs", auth)
                 if res.status_code == 200:
-                    pdfs = res.json().get("pdfs", [])
                     filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
                 else:
                     filenames = []
@@ -359,9 +366,8 @@ if role == 'admin':
             st.write("### List Available PDF Data")
             if st.button("List Available PDF Data"):
                 try:
-                    res = requests.get(f"{BASE_URL}/admin/vectordb/pdf", auth=auth)
+                    sources, res = fetch_all("/admin/vectordb/pdf", "sources", auth)
                     if res.status_code == 200:
-                        sources = res.json().get("sources", [])
                         st.table(sources)
                     else:
                         st.error(f"Failed to fetch sources: {res.text}")
@@ -451,9 +457,8 @@ else:
     elif menu == "List My PDFs":
         st.subheader("My Uploaded PDFs")
         try:
-            res = requests.get(f"{BASE_URL}/user/pdf", auth=auth)
+            pdfs, res = fetch_all("/user/pdf", "pdfs", auth)
             if res.status_code == 200:
-                pdfs = res.json().get("pdfs", [])
                 if pdfs:
                     st.table(pdfs)
                 else:
@@ -466,9 +471,8 @@ else:
         st.subheader("Ingest a PDF")
         # Fetch user's PDFs for selection
         try:
-            res = requests.get(f"{BASE_URL}/user/pdf", auth=auth)
+            pdfs, res = fetch_all("/user/pdf", "pdfs", auth)
             if res.status_code == 200:
-                pdfs = res.json().get("pdfs", [])
                 filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
             else:
                 filenames = []
@@ -503,9 +507,8 @@ else:
     elif menu == "List My Ingested PDFs":
         st.subheader("My Ingested PDFs")
         try:
-            res = requests.get(f"{BASE_URL}/user/ingested_pdfs", auth=auth)
+            ingested, res = fetch_all("/user/ingested_pdfs", "ingested_pdfs", auth)
             if res.status_code == 200:
-                ingested = res.json().get("ingested_pdfs", [])
                 if ingested:
                     st.table(ingested)
                 else:
@@ -518,9 +521,8 @@ else:
         st.subheader("Delete a PDF from Storage")
         # Fetch user's PDFs for selection
         try:
-            res = requests.get(f"{BASE_URL}/user/pdf", auth=auth)
+            pdfs, res = fetch_all("/user/pdf", "pdfs", auth)
             if res.status_code == 200:
-                pdfs = res.json().get("pdfs", [])
                 filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
             else:
                 filenames = []
@@ -544,9 +546,8 @@ else:
     elif menu == "Delete All My PDFs from Storage":
         st.subheader("Delete All My PDFs from Storage")
         try:
-            res = requests.get(f"{BASE_URL}/user/pdf", auth=auth)
+            pdfs, res = fetch_all("/user/pdf", "pdfs", auth)
             if res.status_code == 200:
-                pdfs = res.json().get("pdfs", [])
                 filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
             else:
                 filenames = []
@@ -570,9 +571,8 @@ else:
         st.subheader("Remove a PDF from VectorDB")
         # Fetch user's PDFs for selection
         try:
-            res = requests.get(f"{BASE_URL}/user/pdf", auth=auth)
+            pdfs, res = fetch_all("/user/pdf", "pdfs", auth)
             if res.status_code == 200:
-                pdfs = res.json().get("pdfs", [])
                 filenames = [pdf["filename"] for pdf in pdfs] if pdfs else []
             else:
                 filenames = []
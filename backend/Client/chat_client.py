@@ -1,6 +1,6 @@
 import requests
 import getpass
-from requests.auth import HTTPBasicAuth
+from session_auth import login
 
 BASE_URL = "http://127.0.0.1:8000"
 # BASE_URL = "http://40.82.161.202:8000"
@@ -11,10 +11,10 @@ def authenticate():
         user_id = input("User ID: ").strip()
         password = getpass.getpass("Password: ")
         try:
-            res = requests.get(f"{BASE_URL}/user/auth/check", auth=HTTPBasicAuth(user_id, password))
-            if res.status_code == 200 and res.json().get("success"):
+            auth = login(BASE_URL, user_id, password)
+            if auth:
                 print("✅ Authentication successful!\n")
-                return user_id, password
+                return user_id, auth
             else:
                 print("❌ Incorrect username or password. Please try again.\n")
         except Exception as e:
@@ -40,8 +40,7 @@ def chat():
     chat_api = f"{BASE_URL}/user/chat"
 
     # Authenticate user first
-    user_id, password = authenticate()
-    auth = HTTPBasicAuth(user_id, password)
+    user_id, auth = authenticate()
     
     print("Chat started! Type 'exit' or 'quit' to end the session.")
     print("-" * 50)
@@ -0,0 +1,29 @@
+import requests
+from requests.auth import AuthBase, HTTPBasicAuth
+
+
+class TokenAuth(AuthBase):
+    """Sends a session token from /user/login or /admin/login as a Bearer header."""
+
+    def __init__(self, username, token):
+        self.username = username
+        self.token = token
+
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {self.token}"
+        return r
+
+
+def login(base_url, username, password, role="user"):
+    """
+    Log in once and return an auth object for later requests, or None if the
+    credentials are rejected. Falls back to Basic auth for servers that do not
+    issue session tokens.
+    """
+    res = requests.post(f"{base_url}/{role}/login", json={"username": username, "password": password})
+    if res.status_code == 200:
+        token = res.json().get("token")
+        return TokenAuth(username, token) if token else HTTPBasicAuth(username, password)
+    if res.status_code == 404:
+        return HTTPBasicAuth(username, password)
+    return None
@@ -5,7 +5,7 @@ from datetime import datetime
 import random
 import argparse
 import sys
-from requests.auth import HTTPBasicAuth
+from session_auth import login
 
 BASE_URL = "http://127.0.0.1:8000"
 # BASE_URL = "http://40.82.161.202:8000"
@@ -36,8 +36,14 @@ def parse_args():
     parser.add_argument("--log-to-prompt", action="store_true", help="Enable logging to console")
     return parser.parse_args()
 
+# One session token per test user, fetched on first use
+_auths = {}
+
 def get_auth(user_index):
-    return HTTPBasicAuth(*test_users[user_index % len(test_users)])
+    user_id, password = test_users[user_index % len(test_users)]
+    if user_id not in _auths:
+        _auths[user_id] = login(BASE_URL, user_id, password)
+    return _auths[user_id]
 
 async def send_chat(index, user_id, user_index, delay, log_to_prompt, log_to_file, lock, success_count):
     chat_api = f"{BASE_URL}/user/chat"
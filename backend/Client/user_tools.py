@@ -1,5 +1,5 @@
 import requests
-from requests.auth import HTTPBasicAuth
+from session_auth import login
 import getpass
 import os
 from client_logger import log_client_event
@@ -8,10 +8,9 @@ import pprint
 BASE_URL = "http://127.0.0.1:8000"
 
 class UserToolsManager:
-    def __init__(self, username, password):
+    def __init__(self, username, auth):
         self.username = username
-        self.password = password
-        self.auth = HTTPBasicAuth(username, password)
+        self.auth = auth
 
     def upload_pdfs(self):
         filepaths = input("Enter PDF file paths (comma separated): ").split(",")
@@ -132,19 +131,19 @@ def authenticate():
         username = input("User ID: ").strip()
         password = getpass.getpass("Password: ")
         try:
-            res = requests.get(f"{BASE_URL}/user/auth/check", auth=HTTPBasicAuth(username, password))
-            if res.status_code == 200:
+            auth = login(BASE_URL, username, password)
+            if auth:
                 print("✅ Authentication successful!\n")
                 log_client_event(username, "user_login", "success", "login succeeded", is_admin=False)
-                return username, password
+                return username, auth
             else:
                 print("❌ Incorrect username or password. Please try again.\n")
-                log_client_event(username, "user_login", "fail", f"login failed: {res.text}", is_admin=False)
+                log_client_event(username, "user_login", "fail", "login failed", is_admin=False)
         except Exception as e:
             print(f"❌ Error connecting to server: {e}\n")
             log_client_event(username, "user_login", "fail", f"connection error: {e}", is_admin=False)
 
 if __name__ == "__main__":
-    username, password = authenticate()
-    manager = UserToolsManager(username, password)
+    username, auth = authenticate()
+    manager = UserToolsManager(username, auth)
     manager.main_menu()
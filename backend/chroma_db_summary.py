@@ -59,10 +59,14 @@ if __name__ == "__main__":
     else:
         print("  (none)")
     print("\n--- ChromaDB PDF Sources ---")
+    # From the source catalog, so this costs one row per source however many chunks are stored
     sources = get_pdf_sources()
     if sources:
         for s in sources:
-            print(f"  Source: {s['source']}, Ingested by: {s['ingested_by']}")
+            print(f"  Source: {s['source']}, Ingested by: {s['ingested_by']}, Public: {s['is_public']}, "
+                  f"Chunks: {s['chunk_count']}, Bytes: {s['bytes']}, Ingested at: {s['ingested_at']}")
+        print(f"  Total: {len(sources)} sources, {sum(s['chunk_count'] for s in sources)} chunks, "
+              f"{sum(s['bytes'] for s in sources)} bytes")
     else:
         print("  (none)")
     print("\n--- ChromaDB User Collections ---")
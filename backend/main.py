@@ -7,14 +7,34 @@ from routes.admin import data_manage
 from routes.admin import chat_manage
 from routes.admin import vectordb_manage
 from routes.admin import admin_auth
+from routes.admin import metrics
 from routes.user import chat_manage as user_chat_manage
 from routes.user import data_manage as user_data_manage
 from routes.user import vectordb_manage as user_vectordb_manage
 from routes.user import user_manage as user_user_manage
 from routes.user import user_auth
+from utils import jobs
+from utils import parsing
+from utils import logger
+from utils import vectordb
+from utils.uploads import UploadSizeLimit
 
 load_dotenv()
 app = FastAPI()
+app.add_middleware(UploadSizeLimit)
+
+@app.on_event("startup")
+def start_background_workers():
+    # Chat history now lives in SQLite; copy what older versions kept only in Chroma
+    vectordb.import_memory_history()
+    # Likewise fill the source catalog from PDF chunks stored before it existed
+    vectordb.build_source_catalog()
+    jobs.start_workers()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    parsing.shutdown()
+    logger.flush()
 
 # Admin endpoint
 app.include_router(user_manage.router)
@@ -22,6 +42,7 @@ app.include_router(data_manage.router)
 app.include_router(chat_manage.router)
 app.include_router(vectordb_manage.router)
 app.include_router(admin_auth.router)
+app.include_router(metrics.router)
 
 # User endpoint
 app.include_router(user_chat_manage.router)
@@ -0,0 +1,72 @@
+"""
+Convert the PDF vector store between the shared and tenant layouts (see PDF_STORE_LAYOUT).
+
+Chunks are copied page by page with their stored embeddings, so nothing is re-embedded,
+into the collections of the target layout. Copying is an upsert by chunk id, so an
+interrupted run can simply be repeated. The source collections are deleted once every
+chunk has been copied, unless --keep is given. Stop the server first, then start it
+again with PDF_STORE_LAYOUT set to the target layout.
+
+Usage:
+    python migrate_pdf_layout.py --to tenant [--batch 1000] [--keep]
+    python migrate_pdf_layout.py --to shared
+"""
+
+import argparse
+import time
+
+from utils import vectordb
+
+
+def migrate(target: str, batch: int = 1000, keep: bool = False) -> dict:
+    source = "shared" if target == "tenant" else "tenant"
+    client = vectordb.get_client(vectordb.CHROMA_PDF_DIR)
+    stats = {"collections": 0, "chunks": 0, "targets": set()}
+    for name in vectordb.pdf_collections(source):
+        collection = client.get_collection(name)
+        total = collection.count()
+        copied = 0
+        while copied < total:
+            page = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch, offset=copied)
+            if not page["ids"]:
+                break
+            groups = {}
+            for i, meta in enumerate(page["metadatas"]):
+                meta = meta or {}
+                target_name = vectordb.pdf_collection_for(meta.get("user_id"), meta.get("is_public"), target)
+                groups.setdefault(target_name, []).append(i)
+            for target_name, rows in groups.items():
+                client.get_or_create_collection(target_name).upsert(
+                    ids=[page["ids"][i] for i in rows],
+                    embeddings=[page["embeddings"][i] for i in rows],
+                    documents=[page["documents"][i] for i in rows],
+                    metadatas=[page["metadatas"][i] for i in rows],
+                )
+                stats["targets"].add(target_name)
+            copied += len(page["ids"])
+        print(f"  {name}: {copied}/{total} chunks copied")
+        if copied < total:
+            raise RuntimeError(f"Collection {name} changed while copying; stop the server and run again")
+        stats["collections"] += 1
+        stats["chunks"] += copied
+        if not keep:
+            vectordb.delete_collection(vectordb.CHROMA_PDF_DIR, name)
+    # Drop cached handles, so collections are reopened with what is now on disk
+    vectordb.invalidate_store(vectordb.CHROMA_PDF_DIR)
+    stats["targets"] = len(stats["targets"])
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the PDF vector store layout")
+    parser.add_argument("--to", choices=["tenant", "shared"], required=True, help="target layout")
+    parser.add_argument("--batch", type=int, default=1000, help="chunks copied per page")
+    parser.add_argument("--keep", action="store_true", help="keep the source collections")
+    args = parser.parse_args()
+
+    print(f"Migrating PDF store in {vectordb.CHROMA_PDF_DIR} to the {args.to} layout")
+    start = time.perf_counter()
+    result = migrate(args.to, args.batch, args.keep)
+    print(f"Copied {result['chunks']} chunks from {result['collections']} collections "
+          f"into {result['targets']} collections in {time.perf_counter() - start:.1f}s")
+    print(f"Now set PDF_STORE_LAYOUT={args.to} and restart the server.")
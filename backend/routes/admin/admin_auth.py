@@ -1,16 +1,46 @@
 import os
+from typing import Optional
 from fastapi import Depends, HTTPException, status, APIRouter
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel
 from utils.logger import log_event
+from utils.session import issue_token, verify_token, fingerprint
 
-security = HTTPBasic()
+security = HTTPBasic(auto_error=False)
+bearer = HTTPBearer(auto_error=False)
 router = APIRouter()
 
-def verify_admin_credentials(credentials: HTTPBasicCredentials = Depends(security)):
+class AdminLogin(BaseModel):
+    username: str
+    password: str
+
+def _check_admin(username: str, password: str) -> bool:
     correct_username = os.environ.get("ADMIN_USERNAME", "admin")
     correct_password = os.environ.get("ADMIN_PASSWORD", "123123")
-    if credentials.username != correct_username or credentials.password != correct_password:
-        log_event(credentials.username, "admin_auth_check", "failed")
+    return username == correct_username and password == correct_password
+
+def _admin_token_version(username: str) -> Optional[str]:
+    # Tied to the configured credentials, so changing ADMIN_PASSWORD revokes admin tokens
+    if username != os.environ.get("ADMIN_USERNAME", "admin"):
+        return None
+    return fingerprint(os.environ.get("ADMIN_PASSWORD", "123123"))
+
+def verify_admin_credentials(
+    credentials: Optional[HTTPBasicCredentials] = Depends(security),
+    token: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+):
+    # Session token from /admin/login: verified by signature and credentials version, no log write
+    if token is not None:
+        username = verify_token(token.credentials, "admin", _admin_token_version)
+        if username is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired session token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return HTTPBasicCredentials(username=username, password="")
+    if credentials is None or not _check_admin(credentials.username, credentials.password):
+        log_event(credentials.username if credentials else "", "admin_auth_check", "failed")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect admin username or password",
@@ -19,6 +49,14 @@ def verify_admin_credentials(credentials: HTTPBasicCredentials = Depends(securit
     log_event(credentials.username, "admin_auth_check", "success")
     return credentials
 
+@router.post("/admin/login")
+def admin_login(user: AdminLogin):
+    if not _check_admin(user.username, user.password):
+        log_event(user.username, "admin_login", "failed")
+        raise HTTPException(status_code=401, detail="Invalid admin username or password.")
+    log_event(user.username, "admin_login", "success")
+    return {"success": True, "user_id": user.username, **issue_token(user.username, "admin", _admin_token_version(user.username))}
+
 @router.get("/admin/auth/check")
 def admin_auth_check(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     return {"detail": "Admin authentication successful."}
@@ -1,10 +1,12 @@
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body, Form
+from datetime import datetime
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body, Form, Query
 from fastapi.security import HTTPBasicCredentials
-from typing import List
+from typing import List, Optional
 from routes.admin.admin_auth import verify_admin_credentials
-from utils.sqlitedb import add_pdf, get_all_pdfs, delete_pdf_by_filename, get_all_ingested_pdfs, get_pdf_filepath_by_filename
+from utils.sqlitedb import add_pdf, get_pdfs_page, get_pdf, get_public_pdfs, delete_pdf_by_id, delete_pdf_by_filename
 from utils.logger import log_event
+from utils.uploads import save_upload, UploadTooLargeError
 
 PERSIST_DIR = os.getenv("PERSIST_DIR", "")
 DATA_DIR = os.path.join(PERSIST_DIR, "data")
@@ -19,6 +21,7 @@ def upload_pdf(
     credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)
 ):
     uploaded = []
+    rejected = []
     for file in files:
         if not file.filename.lower().endswith(".pdf"):
             continue
@@ -32,21 +35,36 @@ def upload_pdf(
             db_path = os.path.join(uploaded_by, file.filename)
         os.makedirs(save_dir, exist_ok=True)
         file_path = os.path.join(save_dir, file.filename)
-        with open(file_path, "wb") as f:
-            f.write(file.file.read())
-        add_pdf(file.filename, uploaded_by, is_public, db_path)
+        try:
+            saved = save_upload(file, file_path)
+        except UploadTooLargeError as e:
+            rejected.append({"filename": file.filename, "error": str(e)})
+            log_event(credentials.username, "admin_upload_pdf_rejected", f"filename={file.filename}, error={str(e)}")
+            continue
+        add_pdf(file.filename, uploaded_by, is_public, db_path, saved["sha256"], saved["bytes"])
         uploaded.append(file.filename)
-        log_event(credentials.username, "admin_upload_pdf", f"filename={file.filename}, is_public={is_public}")
+        log_event(credentials.username, "admin_upload_pdf", f"filename={file.filename}, is_public={is_public}, bytes={saved['bytes']}")
     if not uploaded:
+        if rejected:
+            raise HTTPException(status_code=413, detail=rejected)
         raise HTTPException(status_code=400, detail="No valid PDFs uploaded.")
-    return {"uploaded": uploaded}
+    return {"uploaded": uploaded, "rejected": rejected}
 
 # get all pdfs uploaded by admin and users with some information like uploaded_by, is_public.
+# One page at a time: pass next_cursor back as cursor for the next page.
 @router.get("/admin/pdf")
-def list_pdfs(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
-    pdfs = get_all_pdfs()
-    log_event(credentials.username, "admin_list_pdfs", f"count={len(pdfs)}")
-    return {"pdfs": pdfs}
+def list_pdfs(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = None,
+    uploaded_by: Optional[str] = None,
+    is_public: Optional[int] = Query(None, ge=0, le=1),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)
+):
+    page = get_pdfs_page(limit, cursor, uploaded_by, is_public, created_after, created_before)
+    log_event(credentials.username, "admin_list_pdfs", f"count={len(page['items'])}")
+    return {"pdfs": page["items"], "next_cursor": page["next_cursor"]}
 
 # delete pdfs list by filename
 @router.post("/admin/pdf/delete")
@@ -60,9 +78,7 @@ def delete_pdf(
     deleted = []
     errors = []
     for filename in filenames:
-        from utils.sqlitedb import get_all_pdfs
-        pdfs = get_all_pdfs()
-        pdf_info = next((pdf for pdf in pdfs if pdf["filename"] == filename), None)
+        pdf_info = get_pdf(filename)
         if not pdf_info:
             errors.append({"filename": filename, "error": "Not found in database"})
             continue
@@ -78,7 +94,6 @@ def delete_pdf(
         except Exception as e:
             errors.append({"filename": filename, "error": str(e)})
             continue
-        from utils.sqlitedb import delete_pdf_by_id
         fileid = pdf_info["id"]
         success = delete_pdf_by_id(fileid)
         if not success:
@@ -90,13 +105,10 @@ def delete_pdf(
 
 @router.post("/admin/pdf/delete_public")
 def delete_all_public_pdfs(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
-    from utils.sqlitedb import get_all_pdfs
     deleted = []
     errors = []
-    pdfs = get_all_pdfs()
+    pdfs = get_public_pdfs()
     for pdf in pdfs:
-        if pdf["is_public"] != 1:
-            continue
         filename = pdf["filename"]
         abs_file_path = os.path.join(DATA_DIR, "public", filename)
         if not os.path.exists(abs_file_path):
@@ -107,7 +119,6 @@ def delete_all_public_pdfs(credentials: HTTPBasicCredentials = Depends(verify_ad
         except Exception as e:
             errors.append({"filename": filename, "error": str(e)})
             continue
-        from utils.sqlitedb import delete_pdf_by_filename
         success = delete_pdf_by_filename(filename)
         if not success:
             errors.append({"filename": filename, "error": "Failed to delete from database"})
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from fastapi.security import HTTPBasicCredentials
+from routes.admin.admin_auth import verify_admin_credentials
+import utils.sqlitedb as db
+import utils.vectordb as vectordb
+from utils.auth_cache import credential_cache
+from utils.answer_cache import answer_cache
+from utils.llm import LLM as chatmodel
+from utils.logger import log_stats
+from utils.metrics import stage_summary
+
+router = APIRouter()
+
+@router.get("/admin/metrics")
+def get_metrics(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
+    """In-process counters of this server worker."""
+    return {
+        "credential_cache": credential_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "sqlite_pool": db.pool_stats(),
+        "event_log": log_stats(),
+        "embeddings": vectordb.embedding_stats(),
+        "llm": chatmodel.stats(),
+        "stages": stage_summary(),
+    }
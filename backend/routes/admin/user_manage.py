@@ -1,10 +1,11 @@
 import os
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBasicCredentials
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from routes.admin.admin_auth import verify_admin_credentials
 import utils.sqlitedb as db
+from utils.vectordb import CHAT_HISTORY_LIMIT, clear_history_by_user
 from utils.logger import log_event
 
 router = APIRouter()
@@ -17,6 +18,10 @@ class UserOut(BaseModel):
     id: int
     username: str
 
+class UserPage(BaseModel):
+    users: List[UserOut]
+    next_cursor: Optional[int] = None
+
 @router.post("/admin/users", response_model=UserOut)
 def add_user(user: UserCreate, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     success = db.add_user(user.username, user.password)
@@ -24,11 +29,10 @@ def add_user(user: UserCreate, credentials: HTTPBasicCredentials = Depends(verif
         log_event(credentials.username, "admin_add_user", f"username={user.username}, failed")
         raise HTTPException(status_code=400, detail="User already exists.")
     # Fetch the user to get the id
-    users = db.get_all_users()
-    for u in users:
-        if u['userid'] == user.username:
-            log_event(credentials.username, "admin_add_user", f"username={user.username}, id={u['id']}")
-            return UserOut(id=u['id'], username=u['userid'])
+    u = db.get_user(user.username)
+    if u:
+        log_event(credentials.username, "admin_add_user", f"username={user.username}, id={u['id']}")
+        return UserOut(id=u['id'], username=u['userid'])
     log_event(credentials.username, "admin_add_user", f"username={user.username}, failed to fetch id")
     raise HTTPException(status_code=500, detail="User creation failed.")
 
@@ -38,6 +42,8 @@ def delete_user(username: str, credentials: HTTPBasicCredentials = Depends(verif
     if not success:
         log_event(credentials.username, "admin_delete_user", f"username={username}, failed")
         raise HTTPException(status_code=404, detail="User not found.")
+    # The chat memory vectors, so a new user with this name does not inherit them
+    clear_history_by_user(username)
     log_event(credentials.username, "admin_delete_user", f"username={username}, success")
     return {"detail": "User deleted."}
 
@@ -53,8 +59,24 @@ def reset_password(username: str, req: ResetPasswordRequest, credentials: HTTPBa
     log_event(credentials.username, "admin_reset_password", f"username={username}, success")
     return {"detail": "Password reset successful."}
 
-@router.get("/admin/users", response_model=List[UserOut])
-def list_users(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
-    users = db.get_all_users()
-    log_event(credentials.username, "admin_list_users", f"count={len(users)}")
-    return [UserOut(id=u['id'], username=u['userid']) for u in users]
+class MemoryLimitRequest(BaseModel):
+    limit: Optional[int] = None
+
+@router.put("/admin/users/{username}/memory_limit")
+def set_memory_limit(username: str, req: MemoryLimitRequest, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
+    """Messages kept in the user's chat memory; a null limit restores the default (CHAT_HISTORY_LIMIT)."""
+    if req.limit is not None and req.limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be at least 1.")
+    if not db.get_user(username):
+        log_event(credentials.username, "admin_set_memory_limit", f"username={username}, failed")
+        raise HTTPException(status_code=404, detail="User not found.")
+    db.set_memory_limit(username, req.limit)
+    log_event(credentials.username, "admin_set_memory_limit", f"username={username}, limit={req.limit}")
+    return {"username": username, "memory_limit": req.limit, "effective_limit": req.limit or CHAT_HISTORY_LIMIT}
+
+@router.get("/admin/users", response_model=UserPage)
+def list_users(limit: int = Query(100, ge=1, le=1000), cursor: Optional[int] = None, prefix: Optional[str] = None,
+               credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
+    page = db.get_users_page(limit, cursor, prefix)
+    log_event(credentials.username, "admin_list_users", f"count={len(page['items'])}")
+    return UserPage(users=[UserOut(id=u['id'], username=u['userid']) for u in page["items"]], next_cursor=page["next_cursor"])
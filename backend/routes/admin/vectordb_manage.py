@@ -1,10 +1,11 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.security import HTTPBasicCredentials
 from typing import Optional
 from routes.admin.admin_auth import verify_admin_credentials
 import utils.ingest as ingest
 import utils.vectordb as vectordb
+import utils.jobs as jobs
 from utils.logger import log_event
 
 router = APIRouter()
@@ -12,19 +13,26 @@ router = APIRouter()
 @router.post("/admin/vectordb/ingest/all")
 def ingest_all(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     try:
-        ingest.ingest_all_pdfs()
-        log_event(credentials.username, "admin_ingest_all_pdfs", "all public PDFs ingested")
-        return {"detail": "All public PDFs ingested."}
+        job_id = jobs.submit("admin_ingest_all", credentials.username)
+        log_event(credentials.username, "admin_ingest_all_pdfs", f"job_id={job_id}")
+        return {"detail": "Ingestion of all public PDFs queued.", "job_id": job_id}
     except Exception as e:
         log_event(credentials.username, "admin_ingest_all_pdfs_failed", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/admin/vectordb/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: int, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
+    job = jobs.get_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
 @router.post("/admin/vectordb/ingest/one/{filename}")
 def ingest_by_filename(filename: str, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     try:
-        ingest.ingest_one_pdf_admin(filename)
+        stats = ingest.ingest_one_pdf_admin(filename)
         log_event(credentials.username, "admin_ingest_pdf", f"filename={filename}")
-        return {"detail": f"PDF '{filename}' ingested."}
+        return {"detail": f"PDF '{filename}' ingested.", "stats": stats}
     except Exception as e:
         log_event(credentials.username, "admin_ingest_pdf_failed", f"filename={filename}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -32,9 +40,9 @@ def ingest_by_filename(filename: str, credentials: HTTPBasicCredentials = Depend
 @router.post("/admin/vectordb/ingest/public/{filename}")
 def ingest_public_pdf(filename: str, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     try:
-        ingest.ingest_one_pdf_public(filename)
+        stats = ingest.ingest_one_pdf_public(filename)
         log_event(credentials.username, "admin_ingest_public_pdf", f"filename={filename}")
-        return {"detail": f"PDF '{filename}' ingested as public."}
+        return {"detail": f"PDF '{filename}' ingested as public.", "stats": stats}
     except Exception as e:
         log_event(credentials.username, "admin_ingest_public_pdf_failed", f"filename={filename}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -42,9 +50,9 @@ def ingest_public_pdf(filename: str, credentials: HTTPBasicCredentials = Depends
 @router.post("/admin/vectordb/ingest/private/{filename}")
 def ingest_private_pdf(filename: str, user_id: str, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     try:
-        ingest.ingest_one_pdf_private(filename, user_id)
+        stats = ingest.ingest_one_pdf_private(filename, user_id)
         log_event(credentials.username, "admin_ingest_private_pdf", f"filename={filename}, user_id={user_id}")
-        return {"detail": f"PDF '{filename}' ingested for user '{user_id}'."}
+        return {"detail": f"PDF '{filename}' ingested for user '{user_id}'.", "stats": stats}
     except Exception as e:
         log_event(credentials.username, "admin_ingest_private_pdf_failed", f"filename={filename}, user_id={user_id}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -52,9 +60,9 @@ def ingest_private_pdf(filename: str, user_id: str, credentials: HTTPBasicCreden
 @router.delete("/admin/vectordb/pdf/{filename}")
 def remove_pdf_data(filename: str, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     try:
-        vectordb.clear_pdf_by_source(filename)
-        log_event(credentials.username, "admin_remove_pdf_data", f"filename={filename}")
-        return {"detail": f"PDF data for '{filename}' removed from vectordb."}
+        removed = vectordb.clear_pdf_by_source(filename)
+        log_event(credentials.username, "admin_remove_pdf_data", f"filename={filename}, removed={removed}")
+        return {"detail": f"PDF data for '{filename}' removed from vectordb.", "removed": removed}
     except Exception as e:
         log_event(credentials.username, "admin_remove_pdf_data_failed", f"filename={filename}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -62,19 +70,25 @@ def remove_pdf_data(filename: str, credentials: HTTPBasicCredentials = Depends(v
 @router.delete("/admin/vectordb/pdf/user/{owner}")
 def remove_pdf_data_by_user(owner: str, credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
     try:
-        vectordb.clear_pdf_by_user(owner)
-        log_event(credentials.username, "admin_remove_pdf_data_by_user", f"owner={owner}")
-        return {"detail": f"All PDF data for user '{owner}' removed from vectordb."}
+        removed = vectordb.clear_pdf_by_user(owner)
+        log_event(credentials.username, "admin_remove_pdf_data_by_user", f"owner={owner}, removed={removed}")
+        return {"detail": f"All PDF data for user '{owner}' removed from vectordb.", "removed": removed}
     except Exception as e:
         log_event(credentials.username, "admin_remove_pdf_data_by_user_failed", f"owner={owner}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/admin/vectordb/pdf")
-def get_available_pdf_data(credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)):
+def get_available_pdf_data(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = None,
+    owner: Optional[str] = None,
+    is_public: Optional[int] = Query(None, ge=0, le=1),
+    credentials: HTTPBasicCredentials = Depends(verify_admin_credentials)
+):
     try:
-        sources = vectordb.get_pdf_sources()
-        log_event(credentials.username, "admin_list_vectordb_sources", f"count={len(sources)}")
-        return {"sources": sources}
+        page = vectordb.get_pdf_sources_page(limit, cursor, owner=owner, is_public=is_public)
+        log_event(credentials.username, "admin_list_vectordb_sources", f"count={len(page['sources'])}")
+        return page
     except Exception as e:
         log_event(credentials.username, "admin_list_vectordb_sources_failed", str(e))
         raise HTTPException(status_code=500, detail=str(e))
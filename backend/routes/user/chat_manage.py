@@ -1,48 +1,181 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import time
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasicCredentials
 from pydantic import BaseModel
 from routes.user.user_auth import verify_user_credentials
 import utils.vectordb as vectordb
+import utils.sqlitedb as db
+from utils.embeddings import token_counter
 from utils.vectordb import save_user_message, retrieve_user_memory, retrieve_pdf_for_user
-from utils.llm import LLM as chatmodel
+from utils.llm import LLM as chatmodel, LLMTimeoutError
+from utils.metrics import timed, record_stages
+from utils.answer_cache import answer_cache, context_key
 import asyncio
 from utils.logger import log_event
 
 router = APIRouter()
+count_tokens = token_counter()
+
+# How often a waiting /user/chat request checks whether its client has gone away
+DISCONNECT_POLL_INTERVAL = float(os.getenv("CHAT_DISCONNECT_POLL_INTERVAL", "0.5"))
 
 class ChatRequest(BaseModel):
     user_id: str
     message: str
 
-@router.post("/user/chat")
-async def chat(req: ChatRequest, credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
-    user_id = credentials.username
-    mem_docs = await asyncio.to_thread(retrieve_user_memory, user_id, req.message, 3)
-    pdf_docs = await asyncio.to_thread(retrieve_pdf_for_user, user_id, req.message, 3)
-
+def build_prompt(message, mem_docs, pdf_docs):
     mem_text = "\n".join([d.page_content for d in mem_docs]) if mem_docs else "No previous conversation found."
     pdf_text = "\n".join([d.page_content for d in pdf_docs]) if pdf_docs else "No relevant documents found."
-
-    await asyncio.to_thread(save_user_message, user_id, req.message)
-
-    prompt = f"""
+    return f"""
     Previous conversation:
     {mem_text}
 
     Relevant documents:
     {pdf_text}
 
-    User: {req.message}
+    User: {message}
     Answer:
     """
 
-    response = await asyncio.to_thread(chatmodel.predict, prompt)
-    log_event(user_id, "user_chat", f"message={req.message}")
-    return {"response": response, "prompt": prompt}
+async def retrieve_context(user_id, message, timings):
+    """
+    Embed the message once, then search chat memory and PDFs concurrently.
+    Returns (prompt, answer cache context key, query vector).
+    """
+    query_vector = await asyncio.to_thread(timed, timings, "embed", vectordb.embed_query, message)
+    start = time.perf_counter()
+    mem_docs, pdf_docs = await asyncio.gather(
+        asyncio.to_thread(timed, timings, "memory", retrieve_user_memory, user_id, message, 3, query_vector),
+        asyncio.to_thread(timed, timings, "pdf", retrieve_pdf_for_user, user_id, message, 3, query_vector),
+    )
+    timings["retrieve"] = time.perf_counter() - start
+    return build_prompt(message, mem_docs, pdf_docs), context_key(pdf_docs, mem_docs), query_vector
+
+def save_message_after_response(user_id, message, turn):
+    """
+    Store the turn in chat_turns (message, response and estimated token counts) and the
+    message in the user's memory ring, which is only used for semantic recall.
+    `turn` holds "prompt" and "response" once the answer is complete.
+    """
+    try:
+        response = turn.get("response")
+        db.add_chat_turn(user_id, message, response,
+                         count_tokens(turn["prompt"]) if turn.get("prompt") else None,
+                         count_tokens(response) if response is not None else None)
+    except Exception as e:
+        log_event(user_id, "user_chat_save_failed", f"error={str(e)}")
+    try:
+        save_user_message(user_id, message)
+    except Exception as e:
+        log_event(user_id, "user_chat_save_failed", f"error={str(e)}")
+
+async def cancel_on_disconnect(request: Request, coro):
+    """Await coro, cancelling it (and the model request behind it) if the client disconnects first."""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        task.cancel()
+
+@router.post("/user/chat")
+async def chat(req: ChatRequest, background_tasks: BackgroundTasks, request: Request, credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
+    user_id = credentials.username
+    timings = {}
+    start = time.perf_counter()
+    generation = answer_cache.generation(user_id)
+    prompt, context, query_vector = await retrieve_context(user_id, req.message, timings)
+    cached = answer_cache.get(user_id, context, req.message, query_vector)
+    if cached:
+        response = cached["answer"]
+    else:
+        llm_start = time.perf_counter()
+        try:
+            response = await cancel_on_disconnect(request, chatmodel.apredict(prompt, timings=timings))
+        except LLMTimeoutError as e:
+            log_event(user_id, "user_chat_timeout", f"message={req.message}, error={str(e)}")
+            raise HTTPException(status_code=504, detail=str(e))
+        except HTTPException:
+            log_event(user_id, "user_chat_cancelled", f"message={req.message}")
+            raise
+        timings["llm"] = time.perf_counter() - llm_start
+        answer_cache.put(user_id, context, req.message, response, query_vector, timings["llm"], generation)
+    timings["total"] = time.perf_counter() - start
+
+    # Stored once the response is sent; the message was never part of its own memory search
+    background_tasks.add_task(save_message_after_response, user_id, req.message, {"prompt": prompt, "response": response})
+    record_stages("chat_cached" if cached else "chat", timings)
+    timings_ms = {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+    cache = cached["match"] if cached else None
+    log_event(user_id, "user_chat", f"message={req.message}, cache={cache}, timings_ms={timings_ms}")
+    return {"response": response, "prompt": prompt, "timings": timings_ms, "cache": cache}
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/user/chat/stream")
+async def chat_stream(req: ChatRequest, credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
+    """
+    Same answer as /user/chat, sent as server-sent events while the model generates it:
+    `token` events carry {"text"}, then one `done` event carries {"prompt", "timings", "cache"},
+    or an `error` event carries {"detail"}. Timings include time to first token (ttft).
+    """
+    user_id = credentials.username
+    start = time.perf_counter()
+    timings = {}
+    turn = {}
+
+    async def events():
+        try:
+            generation = answer_cache.generation(user_id)
+            prompt, context, query_vector = await retrieve_context(user_id, req.message, timings)
+            turn["prompt"] = prompt
+            cached = answer_cache.get(user_id, context, req.message, query_vector)
+            if cached:
+                # A cached answer goes out as a single token event
+                timings["ttft"] = time.perf_counter() - start
+                turn["response"] = cached["answer"]
+                yield _sse("token", {"text": cached["answer"]})
+            else:
+                llm_start = time.perf_counter()
+                pieces = []
+                # Starlette cancels this generator when the client disconnects, which closes the model stream
+                async for text in chatmodel.astream(prompt, timings=timings):
+                    if "ttft" not in timings:
+                        timings["ttft"] = time.perf_counter() - start
+                    pieces.append(text)
+                    yield _sse("token", {"text": text})
+                timings["llm"] = time.perf_counter() - llm_start
+                turn["response"] = "".join(pieces)
+                answer_cache.put(user_id, context, req.message, turn["response"], query_vector, timings["llm"], generation)
+            timings["total"] = time.perf_counter() - start
+        except Exception as e:
+            log_event(user_id, "user_chat_stream_failed", f"message={req.message}, error={str(e)}")
+            yield _sse("error", {"detail": str(e)})
+            return
+        record_stages("chat_stream_cached" if cached else "chat_stream", timings)
+        timings_ms = {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+        cache = cached["match"] if cached else None
+        log_event(user_id, "user_chat_stream", f"message={req.message}, cache={cache}, timings_ms={timings_ms}")
+        yield _sse("done", {"prompt": prompt, "timings": timings_ms, "cache": cache})
+
+    # The history write runs after the last event, as in /user/chat
+    background = BackgroundTasks()
+    background.add_task(save_message_after_response, user_id, req.message, turn)
+    return StreamingResponse(events(), media_type="text/event-stream", background=background,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/user/chat/history")
-async def get_my_history(credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
-    history = vectordb.get_all_history(credentials.username)
-    log_event(credentials.username, "user_get_chat_history", f"count={len(history)}")
-    return {"user_id": credentials.username, "history": history}
+def get_my_history(limit: int = Query(50, ge=1, le=500), cursor: Optional[int] = None,
+                   credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
+    page = db.get_chat_turns_page(credentials.username, limit, cursor)
+    log_event(credentials.username, "user_get_chat_history", f"count={len(page['turns'])}")
+    return {"user_id": credentials.username, "history": [t["message"] for t in page["turns"]], **page}
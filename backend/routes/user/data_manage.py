@@ -1,10 +1,12 @@
 import os
+from datetime import datetime
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Body, Form
 from fastapi.security import HTTPBasicCredentials
-from typing import List
+from typing import List, Optional
 from routes.user.user_auth import verify_user_credentials
 import utils.sqlitedb as db
 from utils.logger import log_event
+from utils.uploads import save_upload, UploadTooLargeError
 
 PERSIST_DIR = os.getenv("PERSIST_DIR", "")
 DATA_DIR = os.path.join(PERSIST_DIR, "data")
@@ -18,6 +20,7 @@ def upload_pdf(
     is_public: int = Form(0)
 ):
     uploaded = []
+    rejected = []
     for file in files:
         if not file.filename.lower().endswith(".pdf"):
             continue
@@ -29,20 +32,33 @@ def upload_pdf(
             db_path = os.path.join(credentials.username, file.filename)
         os.makedirs(save_dir, exist_ok=True)
         file_path = os.path.join(save_dir, file.filename)
-        with open(file_path, "wb") as f:
-            f.write(file.file.read())
-        db.add_pdf(file.filename, credentials.username, is_public, db_path)
+        try:
+            saved = save_upload(file, file_path)
+        except UploadTooLargeError as e:
+            rejected.append({"filename": file.filename, "error": str(e)})
+            log_event(credentials.username, "upload_pdf_rejected", f"filename={file.filename}, error={str(e)}")
+            continue
+        db.add_pdf(file.filename, credentials.username, is_public, db_path, saved["sha256"], saved["bytes"])
         uploaded.append(file.filename)
-        log_event(credentials.username, "upload_pdf", f"filename={file.filename}, is_public={is_public}")
+        log_event(credentials.username, "upload_pdf", f"filename={file.filename}, is_public={is_public}, bytes={saved['bytes']}")
     if not uploaded:
+        if rejected:
+            raise HTTPException(status_code=413, detail=rejected)
         raise HTTPException(status_code=400, detail="No valid PDFs uploaded.")
-    return {"uploaded": uploaded}
+    return {"uploaded": uploaded, "rejected": rejected}
 
 @router.get("/user/pdf")
-def list_pdfs(credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
-    pdfs = db.get_pdfs_by_user(credentials.username)
-    log_event(credentials.username, "list_pdfs", f"count={len(pdfs)}")
-    return {"pdfs": pdfs}
+def list_pdfs(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = None,
+    is_public: Optional[int] = Query(None, ge=0, le=1),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    credentials: HTTPBasicCredentials = Depends(verify_user_credentials)
+):
+    page = db.get_pdfs_page(limit, cursor, credentials.username, is_public, created_after, created_before)
+    log_event(credentials.username, "list_pdfs", f"count={len(page['items'])}")
+    return {"pdfs": page["items"], "next_cursor": page["next_cursor"]}
 
 @router.post("/user/pdf/delete")
 def delete_pdf(
@@ -55,8 +71,7 @@ def delete_pdf(
     deleted = []
     errors = []
     for filename in filenames:
-        pdfs = db.get_pdfs_by_user(credentials.username)
-        pdf_info = next((pdf for pdf in pdfs if pdf["filename"] == filename), None)
+        pdf_info = db.get_pdf(filename, credentials.username)
         if not pdf_info:
             errors.append({"filename": filename, "error": "Not found in database"})
             continue
@@ -72,7 +87,8 @@ def delete_pdf(
         except Exception as e:
             errors.append({"filename": filename, "error": str(e)})
             continue
-        success = db.delete_pdf_by_filename(filename)
+        # Delete only this user's row; other users may have uploaded the same filename
+        success = db.delete_pdf_by_id(pdf_info["id"])
         if not success:
             errors.append({"filename": filename, "error": "Failed to delete from database"})
             continue
@@ -81,8 +97,14 @@ def delete_pdf(
     return {"deleted": deleted, "errors": errors}
 
 @router.get("/user/ingested_pdfs")
-def list_ingested_pdfs(credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
-    from utils.sqlitedb import get_ingested_pdfs_by_user
-    pdfs = get_ingested_pdfs_by_user(credentials.username)
-    log_event(credentials.username, "list_ingested_pdfs", f"count={len(pdfs)}")
-    return {"ingested_pdfs": pdfs}
+def list_ingested_pdfs(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = None,
+    is_public: Optional[int] = Query(None, ge=0, le=1),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    credentials: HTTPBasicCredentials = Depends(verify_user_credentials)
+):
+    page = db.get_ingested_pdfs_page(limit, cursor, credentials.username, is_public, created_after, created_before)
+    log_event(credentials.username, "list_ingested_pdfs", f"count={len(page['items'])}")
+    return {"ingested_pdfs": page["items"], "next_cursor": page["next_cursor"]}
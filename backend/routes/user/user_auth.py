@@ -1,15 +1,33 @@
 import os
+from typing import Optional
 from fastapi import Depends, HTTPException, status, APIRouter
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
 import utils.sqlitedb as db
 from utils.logger import log_event
+from utils.auth_cache import credential_cache
+from utils.session import verify_token
 
-security = HTTPBasic()
+security = HTTPBasic(auto_error=False)
+bearer = HTTPBearer(auto_error=False)
 router = APIRouter()
 
-def verify_user_credentials(credentials: HTTPBasicCredentials = Depends(security)):
-    if not db.authenticate_user(credentials.username, credentials.password):
-        log_event(credentials.username, "user_auth_check", "failed")
+def verify_user_credentials(
+    credentials: Optional[HTTPBasicCredentials] = Depends(security),
+    token: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+):
+    # Session token from /user/login: signature plus a cached token version lookup, no log write
+    if token is not None:
+        username = verify_token(token.credentials, "user", db.get_token_version)
+        if username is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired session token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return HTTPBasicCredentials(username=username, password="")
+    # Cached after the first successful check; see utils/auth_cache.py
+    if credentials is None or not credential_cache.verify(credentials.username, credentials.password, db.authenticate_user):
+        log_event(credentials.username if credentials else "", "user_auth_check", "failed")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
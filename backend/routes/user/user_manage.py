@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import utils.sqlitedb as db
 from utils.logger import log_event
+from utils.session import issue_token
 
 router = APIRouter()
 
@@ -14,7 +15,7 @@ class UserLogin(BaseModel):
 def user_login(user: UserLogin):
     if db.authenticate_user(user.username, user.password):
         log_event(user.username, "user_login", "success")
-        return {"success": True, "user_id": user.username}
+        return {"success": True, "user_id": user.username, **issue_token(user.username, "user", db.get_token_version(user.username))}
     else:
         log_event(user.username, "user_login", "failed")
         raise HTTPException(status_code=401, detail="Invalid username or password.") 
\ No newline at end of file
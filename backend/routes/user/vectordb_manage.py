@@ -1,9 +1,11 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.security import HTTPBasicCredentials
+from typing import Optional
 from routes.user.user_auth import verify_user_credentials
 import utils.ingest as ingest
 import utils.vectordb as vectordb
+import utils.jobs as jobs
 from utils.sqlitedb import get_ingested_pdfs_by_user, delete_ingested_pdf_by_id
 from utils.logger import log_event
 
@@ -12,19 +14,27 @@ router = APIRouter()
 @router.post("/user/vectordb/ingest/all")
 def ingest_all(credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
     try:
-        ingest.ingest_my_all_pdfs(user_id=credentials.username)
-        log_event(credentials.username, "user_ingest_all_pdfs", "all user PDFs ingested")
-        return {"detail": "All your PDFs ingested."}
+        job_id = jobs.submit("user_ingest_all", credentials.username, user_id=credentials.username)
+        log_event(credentials.username, "user_ingest_all_pdfs", f"job_id={job_id}")
+        return {"detail": "Ingestion of all your PDFs queued.", "job_id": job_id}
     except Exception as e:
         log_event(credentials.username, "user_ingest_all_pdfs_failed", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/user/vectordb/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: int, credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
+    job = jobs.get_status(job_id)
+    # Users can only see their own jobs; report others as missing
+    if not job or job["submitted_by"] != credentials.username:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
 @router.post("/user/vectordb/ingest/one/{filename}")
 def ingest_by_filename(filename: str, credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
     try:
-        ingest.ingest_one_pdf_user(filename, user_id=credentials.username)
+        stats = ingest.ingest_one_pdf_user(filename, user_id=credentials.username)
         log_event(credentials.username, "user_ingest_pdf", f"filename={filename}")
-        return {"detail": f"PDF '{filename}' ingested."}
+        return {"detail": f"PDF '{filename}' ingested.", "stats": stats}
     except Exception as e:
         log_event(credentials.username, "user_ingest_pdf_failed", f"filename={filename}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -32,9 +42,9 @@ def ingest_by_filename(filename: str, credentials: HTTPBasicCredentials = Depend
 @router.delete("/user/vectordb/pdf/one/{filename}")
 def remove_pdf_data(filename: str, credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
     try:
-        vectordb.clear_pdf_by_source(filename, credentials.username)
-        log_event(credentials.username, "user_remove_pdf_data", f"filename={filename}")
-        return {"detail": f"PDF data for '{filename}' removed from vectordb."}
+        removed = vectordb.clear_pdf_by_source(filename, credentials.username)
+        log_event(credentials.username, "user_remove_pdf_data", f"filename={filename}, removed={removed}")
+        return {"detail": f"PDF data for '{filename}' removed from vectordb.", "removed": removed}
     except Exception as e:
         log_event(credentials.username, "user_remove_pdf_data_failed", f"filename={filename}, error={str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -42,23 +52,27 @@ def remove_pdf_data(filename: str, credentials: HTTPBasicCredentials = Depends(v
 @router.delete("/user/vectordb/pdf/all")
 def remove_all_pdf_data(credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
     try:
-        vectordb.clear_pdf_by_user(credentials.username)
+        removed = vectordb.clear_pdf_by_user(credentials.username)
         ingested = get_ingested_pdfs_by_user(credentials.username)
         for pdf in ingested:
             delete_ingested_pdf_by_id(pdf["id"])
-        log_event(credentials.username, "user_remove_all_pdf_data", "all user PDF data removed from vectordb")
-        return {"detail": "All your PDF data removed from vectordb."}
+        log_event(credentials.username, "user_remove_all_pdf_data", f"all user PDF data removed from vectordb, removed={removed}")
+        return {"detail": "All your PDF data removed from vectordb.", "removed": removed}
     except Exception as e:
         log_event(credentials.username, "user_remove_all_pdf_data_failed", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/user/vectordb/pdf")
-def get_available_pdf_data(credentials: HTTPBasicCredentials = Depends(verify_user_credentials)):
+def get_available_pdf_data(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = None,
+    is_public: Optional[int] = Query(None, ge=0, le=1),
+    credentials: HTTPBasicCredentials = Depends(verify_user_credentials)
+):
     try:
-        sources = vectordb.get_pdf_sources()
-        filtered = [s for s in sources if s["ingested_by"] == credentials.username or s["ingested_by"] == "public"]
-        log_event(credentials.username, "user_list_vectordb_sources", f"count={len(filtered)}")
-        return {"sources": filtered}
+        page = vectordb.get_pdf_sources_page(limit, cursor, is_public=is_public, visible_to=credentials.username)
+        log_event(credentials.username, "user_list_vectordb_sources", f"count={len(page['sources'])}")
+        return page
     except Exception as e:
         log_event(credentials.username, "user_list_vectordb_sources_failed", str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,145 @@
+import os
+import re
+import math
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Opt-in: set ANSWER_CACHE=1 to reuse answers to repeated chat questions
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE", "0") == "1"
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+# Cosine similarity of question embeddings at which a differently worded question reuses
+# an answer retrieved from the same context; above 1 allows exact matches only
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))
+
+def normalize_question(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation: 'Who is Elara? ' -> 'who is elara'."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+def context_key(pdf_docs, mem_docs) -> str:
+    """
+    Digest of what a question was answered from: the ids of the retrieved PDF chunks
+    and the text of the recalled chat memory (memory ids change on every save, the text does not).
+    """
+    parts = [[getattr(d, "id", None) or d.page_content for d in pdf_docs], [d.page_content for d in mem_docs]]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+def _unit(vector):
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+class AnswerCache:
+    """
+    In-process TTL/LRU cache of chat answers.
+
+    An answer is stored under (user, context key, normalized question). A lookup hits
+    exactly on that triple or, failing that, on an entry of the same user and context
+    whose question embedding has cosine similarity >= `similarity`. Because the context
+    key covers the retrieved chunks and recalled memory, a changed source or history
+    yields a different key; invalidate()/clear() additionally drop entries outright
+    when sources or history are deleted or re-ingested. As in CredentialCache, a put
+    that began before an invalidation is discarded.
+    """
+
+    def __init__(self, enabled: bool = ANSWER_CACHE_ENABLED, ttl: float = ANSWER_CACHE_TTL,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES, similarity: float = ANSWER_CACHE_SIMILARITY):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (user, context, question) -> {answer, vector, expiry, seconds}
+        self._buckets = {}  # (user, context) -> keys of _entries, the candidates of a similarity match
+        self._generations = {}
+        self._epoch = 0
+        self._counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "invalidations": 0, "evictions": 0,
+                          "saved_seconds": 0.0}
+
+    def generation(self, user_id: str):
+        with self._lock:
+            return (self._epoch, self._generations.get(user_id, 0))
+
+    def get(self, user_id: str, context: str, question: str, vector=None) -> Optional[dict]:
+        """Return {"answer", "match": "exact"|"similar"} for a cached answer, else None."""
+        if not self.enabled:
+            return None
+        question = normalize_question(question)
+        now = time.monotonic()
+        with self._lock:
+            key = (user_id, context, question)
+            entry = self._entries.get(key)
+            match = "exact" if entry is not None and entry["expiry"] > now else None
+            if match is None and vector is not None and self.similarity <= 1:
+                unit = _unit(vector)
+                best = self.similarity
+                for k in self._buckets.get((user_id, context), ()):
+                    e = self._entries[k]
+                    if e["expiry"] <= now or e["vector"] is None:
+                        continue
+                    score = sum(a * b for a, b in zip(unit, e["vector"]))
+                    if score >= best:
+                        key, entry, best, match = k, e, score, "similar"
+            if match is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters[f"{match}_hits"] += 1
+            self._counters["saved_seconds"] += entry["seconds"]
+            return {"answer": entry["answer"], "match": match}
+
+    def put(self, user_id: str, context: str, question: str, answer: str, vector=None, seconds: float = 0.0,
+            generation=None):
+        """Store an answer that took `seconds` to produce; skipped if the user was invalidated since `generation`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(user_id, 0)):
+                return
+            key = (user_id, context, normalize_question(question))
+            self._entries[key] = {"answer": answer, "vector": _unit(vector) if vector is not None else None,
+                                  "expiry": time.monotonic() + self.ttl, "seconds": seconds}
+            self._entries.move_to_end(key)
+            self._buckets.setdefault(key[:2], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def _drop(self, key):
+        del self._entries[key]
+        bucket = self._buckets[key[:2]]
+        bucket.discard(key)
+        if not bucket:
+            del self._buckets[key[:2]]
+
+    def invalidate(self, user_id: str):
+        """Drop every cached answer of user_id. Call when the user's history or private sources change."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in [k for k in self._entries if k[0] == user_id]:
+                self._drop(key)
+            self._counters["invalidations"] += 1
+
+    def clear(self):
+        """Drop every cached answer. Call when shared (public) sources change."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._buckets.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["similar_hits"]
+        lookups = hits + stats["misses"]
+        stats["enabled"] = self.enabled
+        stats["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        return stats
+
+answer_cache = AnswerCache()
@@ -0,0 +1,95 @@
+import os
+import hmac
+import time
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+class CredentialCache:
+    """
+    In-process TTL cache of credentials that already passed a database check.
+
+    Entries are keyed by (userid, HMAC of the password under a per-process random key),
+    so plain passwords are never held. invalidate(userid) drops a user's entries and bumps
+    a per-user generation; a verification that started before the bump is not cached,
+    so a password change or delete is never followed by a hit for the old password.
+    The cache is per process: with several server workers, a change made through one
+    worker reaches the others within AUTH_CACHE_TTL seconds. Expired entries are swept
+    out by a lookup at most once per TTL, so credentials of users who stopped sending
+    requests leave the cache within two TTLs.
+    """
+
+    def __init__(self, ttl: float = AUTH_CACHE_TTL, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (userid, digest) -> expiry
+        self._generations = {}
+        self._next_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _digest(self, userid: str, password: str) -> str:
+        return hmac.new(self._key, f"{userid}\0{password}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def verify(self, userid: str, password: str, authenticate) -> bool:
+        """Return True for cached credentials, otherwise call authenticate(userid, password) and cache a success."""
+        if self.ttl <= 0:
+            return authenticate(userid, password)
+        key = (userid, self._digest(userid, password))
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+            expiry = self._entries.get(key)
+            if expiry is not None and expiry > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if expiry is not None:
+                del self._entries[key]
+            self.misses += 1
+            generation = self._generations.get(userid, 0)
+        if not authenticate(userid, password):
+            return False
+        with self._lock:
+            if self._generations.get(userid, 0) == generation:
+                self._entries[key] = now + self.ttl
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return True
+
+    def _prune(self, now: float):
+        """Drop expired entries; called with the lock held."""
+        for key in [key for key, expiry in self._entries.items() if expiry <= now]:
+            del self._entries[key]
+        self._next_prune = now + self.ttl
+
+    def invalidate(self, userid: str):
+        """Forget every cached credential of userid. Call after changing or deleting the user."""
+        with self._lock:
+            self._generations[userid] = self._generations.get(userid, 0) + 1
+            for key in [k for k in self._entries if k[0] == userid]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+credential_cache = CredentialCache()
@@ -0,0 +1,338 @@
+import os
+import sqlite3
+import hashlib
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+load_dotenv(".env")
+
+PERSIST_DIR = os.getenv("PERSIST_DIR", ".")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(PERSIST_DIR, "embedding_cache.db"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "10000"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") != "0"
+# "openai" (default) or "fake" for offline runs and benchmarks
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_FAKE_SIZE = int(os.getenv("EMBEDDING_FAKE_SIZE", "256"))
+EMBEDDING_FAKE_LATENCY = float(os.getenv("EMBEDDING_FAKE_LATENCY", "0"))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "20000"))
+EMBEDDING_BATCH_MAX_TEXTS = int(os.getenv("EMBEDDING_BATCH_MAX_TEXTS", "512"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed embedding cache in front of another Embeddings backend.
+
+    Vectors are keyed by (model, sha256(text)) and stored in a SQLite table,
+    with an in-memory LRU in front of it. The SQLite table is trimmed to
+    `max_entries` rows, least recently used first.
+    """
+
+    def __init__(self, underlying: Embeddings, db_path: str = EMBEDDING_CACHE_PATH,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES, lru_size: int = EMBEDDING_CACHE_LRU_SIZE,
+                 model_name: str = None):
+        self.underlying = underlying
+        self.model_name = model_name or getattr(underlying, "model", None) or type(underlying).__name__
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"lru_hits": 0, "db_hits": 0, "misses": 0, "evictions": 0}
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS embedding_cache (
+            key TEXT PRIMARY KEY,
+            vector BLOB NOT NULL,
+            last_used REAL NOT NULL
+        )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used)')
+        self._conn.commit()
+        self._db_entries = self._conn.execute('SELECT COUNT(*) FROM embedding_cache').fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key: str, vector: List[float]):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+                    self._counters["lru_hits"] += 1
+                else:
+                    missing.append(key)
+            # SQLite caps bound parameters per statement, so look up in slices
+            for i in range(0, len(missing), 500):
+                part = missing[i:i + 500]
+                rows = self._conn.execute(
+                    f'SELECT key, vector FROM embedding_cache WHERE key IN ({",".join("?" * len(part))})', part
+                ).fetchall()
+                if rows:
+                    now = time.time()
+                    self._conn.executemany('UPDATE embedding_cache SET last_used = ? WHERE key = ?',
+                                           [(now, key) for key, _ in rows])
+                    self._conn.commit()
+                for key, blob in rows:
+                    vector = _unpack(blob)
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self._counters["db_hits"] += 1
+        return found
+
+    def _store(self, items: dict) -> dict:
+        """Persist fresh vectors and return them as float32, exactly as a later cache hit would."""
+        now = time.time()
+        packed = {key: _pack(vec) for key, vec in items.items()}
+        stored = {key: _unpack(blob) for key, blob in packed.items()}
+        with self._lock:
+            c = self._conn.executemany('INSERT OR IGNORE INTO embedding_cache (key, vector, last_used) VALUES (?, ?, ?)',
+                                       [(key, blob, now) for key, blob in packed.items()])
+            self._db_entries += max(c.rowcount, 0)
+            if self._db_entries > self.max_entries:
+                excess = self._db_entries - self.max_entries
+                c = self._conn.execute('DELETE FROM embedding_cache WHERE key IN '
+                                       '(SELECT key FROM embedding_cache ORDER BY last_used LIMIT ?)', (excess,))
+                self._db_entries -= c.rowcount
+                self._counters["evictions"] += c.rowcount
+            self._conn.commit()
+            for key, vec in stored.items():
+                self._remember(key, vec)
+        return stored
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        # Embed each distinct missing text once, even if it repeats in the batch
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+        if pending:
+            vectors = self.underlying.embed_documents(list(pending.values()))
+            with self._lock:
+                self._counters["misses"] += len(pending)
+            found.update(self._store(dict(zip(pending.keys(), vectors))))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+        vector = self.underlying.embed_query(text)
+        with self._lock:
+            self._counters["misses"] += 1
+        return self._store({key: vector})[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["lru_entries"] = len(self._lru)
+            stats["db_entries"] = self._db_entries
+        lookups = stats["lru_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["lru_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+        if hasattr(self.underlying, "stats"):
+            stats["backend"] = self.underlying.stats()
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._conn.execute('DELETE FROM embedding_cache')
+            self._conn.commit()
+            self._db_entries = 0
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic local embedding backend for offline runs and benchmarks.
+
+    Each text maps to a unit vector seeded from its sha256, so identical texts
+    always embed identically. `latency` seconds are slept per call to mimic a
+    remote provider's round trip.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.model = f"fake-{size}"
+
+    def _vector(self, text: str) -> List[float]:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        vec = [rng.gauss(0, 1) for _ in range(self.size)]
+        norm = sum(v * v for v in vec) ** 0.5 or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def token_counter():
+    """Return a function estimating the OpenAI token count of a text."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        # Rough estimate when tiktoken or its encoding files are unavailable
+        return lambda text: len(text) // 4 + 1
+
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit (and any 5xx)
+RETRY_STATUS_CODES = {408, 409, 429}
+
+
+def _transient_error_types() -> tuple:
+    types = (TimeoutError, ConnectionError)
+    try:
+        import openai
+        # APITimeoutError is an APIConnectionError; InternalServerError covers 5xx
+        types += (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+    except ImportError:
+        pass
+    return types
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for errors a retry can fix (rate limit, timeout, connection, 5xx), not e.g. auth or bad input."""
+    if isinstance(error, _transient_error_types()):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status in RETRY_STATUS_CODES or status >= 500)
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embedding scheduler that splits large embed_documents calls into batches.
+
+    Batches are capped by estimated token count and number of texts, sent
+    with at most `concurrency` requests in flight, and retried with
+    exponential backoff on transient errors; others (auth, bad request,
+    over-length input) are raised at once. stats() reports throughput in
+    embeddings per second.
+    """
+
+    def __init__(self, underlying: Embeddings, batch_tokens: int = EMBEDDING_BATCH_TOKENS,
+                 batch_max_texts: int = EMBEDDING_BATCH_MAX_TEXTS, concurrency: int = EMBEDDING_CONCURRENCY,
+                 max_retries: int = EMBEDDING_MAX_RETRIES, backoff: float = 0.5):
+        self.underlying = underlying
+        self.model = getattr(underlying, "model", None) or type(underlying).__name__
+        self.batch_tokens = batch_tokens
+        self.batch_max_texts = batch_max_texts
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._count_tokens = token_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self._counters = {"embedded": 0, "batches": 0, "retries": 0, "failures": 0, "seconds": 0.0}
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indexes into batches within the token and size limits."""
+        batches, current, tokens = [], [], 0
+        for i, text in enumerate(texts):
+            n = self._count_tokens(text)
+            if current and (tokens + n > self.batch_tokens or len(current) >= self.batch_max_texts):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += n
+        if current:
+            batches.append(current)
+        return batches
+
+    def _with_retry(self, fn, *args):
+        attempt = 0
+        while True:
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    with self._lock:
+                        self._counters["failures"] += 1
+                    raise
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                with self._lock:
+                    self._counters["retries"] += 1
+                time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        batches = self.make_batches(texts)
+        futures = [
+            self._executor.submit(self._with_retry, self.underlying.embed_documents, [texts[i] for i in batch])
+            for batch in batches
+        ]
+        vectors = [None] * len(texts)
+        for batch, future in zip(batches, futures):
+            for i, vec in zip(batch, future.result()):
+                vectors[i] = vec
+        with self._lock:
+            self._counters["embedded"] += len(texts)
+            self._counters["batches"] += len(batches)
+            self._counters["seconds"] += time.perf_counter() - start
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._with_retry(self.underlying.embed_query, text)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["embeddings_per_second"] = stats["embedded"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+
+
+def build_embedding(underlying: Embeddings = None) -> Embeddings:
+    """
+    Embedding backend used by utils.vectordb: the provider (EMBEDDING_BACKEND),
+    behind the batching scheduler, behind the cache unless EMBEDDING_CACHE=0.
+    """
+    if underlying is None:
+        if EMBEDDING_BACKEND == "fake":
+            underlying = FakeEmbeddings(size=EMBEDDING_FAKE_SIZE, latency=EMBEDDING_FAKE_LATENCY)
+        else:
+            from langchain_openai import OpenAIEmbeddings
+            # Retries are left to BatchedEmbeddings, so a failure is not retried by both
+            underlying = OpenAIEmbeddings(max_retries=0)
+    scheduled = BatchedEmbeddings(underlying)
+    if not EMBEDDING_CACHE_ENABLED:
+        return scheduled
+    return CachedEmbeddings(scheduled)
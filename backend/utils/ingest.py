@@ -1,24 +1,155 @@
 import os
+import time
+import hashlib
+from typing import List, NamedTuple
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from utils.sqlitedb import get_all_pdfs, get_pdfs_by_user, ingest
-from utils.vectordb import insert_new_chunks
+from utils.sqlitedb import get_pdf, get_pdfs_by_user, ingest, get_ingest_state
+from utils.vectordb import sync_source_chunks, count_source_chunks
+from utils.parsing import splitter, parse_pdfs, iter_pdf_chunks, INGEST_STREAM_MIN_BYTES
 
 load_dotenv(".env")
 
 PERSIST_DIR = os.getenv("PERSIST_DIR", "")
 DATA_DIR = os.path.join(PERSIST_DIR, "data")
 
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+class IngestSpec(NamedTuple):
+    """One PDF to ingest: where it is on disk, who owns its chunks, and whether they are public."""
+    filename: str
+    file_path: str
+    owner: str
+    is_public: int
+
+def _no_progress(filename, status, chunks=0, error=None):
+    pass
+
+####################################
+# Incremental ingestion helpers
+####################################
+
+def file_sha256(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def is_unchanged(filename: str, owner: str, is_public: int, file_hash: str) -> bool:
+    """True if this exact file was already ingested for owner and its chunks are still in the vector store."""
+    state = get_ingest_state(filename, owner)
+    if not state or state["file_hash"] != file_hash or state["is_public"] != is_public:
+        return False
+    return count_source_chunks(filename, owner, limit=1) > 0
+
+def store_pdf_chunks(chunks, filename: str, owner: str, is_public: int, file_hash: str) -> dict:
+    """
+    Tag chunks, sync them into the vector store by content id and record the ingest.
+    `chunks` may be a lazy iterator (see iter_pdf_chunks); it is consumed in fixed windows.
+    Returns sync counts.
+    """
+    def tagged():
+        for c in chunks:
+            c.metadata = {"user_id": owner, "filename": filename, "source": filename, "is_public": is_public}
+            yield c
+    result = sync_source_chunks(tagged(), filename, owner)
+    ingest(filename, owner, is_public, file_hash)
+    return result
+
+def parse_or_stream(items):
+    """
+    Yield (key, chunks, error) for (key, file_path) items. Small files are parsed in the
+    process pool; files of INGEST_STREAM_MIN_BYTES or more, or a lone file, are streamed
+    page by page so a long document never sits in memory whole.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        large = items
+    else:
+        large = [(key, path) for key, path in items if _file_size(path) >= INGEST_STREAM_MIN_BYTES]
+    large_keys = {key for key, _ in large}
+    yield from parse_pdfs((key, path) for key, path in items if key not in large_keys)
+    for key, path in large:
+        yield key, iter_pdf_chunks(path), None
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+####################################
+# Ingest engine
+####################################
+
+def run_ingest(specs: List[IngestSpec], progress=None) -> dict:
+    """
+    Ingest PDFs through one pipeline: dedup specs, skip unchanged files by hash,
+    parse (process pool or page streaming), then sync chunks by content id.
+
+    `progress(filename, status, chunks=0, error=None)` is called as each file is queued,
+    skipped, started and finished. Returns counts of files and chunks plus elapsed seconds.
+    """
+    progress = progress or _no_progress
+    start = time.perf_counter()
+    # One entry per (filename, owner); a later spec for the same pair wins
+    specs = list({(s.filename, s.owner): s for s in specs}.values())
+    stats = {"files": len(specs), "ingested": 0, "skipped": 0, "failed": 0,
+             "chunks_added": 0, "chunks_removed": 0, "seconds": 0.0}
+    for spec in specs:
+        progress(spec.filename, "queued")
+
+    def fail(spec, error):
+        stats["failed"] += 1
+        progress(spec.filename, "failed", error=str(error))
+        print(f"Failed to ingest {spec.filename} for {spec.owner}: {error}")
+
+    hashes = {}
+    changed = []
+    for i, spec in enumerate(specs):
+        try:
+            hashes[i] = file_sha256(spec.file_path)
+            if is_unchanged(spec.filename, spec.owner, spec.is_public, hashes[i]):
+                stats["skipped"] += 1
+                progress(spec.filename, "skipped")
+                print(f"Skipped unchanged PDF: {spec.filename} for {spec.owner}")
+                continue
+        except Exception as e:
+            fail(spec, e)
+            continue
+        changed.append(i)
+
+    # Chunks are inserted here as each file finishes parsing
+    for i, chunks, error in parse_or_stream((i, specs[i].file_path) for i in changed):
+        spec = specs[i]
+        progress(spec.filename, "running")
+        try:
+            if error:
+                raise error
+            result = store_pdf_chunks(chunks, spec.filename, spec.owner, spec.is_public, hashes[i])
+        except Exception as e:
+            fail(spec, e)
+            continue
+        stats["ingested"] += 1
+        stats["chunks_added"] += result["added"]
+        stats["chunks_removed"] += result["removed"]
+        progress(spec.filename, "done", result["added"])
+        print(f"Ingested PDF: {spec.filename} for {spec.owner} ({result['added']} new, {result['removed']} removed chunks)")
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+def _stored_path(pdf_info: dict) -> str:
+    """Location on disk of an uploaded PDF row."""
+    if pdf_info["is_public"] == 1:
+        return os.path.join(DATA_DIR, "public", pdf_info["filename"])
+    return os.path.join(DATA_DIR, pdf_info["uploaded_by"], pdf_info["filename"])
 
 ####################################
 # Admin
 ####################################
 
-def ingest_all_pdfs():
-    """Admin: Ingest all PDFs in public folder."""
+def ingest_all_pdfs(progress=None):
+    """Admin: Ingest all PDFs in public folder. `progress` as in run_ingest."""
     public_dir = os.path.join(DATA_DIR, "public")
     if not os.path.exists(public_dir):
         print(f"No public directory: {public_dir}")
@@ -27,133 +158,39 @@ def ingest_all_pdfs():
     if not pdfs:
         print("No public PDFs found.")
         return
-    for pdf in pdfs:
-        file_path = os.path.join(public_dir, pdf)
-        try:
-            loader = PyPDFLoader(file_path)
-            docs = loader.load()
-            chunks = splitter.split_documents(docs)
-            for c in chunks:
-                c.metadata = {"user_id": "public", "filename": pdf, "source": pdf, "is_public": 1}
-            insert_new_chunks(chunks)
-            ingest(pdf, "public", 1)
-            print(f"Ingested public PDF: {pdf}")
-        except Exception as e:
-            print(f"Failed to ingest {pdf}: {e}")
+    return run_ingest([IngestSpec(pdf, os.path.join(public_dir, pdf), "public", 1) for pdf in pdfs], progress)
 
 def ingest_one_pdf_admin(filename: str, user_id: str = None):
     """Admin: Ingest one PDF for any user or for all (public). If user_id is None, treat as public."""
-    all_pdfs = get_all_pdfs()
-    pdf_info = None
-    for pdf in all_pdfs:
-        if pdf["filename"] == filename:
-            pdf_info = pdf
-            break
+    pdf_info = get_pdf(filename)
     if not pdf_info:
         print(f"PDF '{filename}' not found in database.")
         return
-    # Correct file path logic
-    if pdf_info["is_public"] == 1:
-        file_path = os.path.join(DATA_DIR, "public", filename)
-    else:
-        file_path = os.path.join(DATA_DIR, pdf_info["uploaded_by"], filename)
-    try:
-        loader = PyPDFLoader(file_path)
-        docs = loader.load()
-        chunks = splitter.split_documents(docs)
-        if user_id:
-            meta_user = user_id
-            is_public = 0
-        else:
-            meta_user = "public"
-            is_public = 1
-        for c in chunks:
-            c.metadata = {
-                "user_id": meta_user,
-                "filename": pdf_info["filename"],
-                "source": pdf_info["filename"],
-                "is_public": is_public
-            }
-        insert_new_chunks(chunks)
-        ingest(pdf_info["filename"], meta_user, is_public)
-        print(f"Admin ingested PDF: {filename} for user: {meta_user}")
-    except Exception as e:
-        print(f"Failed to ingest {filename}: {e}")
+    owner, is_public = (user_id, 0) if user_id else ("public", 1)
+    return run_ingest([IngestSpec(pdf_info["filename"], _stored_path(pdf_info), owner, is_public)])
 
 def ingest_one_pdf_public(filename: str):
     """Admin: Ingest one PDF as public (user_id='public', is_public=1)."""
-    all_pdfs = get_all_pdfs()
-    pdf_info = None
-    for pdf in all_pdfs:
-        if pdf["filename"] == filename:
-            pdf_info = pdf
-            break
+    pdf_info = get_pdf(filename)
     if not pdf_info:
         print(f"PDF '{filename}' not found in database.")
         return
-    # if pdf_info["is_public"] != 1:
-    #     print(f"ERROR: Only public PDFs can be ingested as public.")
-    #     return
-    file_path = os.path.join(DATA_DIR, "public", filename)
-    try:
-        loader = PyPDFLoader(file_path)
-        docs = loader.load()
-        chunks = splitter.split_documents(docs)
-        for c in chunks:
-            c.metadata = {
-                "user_id": "public",
-                "filename": pdf_info["filename"],
-                "source": pdf_info["filename"],
-                "is_public": 1
-            }
-        insert_new_chunks(chunks)
-        ingest(pdf_info["filename"], "public", 1)
-        print(f"Admin ingested PDF: {filename} as public.")
-    except Exception as e:
-        print(f"Failed to ingest {filename}: {e}")
+    return run_ingest([IngestSpec(pdf_info["filename"], os.path.join(DATA_DIR, "public", filename), "public", 1)])
 
 def ingest_one_pdf_private(filename: str, user_id: str):
     """Admin: Ingest one PDF for a specific user (user_id, is_public=0)."""
-    all_pdfs = get_all_pdfs()
-    pdf_info = None
-    print("TEST", all_pdfs)
-    for pdf in all_pdfs:
-        if pdf["filename"] == filename:
-            pdf_info = pdf
-            break
+    pdf_info = get_pdf(filename)
     if not pdf_info:
         print(f"PDF '{filename}' not found in database.")
         return
-    # Determine correct file path
-    if pdf_info["is_public"] == 1:
-        file_path = os.path.join(DATA_DIR, "public", filename)
-    else:
-        file_path = os.path.join(DATA_DIR, pdf_info["uploaded_by"], filename)
-    try:
-        loader = PyPDFLoader(file_path)
-        docs = loader.load()
-        chunks = splitter.split_documents(docs)
-        for c in chunks:
-            c.metadata = {
-                "user_id": user_id,
-                "filename": pdf_info["filename"],
-                "source": pdf_info["filename"],
-                "is_public": 0
-            }
-        insert_new_chunks(chunks)
-        ingest(pdf_info["filename"], user_id, 0)
-        print(f"Admin ingested PDF: {filename} for user: {user_id}.")
-    except Exception as e:
-        print(f"Failed to ingest {filename}: {e}")
-
-# Deprecated: use the new explicit functions above
+    return run_ingest([IngestSpec(pdf_info["filename"], _stored_path(pdf_info), user_id, 0)])
 
 ####################################
 # User
 ####################################
 
-def ingest_my_all_pdfs(user_id: str = None, is_public: bool = False):
-    """User: Ingest all PDFs uploaded by this user. Only for me."""
+def ingest_my_all_pdfs(user_id: str = None, is_public: bool = False, progress=None):
+    """User: Ingest all PDFs uploaded by this user. Only for me. `progress` as in run_ingest."""
     if not user_id:
         print("user_id required")
         return
@@ -161,49 +198,23 @@ def ingest_my_all_pdfs(user_id: str = None, is_public: bool = False):
     if not pdfs:
         print(f"No PDFs found for user {user_id}")
         return
-    for pdf in pdfs:
-        if is_public and not pdf["is_public"]:
-            continue
-        file_path = os.path.join(DATA_DIR, pdf["filepath"])
-        try:
-            loader = PyPDFLoader(file_path)
-            docs = loader.load()
-            chunks = splitter.split_documents(docs)
-            for c in chunks:
-                c.metadata = {"user_id": user_id, "filename": pdf["filename"], "source": pdf["filename"], "is_public": pdf["is_public"]}
-            insert_new_chunks(chunks)
-            ingest(pdf["filename"], user_id, pdf["is_public"])
-            print(f"User {user_id} ingested PDF: {pdf['filename']}")
-        except Exception as e:
-            print(f"Failed to ingest {pdf['filename']}: {e}")
+    specs = [
+        IngestSpec(pdf["filename"], os.path.join(DATA_DIR, pdf["filepath"]), user_id, pdf["is_public"])
+        for pdf in pdfs if not is_public or pdf["is_public"]
+    ]
+    return run_ingest(specs, progress)
 
 def ingest_one_pdf_user(filename: str, user_id: str = None):
     """User: Ingest one PDF, but can only ingest PDFs which user uploaded."""
     if not user_id:
         print("user_id required")
         return
-    user_pdfs = get_pdfs_by_user(user_id)
-    pdf_info = None
-    for pdf in user_pdfs:
-        if pdf["filename"] == filename:
-            pdf_info = pdf
-            break
+    pdf_info = get_pdf(filename, user_id)
     if not pdf_info:
         print(f"PDF '{filename}' not found or not permitted for user {user_id}.")
         return
-    file_path = os.path.join(DATA_DIR, pdf_info["filepath"])
-    try:
-        loader = PyPDFLoader(file_path)
-        docs = loader.load()
-        chunks = splitter.split_documents(docs)
-        for c in chunks:
-            c.metadata = {"user_id": user_id, "filename": pdf_info["filename"], "source": pdf_info["filename"], "is_public": pdf_info["is_public"]}
-        insert_new_chunks(chunks)
-        ingest(pdf_info["filename"], user_id, pdf_info["is_public"])
-        print(f"User {user_id} ingested PDF: {filename}")
-    except Exception as e:
-        print(f"Failed to ingest {filename}: {e}")
+    return run_ingest([IngestSpec(pdf_info["filename"], os.path.join(DATA_DIR, pdf_info["filepath"]), user_id, pdf_info["is_public"])])
 
 if __name__ == "__main__":
     print("Ingest all public PDFs (admin)")
-    ingest_all_pdfs()
\ No newline at end of file
+    print(ingest_all_pdfs())
@@ -0,0 +1,141 @@
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+import utils.sqlitedb as db
+from utils.logger import log_event
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "2"))
+# A running job is renewed every third of this; one not renewed for this long is requeued
+INGEST_JOB_LEASE_SECONDS = float(os.getenv("INGEST_JOB_LEASE_SECONDS", "60"))
+
+_wakeup = threading.Event()
+_start_lock = threading.Lock()
+_workers = []
+_next_requeue = 0.0
+
+######################################
+# Job kinds
+######################################
+
+def _admin_ingest_all(progress):
+    import utils.ingest as ingest
+    return ingest.ingest_all_pdfs(progress=progress)
+
+def _user_ingest_all(progress, user_id):
+    import utils.ingest as ingest
+    return ingest.ingest_my_all_pdfs(user_id=user_id, progress=progress)
+
+JOB_KINDS = {
+    "admin_ingest_all": _admin_ingest_all,
+    "user_ingest_all": _user_ingest_all,
+}
+
+######################################
+# Queue
+######################################
+
+def _final_status(stats: Optional[dict]) -> str:
+    """'failed' if every file failed, 'partial' if some did, else 'done' (also when there was nothing to ingest)."""
+    if not stats or not stats.get("failed"):
+        return "done"
+    return "failed" if stats["failed"] >= stats["files"] else "partial"
+
+def submit(kind: str, submitted_by: str, **params) -> int:
+    """Persist a job in the SQLite queue and wake a worker. Returns the job id."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_id = db.create_ingest_job(kind, params, submitted_by)
+    _wakeup.set()
+    return job_id
+
+def get_status(job_id: int) -> Optional[dict]:
+    """Job row plus per-file progress and totals, or None if the job does not exist."""
+    job = db.get_ingest_job(job_id)
+    if not job:
+        return None
+    files = job["files"]
+    job["files_total"] = len(files)
+    job["files_done"] = sum(1 for f in files if f["status"] == "done")
+    job["files_failed"] = sum(1 for f in files if f["status"] == "failed")
+    job["chunks_embedded"] = sum(f["chunks"] or 0 for f in files)
+    job["errors"] = [{"filename": f["filename"], "error": f["error"]} for f in files if f["error"]]
+    if job["error"]:
+        job["errors"].append({"filename": None, "error": job["error"]})
+    return job
+
+def _owner() -> str:
+    """Lease holder name of the calling worker thread, unique across processes and hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+def _keep_lease(job_id: int, owner: str, done: threading.Event):
+    while not done.wait(INGEST_JOB_LEASE_SECONDS / 3):
+        try:
+            if not db.renew_ingest_job_lease(job_id, owner, INGEST_JOB_LEASE_SECONDS):
+                log_event("system", "ingest_job_lease_lost", f"job_id={job_id}, owner={owner}")
+                return
+        except Exception as e:
+            log_event("system", "ingest_worker_error", str(e))
+
+def _run(job: dict, owner: str):
+    job_id = job["id"]
+
+    def progress(filename, status, chunks=0, error=None):
+        db.set_ingest_job_file(job_id, filename, status, chunks, error)
+
+    done = threading.Event()
+    threading.Thread(target=_keep_lease, args=(job_id, owner, done), name=f"ingest-lease-{job_id}", daemon=True).start()
+    try:
+        stats = JOB_KINDS[job["kind"]](progress=progress, **job["params"])
+        # Per-file errors are already recorded through progress
+        status = _final_status(stats)
+        db.finish_ingest_job(job_id, status, stats=stats, owner=owner)
+        log_event(job["submitted_by"], f"ingest_job_{status}", f"job_id={job_id}, kind={job['kind']}, stats={stats}")
+    except Exception as e:
+        db.finish_ingest_job(job_id, "failed", str(e), owner=owner)
+        log_event(job["submitted_by"], "ingest_job_failed", f"job_id={job_id}, kind={job['kind']}, error={str(e)}")
+    finally:
+        done.set()
+
+def _requeue_expired():
+    """Requeue jobs of stopped workers, here or in another process; at most once per half lease per process."""
+    global _next_requeue
+    now = time.monotonic()
+    if now < _next_requeue:
+        return
+    _next_requeue = now + INGEST_JOB_LEASE_SECONDS / 2
+    requeued = db.requeue_expired_ingest_jobs()
+    if requeued:
+        log_event("system", "ingest_jobs_requeued", f"count={requeued}")
+
+def _worker_loop():
+    owner = _owner()
+    while True:
+        try:
+            _requeue_expired()
+            job = db.claim_next_ingest_job(owner, INGEST_JOB_LEASE_SECONDS)
+        except Exception as e:
+            log_event("system", "ingest_worker_error", str(e))
+            job = None
+        if job is None:
+            _wakeup.wait(INGEST_POLL_INTERVAL)
+            _wakeup.clear()
+            continue
+        _run(job, owner)
+
+def start_workers():
+    """Start the ingest worker threads once per process. Called from the app's startup hook."""
+    if _workers:
+        return
+    with _start_lock:
+        if _workers:
+            return
+        # Jobs interrupted by a restart are requeued by the workers once their lease expires
+        # (see _requeue_expired); jobs that other server processes hold keep running there
+        for i in range(max(1, INGEST_WORKERS)):
+            t = threading.Thread(target=_worker_loop, name=f"ingest-worker-{i}", daemon=True)
+            t.start()
+            _workers.append(t)
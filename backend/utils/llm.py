@@ -1,19 +1,194 @@
+import os
+import re
+import time
+import asyncio
+import threading
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# openai (default) or fake: echoes the prompt, for offline runs and benchmarks
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+# Seconds the fake model sleeps per call, to mimic a remote model's latency
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0"))
+# Seconds between streamed tokens of the fake model
+LLM_FAKE_TOKEN_LATENCY = float(os.getenv("LLM_FAKE_TOKEN_LATENCY", "0"))
+# LLM calls in flight at once per server process; further calls wait their turn
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Deadline in seconds for one call, queue wait included (streams: until the last token)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+class LLMTimeoutError(Exception):
+    pass
+
+def _fake_response(prompt):
+    return type("FakeResponse", (), {"content": f"FAKE RESPONSE: {prompt}"})()
+
+def _fake_tokens(prompt):
+    return re.findall(r"\S+\s*|\s+", f"FAKE RESPONSE: {prompt}")
+
+class FakeChatModel:
+    def __init__(self, latency=0.0, token_latency=0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+
+    def invoke(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        return _fake_response(prompt)
+
+    def stream(self, prompt):
+        """Yield the same text as invoke, one whitespace-delimited token at a time."""
+        if self.latency:
+            time.sleep(self.latency)
+        for token in _fake_tokens(prompt):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield type("FakeChunk", (), {"content": token})()
+
+    async def ainvoke(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return _fake_response(prompt)
+
+    async def astream(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for token in _fake_tokens(prompt):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield type("FakeChunk", (), {"content": token})()
+
 class LanguageModel:
-    def __init__(self, model_name="gpt-4o", temperature=0, fake_model=False):
+    def __init__(self, model_name="gpt-4o", temperature=0, fake_model=False, fake_latency=LLM_FAKE_LATENCY,
+                 fake_token_latency=LLM_FAKE_TOKEN_LATENCY, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT):
         if (fake_model):
-            self.llm = type("FakeLLM", (), {"invoke": lambda self, prompt: type("FakeResponse", (), {"content": f"FAKE RESPONSE: {prompt}"})()})()
+            self.llm = FakeChatModel(latency=fake_latency, token_latency=fake_token_latency)
         else:
             self.llm = ChatOpenAI(model=model_name, temperature=temperature)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._semaphores = {}  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "waiting": 0, "in_flight": 0, "timeouts": 0, "cancelled": 0, "failed": 0,
+                          "queue_wait_seconds": 0.0, "max_queue_wait_seconds": 0.0}
 
     def predict(self, prompt):
         return self.llm.invoke(prompt).content
 
-LLM = LanguageModel()
+    def stream(self, prompt):
+        """Yield the completion as text pieces as the model produces them."""
+        for chunk in self.llm.stream(prompt):
+            if chunk.content:
+                yield chunk.content
+
+    ######################################
+    # Async calls with bounded concurrency
+    ######################################
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                self._semaphores = {loop: asyncio.Semaphore(self.max_concurrency)}
+                semaphore = self._semaphores[loop]
+            return semaphore
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counters[name] += delta
+
+    async def _acquire(self, deadline, timings):
+        """Wait for a concurrency slot before the deadline; record the wait as timings['llm_queue']."""
+        semaphore = self._semaphore()
+        start = time.perf_counter()
+        self._count(waiting=1)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._count(timeouts=1)
+            raise LLMTimeoutError(f"No LLM slot free within {self.timeout:g}s")
+        finally:
+            self._count(waiting=-1)
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["in_flight"] += 1
+            self._counters["queue_wait_seconds"] += waited
+            self._counters["max_queue_wait_seconds"] = max(self._counters["max_queue_wait_seconds"], waited)
+        if timings is not None:
+            timings["llm_queue"] = waited
+        return semaphore
+
+    def _release(self, semaphore, error=None):
+        semaphore.release()
+        self._count(in_flight=-1)
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            self._count(cancelled=1)
+        elif isinstance(error, (asyncio.TimeoutError, LLMTimeoutError)):
+            self._count(timeouts=1)
+        elif error is not None:
+            self._count(failed=1)
+
+    async def apredict(self, prompt, timeout=None, timings=None):
+        """
+        Async completion through the model's ainvoke. At most max_concurrency calls run
+        at once; the whole call, queue wait included, must finish within `timeout`
+        seconds (default LLM_TIMEOUT) or LLMTimeoutError is raised. Cancelling the
+        awaiting task (e.g. on client disconnect) cancels the request to the model.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        semaphore = await self._acquire(deadline, timings)
+        error = None
+        try:
+            result = await asyncio.wait_for(self.llm.ainvoke(prompt), max(0.0, deadline - time.monotonic()))
+            return result.content
+        except asyncio.TimeoutError as e:
+            error = e
+            raise LLMTimeoutError(f"LLM call exceeded {timeout or self.timeout:g}s")
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(semaphore, error)
+
+    async def astream(self, prompt, timeout=None, timings=None):
+        """Async version of stream() with the same concurrency limit and deadline as apredict."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        semaphore = await self._acquire(deadline, timings)
+        error = None
+        chunks = self.llm.astream(prompt)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    break
+                if chunk.content:
+                    yield chunk.content
+        except asyncio.TimeoutError as e:
+            error = e
+            raise LLMTimeoutError(f"LLM stream exceeded {timeout or self.timeout:g}s")
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            try:
+                await chunks.aclose()
+            finally:
+                self._release(semaphore, error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["max_concurrency"] = self.max_concurrency
+        stats["avg_queue_wait_seconds"] = stats["queue_wait_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+LLM = LanguageModel(fake_model=LLM_BACKEND == "fake")
 
 if __name__ == "__main__":
     llm = LanguageModel(fake_model=False)
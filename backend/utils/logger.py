@@ -1,12 +1,170 @@
 import os
+import json
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 
 LOG_DIR = os.getenv("PERSIST_DIR", ".")
 LOG_FILE = os.path.join(LOG_DIR, "server_events.log")
 
+# Events waiting to be written; when full, new events are dropped and counted
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+# Rotate when the file reaches LOG_MAX_BYTES or is older than LOG_ROTATE_SECONDS (0 disables either)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_ROTATE_SECONDS = int(os.getenv("LOG_ROTATE_SECONDS", str(24 * 3600)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# One file per process (server_events.<pid>.log), so server workers sharing LOG_DIR never
+# rotate each other's file; on by default when WEB_CONCURRENCY runs more than one worker
+LOG_PER_PROCESS = os.getenv("LOG_PER_PROCESS", "1" if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else "0") == "1"
+
+######################################
+# Writer
+######################################
+
+class EventLogWriter:
+    """
+    Writes events as JSON lines from a background thread.
+
+    log() only puts the event on a bounded queue, so a request never waits on disk.
+    The thread drains the queue in batches, writes each batch with one write call
+    and rotates the file (server_events.log -> .1 -> .2 ...) by size and age.
+    Rotation assumes this process is the file's only writer: with per_process each
+    process writes and rotates its own server_events.<pid>.log.
+    """
+
+    def __init__(self, path: str = LOG_FILE, queue_size: int = LOG_QUEUE_SIZE, per_process: bool = LOG_PER_PROCESS):
+        self.base_path = path
+        self.per_process = per_process
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file = None
+        self._opened_at = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.errors = 0
+
+    @property
+    def path(self) -> str:
+        if not self.per_process:
+            return self.base_path
+        root, ext = os.path.splitext(self.base_path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    def log(self, record: dict):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=LOG_FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: list):
+        try:
+            self._rotate_if_needed()
+            if self._file is None:
+                self._open()
+            self._file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch))
+            self._file.flush()
+            with self._lock:
+                self.written += len(batch)
+        except Exception:
+            # Never let a disk problem kill the writer; the batch is lost and counted
+            with self._lock:
+                self.errors += 1
+                self.dropped += len(batch)
+            self._close()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            # An existing file keeps its age across restarts
+            self._opened_at = os.path.getmtime(self.path) if self._file.tell() else time.time()
+        except OSError:
+            self._opened_at = time.time()
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _rotate_if_needed(self):
+        if self._file is None:
+            if not os.path.exists(self.path):
+                return
+            self._open()
+        size = self._file.tell()
+        too_big = LOG_MAX_BYTES > 0 and size >= LOG_MAX_BYTES
+        too_old = LOG_ROTATE_SECONDS > 0 and size > 0 and time.time() - self._opened_at >= LOG_ROTATE_SECONDS
+        if not (too_big or too_old):
+            return
+        self._close()
+        for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if LOG_BACKUP_COUNT > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        with self._lock:
+            self.rotations += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued event is written. Returns False on timeout."""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped,
+                    "rotations": self.rotations, "errors": self.errors}
+
+_writer = EventLogWriter()
+atexit.register(_writer.flush)
 
 def log_event(user: str, event_type: str, details: str):
-    os.makedirs(LOG_DIR, exist_ok=True)
-    timestamp = datetime.utcnow().isoformat()
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] user={user} event={event_type} details={details}\n") 
\ No newline at end of file
+    _writer.log({"ts": datetime.utcnow().isoformat(), "user": user, "event": event_type, "details": details})
+
+def flush(timeout: float = 5.0) -> bool:
+    return _writer.flush(timeout)
+
+def log_stats() -> dict:
+    return _writer.stats()
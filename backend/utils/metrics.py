@@ -0,0 +1,42 @@
+import os
+import time
+import threading
+from collections import defaultdict, deque
+
+# Recent samples kept per stage for the percentiles in stage_summary()
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=METRICS_WINDOW))
+
+def timed(timings: dict, stage: str, fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) and store its duration in seconds as timings[stage]."""
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+def record_stages(pipeline: str, timings: dict):
+    """Add one request's stage durations (seconds) to the rolling samples of a pipeline."""
+    with _lock:
+        for stage, seconds in timings.items():
+            _samples[(pipeline, stage)].append(seconds)
+
+def _percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def stage_summary() -> dict:
+    """{pipeline: {stage: {count, p50_ms, p95_ms, max_ms}}} over the recent samples."""
+    with _lock:
+        snapshot = {key: sorted(values) for key, values in _samples.items()}
+    summary = {}
+    for (pipeline, stage), values in snapshot.items():
+        if values:
+            summary.setdefault(pipeline, {})[stage] = {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 0.5) * 1000, 2),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+    return summary
@@ -0,0 +1,105 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Kept free of database / vector store imports: pool workers import this module on spawn.
+
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(os.cpu_count() or 1)))
+# Parsed-but-not-yet-inserted files allowed per worker before parsing pauses
+INGEST_PARSE_QUEUE_PER_WORKER = int(os.getenv("INGEST_PARSE_QUEUE_PER_WORKER", "2"))
+# Files at least this large skip the pool and are streamed page by page in-process
+INGEST_STREAM_MIN_BYTES = int(os.getenv("INGEST_STREAM_MIN_BYTES", str(5 * 1024 * 1024)))
+
+splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+_pools = {}  # workers -> ProcessPoolExecutor
+_pool_lock = threading.Lock()
+
+
+def parse_pdf(file_path):
+    """Load a PDF and split it into chunks. Runs inside pool workers."""
+    docs = PyPDFLoader(file_path).load()
+    return splitter.split_documents(docs)
+
+
+def iter_pdf_chunks(file_path):
+    """
+    Yield a PDF's chunks page by page. Pages are loaded lazily and split one at a
+    time, so only the current page and its chunks are held in memory. Produces the
+    same chunks as parse_pdf, since the splitter never joins text across pages.
+    """
+    for page in PyPDFLoader(file_path).lazy_load():
+        yield from splitter.split_documents([page])
+
+
+def _get_pool(workers, broken=None):
+    """The shared pool with `workers` processes. Pass `broken` to replace a pool whose worker died."""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is not None and pool is broken:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+        if pool is None:
+            # spawn, not fork: the server process has live threads and DB handles
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+
+def parse_pdfs(items, workers=None):
+    """
+    Parse and split PDFs in parallel, yielding (key, chunks, error) as each file finishes.
+
+    `items` is an iterable of (key, file_path). At most workers * INGEST_PARSE_QUEUE_PER_WORKER
+    files are in flight or waiting to be consumed, so a slow consumer (embedding / insert)
+    applies back-pressure instead of parsed chunks piling up in memory. With one worker the
+    files are parsed in-process, in order. If a worker process dies (e.g. on a malformed
+    PDF), the files in flight fail with BrokenProcessPool and the rest go to a new pool.
+    """
+    workers = workers or INGEST_PARSE_WORKERS
+    items = iter(items)
+    if workers <= 1:
+        for key, path in items:
+            try:
+                yield key, parse_pdf(path), None
+            except Exception as e:
+                yield key, None, e
+        return
+
+    pool = _get_pool(workers)
+    limit = workers * INGEST_PARSE_QUEUE_PER_WORKER
+    pending = {}  # future -> (key, pool it was submitted to)
+    exhausted = False
+    while pending or not exhausted:
+        while not exhausted and len(pending) < limit:
+            try:
+                key, path = next(items)
+            except StopIteration:
+                exhausted = True
+                break
+            try:
+                future = pool.submit(parse_pdf, path)
+            except BrokenProcessPool:
+                pool = _get_pool(workers, broken=pool)
+                future = pool.submit(parse_pdf, path)
+            pending[future] = key, pool
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            key, source = pending.pop(future)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                pool = _get_pool(workers, broken=source)
+            yield key, (None if error else future.result()), error
+
+
+def shutdown():
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
@@ -0,0 +1,67 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+from typing import Callable, Optional
+
+# Set SESSION_SECRET to share tokens across server workers and restarts;
+# without it every process signs with its own random key.
+SESSION_SECRET = os.getenv("SESSION_SECRET") or secrets.token_hex(32)
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(12 * 3600)))
+
+if not os.getenv("SESSION_SECRET") and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+    # Each worker would reject the tokens the others issued
+    raise RuntimeError("SESSION_SECRET must be set when running more than one server worker (WEB_CONCURRENCY > 1)")
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(SESSION_SECRET.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest())
+
+def fingerprint(value: str) -> str:
+    """Short keyed digest of value (e.g. a password), safe to carry in a token's claims."""
+    return _sign(value.encode("utf-8").hex())[:22]
+
+def issue_token(username: str, role: str, version: Optional[str] = None, ttl: int = SESSION_TTL) -> dict:
+    """
+    Signed session token for username acting as role ('admin' or 'user'). version is
+    the account's current token version (see verify_token); changing it revokes the token.
+    """
+    now = time.time()
+    claims = {"sub": username, "role": role, "ver": version, "iat": now, "exp": int(now + ttl)}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return {"token": f"{payload}.{_sign(payload)}", "token_type": "bearer", "expires_at": claims["exp"]}
+
+def verify_token(token: str, role: str, current_version: Optional[Callable[[str], Optional[str]]] = None) -> Optional[str]:
+    """
+    Return the username of a valid, unexpired token issued for role, else None.
+
+    current_version(username) gives the account's token version now, or None if it no
+    longer exists; a token issued under another version is rejected. It comes from the
+    shared database (cached briefly per process, see sqlitedb.get_token_version), so a
+    password change or delete revokes the account's tokens on every server worker and
+    across restarts.
+    """
+    try:
+        payload, signature = token.split(".", 1)
+        # Bytes, as compare_digest rejects str with non-ASCII characters
+        if not hmac.compare_digest(signature.encode("utf-8"), _sign(payload).encode("ascii")):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError, TypeError):
+        return None
+    if claims.get("role") != role or claims.get("exp", 0) < time.time():
+        return None
+    username = claims.get("sub")
+    if current_version is not None:
+        version = current_version(username)
+        if version is None or version != claims.get("ver"):
+            return None
+    return username
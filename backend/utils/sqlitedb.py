@@ -1,7 +1,14 @@
 import sqlite3
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from typing import Optional, List, Tuple
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from utils.auth_cache import credential_cache
+from utils.answer_cache import answer_cache
 
 # DB_PATH = os.path.join(os.path.dirname(__file__), 'user_data.db')
 
@@ -10,8 +17,174 @@ PERSIST_DIR = os.getenv("PERSIST_DIR", ".\\sqlite")
 os.makedirs(PERSIST_DIR, exist_ok=True)
 DB_PATH = os.path.join(PERSIST_DIR, "sqlite.db")
 
+# Connection pool settings
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))
+
+# Seconds a user's token version is cached per process for bearer token checks
+TOKEN_VERSION_CACHE_TTL = float(os.getenv("TOKEN_VERSION_CACHE_TTL", "5"))
+
+######################################
+# Connection pool
+######################################
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by all threads of one process.
+
+    Connections are opened in WAL mode, so readers are not blocked by an ingest or
+    upload that is writing. A connection is used by one thread at a time: it is
+    checked out for the duration of a `with` block and put back afterwards. When all
+    `size` connections are in use, callers wait up to the busy timeout for one.
+    """
+
+    def __init__(self, db_path: str, size: int = SQLITE_POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._lock = threading.Lock()
+        self._idle = []
+        # Threads waiting for a connection, oldest first; each is [connection or None, Event]
+        self._waiters = deque()
+        self._opened = 0
+        self._pid = os.getpid()
+        self._checkouts = 0
+        self._waits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}')
+        conn.execute(f'PRAGMA cache_size = {-SQLITE_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size = {SQLITE_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent's connections must not be shared
+                self._idle, self._waiters, self._opened = [], deque(), 0
+                self._pid = os.getpid()
+            self._checkouts += 1
+            if self._idle and not self._waiters:
+                return self._idle.pop()
+            if self._opened < self.size:
+                self._opened += 1
+                slot = None
+            else:
+                self._waits += 1
+                slot = [None, threading.Event()]
+                self._waiters.append(slot)
+        if slot is None:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        # Released connections are handed to waiters in arrival order, so a busy
+        # pool cannot starve one thread (e.g. an ingest job's write)
+        slot[1].wait(SQLITE_BUSY_TIMEOUT_MS / 1000)
+        with self._lock:
+            if slot[0] is None:
+                self._waiters.remove(slot)
+                raise sqlite3.OperationalError(f"No SQLite connection free after {SQLITE_BUSY_TIMEOUT_MS} ms (pool size {self.size})")
+        return slot[0]
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            if self._waiters:
+                slot = self._waiters.popleft()
+                slot[0] = conn
+                slot[1].set()
+            else:
+                self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commit on success, roll back on error, then return it to the pool."""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close the idle connections, e.g. before the database file is removed."""
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._opened -= len(self._idle)
+            self._idle = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": self.size, "opened": self._opened, "idle": len(self._idle),
+                    "checkouts": self._checkouts, "waits": self._waits}
+
+_pool = ConnectionPool(DB_PATH)
+
 def get_db_connection():
-    return sqlite3.connect(DB_PATH)
+    """Pooled connection for a `with` block: `with get_db_connection() as conn: ...`"""
+    return _pool.connection()
+
+def pool_stats() -> dict:
+    return _pool.stats()
+
+def _add_column_if_missing(c, table: str, column: str, decl: str):
+    c.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {decl}')
+
+SCHEMA_VERSION = 8
+
+def _migrate(c):
+    """Bring an existing database up to SCHEMA_VERSION, tracked in PRAGMA user_version."""
+    c.execute('PRAGMA user_version')
+    version = c.fetchone()[0]
+    if version < 1:
+        # Content hash per ingested file, for incremental re-ingestion
+        _add_column_if_missing(c, "ingest_state", "file_hash", "TEXT")
+    if version < 2:
+        # Lookup indexes for per-file and per-owner queries
+        c.execute('CREATE INDEX IF NOT EXISTS idx_pdfs_filename ON pdfs (filename)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_pdfs_uploaded_by ON pdfs (uploaded_by)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingest_state_owner_file ON ingest_state (ingested_by, filename)')
+    if version < 3:
+        # Keyset pages filtered by owner or visibility walk these in id order
+        c.execute('CREATE INDEX IF NOT EXISTS idx_pdfs_public ON pdfs (is_public, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingest_state_owner ON ingest_state (ingested_by, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingest_state_public ON ingest_state (is_public, id)')
+    if version < 4:
+        # SHA-256 and size of each uploaded file, computed while it is written
+        _add_column_if_missing(c, "pdfs", "file_hash", "TEXT")
+        _add_column_if_missing(c, "pdfs", "bytes", "INTEGER")
+    if version < 5:
+        # Bumped on password change; session tokens carry it and are revoked when it moves
+        _add_column_if_missing(c, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+    if version < 6:
+        # Counts returned by the ingest run (files ingested / skipped / failed, chunks)
+        _add_column_if_missing(c, "ingest_jobs", "stats", "TEXT")
+    if version < 7:
+        # One row per (filename, ingested_by): keep the newest of any duplicates, then enforce it
+        c.execute('DELETE FROM ingest_state WHERE id NOT IN (SELECT MAX(id) FROM ingest_state GROUP BY filename, ingested_by)')
+        c.execute('DROP INDEX IF EXISTS idx_ingest_state_owner_file')
+        c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_ingest_state_owner_file_unique ON ingest_state (ingested_by, filename)')
+    if version < 8:
+        # Worker that claimed a running job and until when (unix time) it holds the job
+        _add_column_if_missing(c, "ingest_jobs", "claimed_by", "TEXT")
+        _add_column_if_missing(c, "ingest_jobs", "lease_until", "REAL")
+    if version < SCHEMA_VERSION:
+        c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
 
 def init_db():
     with get_db_connection() as conn:
@@ -19,7 +192,8 @@ def init_db():
         c.execute('''CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             userid TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
+            password TEXT NOT NULL,
+            token_version INTEGER NOT NULL DEFAULT 0
         )''')
         c.execute('''CREATE TABLE IF NOT EXISTS pdfs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,17 +201,109 @@ def init_db():
             filepath TEXT NOT NULL,
             uploaded_by TEXT NOT NULL,
             is_public INTEGER DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            file_hash TEXT,
+            bytes INTEGER
         )''')
         c.execute('''CREATE TABLE IF NOT EXISTS ingest_state (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             filename TEXT NOT NULL,
             ingested_by TEXT NOT NULL,
             is_public INTEGER DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            file_hash TEXT
+        )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS ingest_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            submitted_by TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            started_at TEXT,
+            finished_at TEXT,
+            stats TEXT,
+            claimed_by TEXT,
+            lease_until REAL
         )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS ingest_job_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            chunks INTEGER DEFAULT 0,
+            error TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (job_id, filename)
+        )''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs (status, id)')
+        c.execute('''CREATE TABLE IF NOT EXISTS memory_ring (
+            userid TEXT PRIMARY KEY,
+            next_seq INTEGER NOT NULL DEFAULT 0,
+            ring_size INTEGER,
+            memory_limit INTEGER
+        )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS chat_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            userid TEXT NOT NULL,
+            message TEXT NOT NULL,
+            response TEXT,
+            prompt_tokens INTEGER,
+            response_tokens INTEGER,
+            created_at TEXT NOT NULL
+        )''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_chat_turns_user ON chat_turns (userid, id)')
+        c.execute('''CREATE TABLE IF NOT EXISTS source_catalog (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            ingested_by TEXT NOT NULL,
+            is_public INTEGER DEFAULT 0,
+            chunk_count INTEGER NOT NULL DEFAULT 0,
+            bytes INTEGER NOT NULL DEFAULT 0,
+            ingested_at TEXT NOT NULL,
+            UNIQUE (source, ingested_by)
+        )''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_source_catalog_owner ON source_catalog (ingested_by, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_source_catalog_public ON source_catalog (is_public, id)')
+        c.execute('''CREATE TABLE IF NOT EXISTS data_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TEXT NOT NULL
+        )''')
+        _migrate(c)
         conn.commit()
 
+######################################
+# Keyset pages
+######################################
+
+def _sql_timestamp(value) -> Optional[str]:
+    """A datetime as the created_at columns store it (naive UTC isoformat), for comparisons."""
+    if value is None or isinstance(value, str):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+def _keyset_page(table: str, columns: str, to_dict, filters, limit: int, cursor: Optional[int]) -> dict:
+    """
+    One page of `table` in id order: {"items", "next_cursor"}. `filters` are (condition, value)
+    pairs, those with a None value are skipped. Rows start after id `cursor`, so a page costs
+    the same however deep it is; next_cursor is None on the last page.
+    """
+    conditions, params = ["id > ?"], [cursor or 0]
+    for condition, value in filters:
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute(f'SELECT {columns} FROM {table} WHERE {" AND ".join(conditions)} ORDER BY id LIMIT ?',
+                  (*params, limit + 1))
+        rows = c.fetchall()
+    items = [to_dict(row) for row in rows[:limit]]
+    return {"items": items, "next_cursor": items[-1]["id"] if len(rows) > limit else None}
+
 ######################################
 # users
 ######################################
@@ -53,11 +319,22 @@ def add_user(userid: str, password: str, is_admin: int = 0) -> bool:
         return False
 
 def delete_user(userid: str) -> bool:
+    """
+    Delete a user with their memory ring and chat turns, so a user created later under the
+    same userid starts empty. The memory vectors are removed by vectordb.clear_history_by_user.
+    """
     with get_db_connection() as conn:
         c = conn.cursor()
         c.execute('DELETE FROM users WHERE userid = ?', (userid,))
+        deleted = c.rowcount > 0
+        if deleted:
+            c.execute('DELETE FROM memory_ring WHERE userid = ?', (userid,))
+            c.execute('DELETE FROM chat_turns WHERE userid = ?', (userid,))
         conn.commit()
-        return c.rowcount > 0
+    credential_cache.invalidate(userid)
+    _invalidate_token_version(userid)
+    answer_cache.invalidate(userid)
+    return deleted
 
 def authenticate_user(userid: str, password: str) -> bool:
     with get_db_connection() as conn:
@@ -68,9 +345,62 @@ def authenticate_user(userid: str, password: str) -> bool:
 def update_user_password(userid: str, new_password: str) -> bool:
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute('UPDATE users SET password = ? WHERE userid = ?', (new_password, userid))
+        c.execute('UPDATE users SET password = ?, token_version = token_version + 1 WHERE userid = ?', (new_password, userid))
         conn.commit()
-        return c.rowcount > 0
+    credential_cache.invalidate(userid)
+    _invalidate_token_version(userid)
+    return c.rowcount > 0
+
+_TOKEN_VERSION_CACHE_MAX = 10000
+_token_versions = {}  # userid -> (version, expiry)
+_token_versions_lock = threading.Lock()
+_token_versions_generation = 0
+
+def _invalidate_token_version(userid: str):
+    global _token_versions_generation
+    with _token_versions_lock:
+        _token_versions.pop(userid, None)
+        _token_versions_generation += 1
+
+def get_token_version(userid: str) -> Optional[str]:
+    """
+    Version that userid's session tokens must carry, or None if there is no such user.
+    Combines the row id with token_version, so tokens neither survive a password change
+    nor carry over to a new user created later under the same userid.
+
+    Found versions are cached for TOKEN_VERSION_CACHE_TTL seconds. A password change or
+    delete drops the entry in the process that made it, so revocation there is immediate;
+    other server workers notice within TOKEN_VERSION_CACHE_TTL seconds.
+    """
+    now = time.monotonic()
+    with _token_versions_lock:
+        cached = _token_versions.get(userid)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        generation = _token_versions_generation
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT id, token_version FROM users WHERE userid = ?', (userid,))
+        row = c.fetchone()
+    version = f"{row[0]}.{row[1]}" if row else None
+    if version is not None and TOKEN_VERSION_CACHE_TTL > 0:
+        with _token_versions_lock:
+            # Not cached if a change was made meanwhile: the row read may predate it
+            if generation == _token_versions_generation:
+                if len(_token_versions) >= _TOKEN_VERSION_CACHE_MAX:
+                    for user in [user for user, (_, expiry) in _token_versions.items() if expiry <= now]:
+                        del _token_versions[user]
+                    if len(_token_versions) >= _TOKEN_VERSION_CACHE_MAX:
+                        _token_versions.clear()
+                _token_versions[userid] = (version, now + TOKEN_VERSION_CACHE_TTL)
+    return version
+
+def get_user(userid: str) -> Optional[dict]:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT id, userid FROM users WHERE userid = ?', (userid,))
+        row = c.fetchone()
+        return dict(id=row[0], userid=row[1]) if row else None
 
 def get_all_users() -> list:
     with get_db_connection() as conn:
@@ -79,33 +409,71 @@ def get_all_users() -> list:
         rows = c.fetchall()
         return [dict(id=row[0], userid=row[1], password=row[2]) for row in rows]
 
+def get_users_page(limit: int = 100, cursor: Optional[int] = None, prefix: Optional[str] = None) -> dict:
+    """Users in id order, optionally only those whose name starts with `prefix`."""
+    like = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" if prefix else None
+    return _keyset_page("users", "id, userid", lambda row: dict(id=row[0], userid=row[1]),
+                        [("userid LIKE ? ESCAPE '\\'", like)], limit, cursor)
+
 ######################################
 # pdfs
 ######################################
 
-def add_pdf(filename: str, uploaded_by: str, is_global: int = 0, filepath: Optional[str] = None) -> int:
+def add_pdf(filename: str, uploaded_by: str, is_global: int = 0, filepath: Optional[str] = None,
+            file_hash: Optional[str] = None, size: Optional[int] = None) -> int:
+    """Record an uploaded PDF, with the SHA-256 and byte size of the stored file when known."""
     if filepath is None:
         filepath = filename
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute('INSERT INTO pdfs (filename, filepath, uploaded_by, is_public, created_at) VALUES (?, ?, ?, ?, ?)',
-                  (filename, filepath, uploaded_by, is_global, datetime.utcnow().isoformat()))
+        c.execute('INSERT INTO pdfs (filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                  (filename, filepath, uploaded_by, is_global, datetime.utcnow().isoformat(), file_hash, size))
         conn.commit()
         return c.lastrowid
 
 def get_pdfs_by_user(uploaded_by: str) -> list:
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at FROM pdfs WHERE uploaded_by = ?', (uploaded_by,))
+        c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes FROM pdfs WHERE uploaded_by = ?', (uploaded_by,))
         rows = c.fetchall()
-        return [dict(id=row[0], filename=row[1], filepath=row[2], uploaded_by=row[3], is_public=row[4], created_at=row[5]) for row in rows]
+        return [_pdf_row_to_dict(row) for row in rows]
+
+def _pdf_row_to_dict(row) -> dict:
+    return dict(id=row[0], filename=row[1], filepath=row[2], uploaded_by=row[3], is_public=row[4], created_at=row[5],
+                file_hash=row[6], bytes=row[7])
+
+def get_pdf(filename: str, uploaded_by: Optional[str] = None) -> Optional[dict]:
+    """First uploaded PDF row with this filename, optionally restricted to one uploader."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        if uploaded_by is None:
+            c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes FROM pdfs WHERE filename = ? ORDER BY id LIMIT 1', (filename,))
+        else:
+            c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes FROM pdfs WHERE filename = ? AND uploaded_by = ? ORDER BY id LIMIT 1',
+                      (filename, uploaded_by))
+        row = c.fetchone()
+        return _pdf_row_to_dict(row) if row else None
+
+def get_public_pdfs() -> list:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes FROM pdfs WHERE is_public = 1')
+        return [_pdf_row_to_dict(row) for row in c.fetchall()]
 
 def get_all_pdfs() -> list:
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at FROM pdfs')
+        c.execute('SELECT id, filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes FROM pdfs')
         rows = c.fetchall()
-        return [dict(id=row[0], filename=row[1], filepath=row[2], uploaded_by=row[3], is_public=row[4], created_at=row[5]) for row in rows]
+        return [_pdf_row_to_dict(row) for row in rows]
+
+def get_pdfs_page(limit: int = 100, cursor: Optional[int] = None, uploaded_by: Optional[str] = None,
+                  is_public: Optional[int] = None, created_after=None, created_before=None) -> dict:
+    """Uploaded PDF rows in id order, filtered by uploader, visibility and upload time."""
+    return _keyset_page("pdfs", "id, filename, filepath, uploaded_by, is_public, created_at, file_hash, bytes", _pdf_row_to_dict,
+                        [("uploaded_by = ?", uploaded_by), ("is_public = ?", is_public),
+                         ("created_at >= ?", _sql_timestamp(created_after)),
+                         ("created_at < ?", _sql_timestamp(created_before))], limit, cursor)
 
 def delete_pdf_by_filename(filename: str):
     with get_db_connection() as conn:
@@ -132,13 +500,28 @@ def get_pdf_filepath_by_filename(filename: str) -> Optional[str]:
 # ingest_state
 ######################################
 
-def ingest(pdf_filename: str, ingested_by: str, is_public: int):
+def ingest(pdf_filename: str, ingested_by: str, is_public: int, file_hash: Optional[str] = None) -> int:
+    """Record that ingested_by has pdf_filename in the vector store. One row per (filename, ingested_by); returns its id."""
+    now = datetime.utcnow().isoformat()
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute('INSERT INTO ingest_state (filename, ingested_by, is_public, created_at) VALUES (?, ?, ?, ?)',
-                  (pdf_filename, ingested_by, is_public, datetime.utcnow().isoformat()))
+        c.execute('''INSERT INTO ingest_state (filename, ingested_by, is_public, created_at, file_hash)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (filename, ingested_by) DO UPDATE SET
+                is_public = excluded.is_public, file_hash = excluded.file_hash, created_at = excluded.created_at''',
+                  (pdf_filename, ingested_by, is_public, now, file_hash))
+        c.execute('SELECT id FROM ingest_state WHERE filename = ? AND ingested_by = ?', (pdf_filename, ingested_by))
+        row_id = c.fetchone()[0]
         conn.commit()
-        return c.lastrowid
+        return row_id
+
+def get_ingest_state(pdf_filename: str, ingested_by: str) -> Optional[dict]:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT id, filename, ingested_by, is_public, created_at, file_hash FROM ingest_state WHERE filename = ? AND ingested_by = ?',
+                  (pdf_filename, ingested_by))
+        row = c.fetchone()
+        return dict(id=row[0], filename=row[1], ingested_by=row[2], is_public=row[3], created_at=row[4], file_hash=row[5]) if row else None
 
 def get_ingested_pdfs_by_user(ingested_by: str):
     with get_db_connection() as conn:
@@ -154,6 +537,15 @@ def get_all_ingested_pdfs():
         rows = c.fetchall()
         return [dict(id=row[0], filename=row[1], ingested_by=row[2], is_public=row[3], created_at=row[4]) for row in rows]
 
+def get_ingested_pdfs_page(limit: int = 100, cursor: Optional[int] = None, ingested_by: Optional[str] = None,
+                           is_public: Optional[int] = None, created_after=None, created_before=None) -> dict:
+    """Ingested PDF rows in id order, filtered by owner, visibility and ingestion time."""
+    return _keyset_page("ingest_state", "id, filename, ingested_by, is_public, created_at",
+                        lambda row: dict(id=row[0], filename=row[1], ingested_by=row[2], is_public=row[3], created_at=row[4]),
+                        [("ingested_by = ?", ingested_by), ("is_public = ?", is_public),
+                         ("created_at >= ?", _sql_timestamp(created_after)),
+                         ("created_at < ?", _sql_timestamp(created_before))], limit, cursor)
+
 def delete_ingested_pdf_by_filename(pdf_filename: str):
     with get_db_connection() as conn:
         c = conn.cursor()
@@ -168,6 +560,294 @@ def delete_ingested_pdf_by_id(id: str):
         conn.commit()
         return c.rowcount > 0
 
+######################################
+# ingest_jobs
+######################################
+
+def _job_row_to_dict(row) -> dict:
+    return dict(id=row[0], kind=row[1], params=json.loads(row[2] or "{}"), submitted_by=row[3], status=row[4],
+                error=row[5], created_at=row[6], started_at=row[7], finished_at=row[8],
+                stats=json.loads(row[9]) if row[9] else None)
+
+def create_ingest_job(kind: str, params: dict, submitted_by: str) -> int:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('INSERT INTO ingest_jobs (kind, params, submitted_by, created_at) VALUES (?, ?, ?, ?)',
+                  (kind, json.dumps(params), submitted_by, datetime.utcnow().isoformat()))
+        conn.commit()
+        return c.lastrowid
+
+def claim_next_ingest_job(owner: str, lease_seconds: float) -> Optional[dict]:
+    """
+    Atomically move the oldest queued job to 'running' under owner's lease and return it,
+    or None if the queue is empty. The owner keeps the job by renewing the lease.
+    """
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''UPDATE ingest_jobs SET status = 'running', started_at = ?, claimed_by = ?, lease_until = ?
+            WHERE id = (SELECT id FROM ingest_jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+            RETURNING id, kind, params, submitted_by, status, error, created_at, started_at, finished_at, stats''',
+                  (datetime.utcnow().isoformat(), owner, time.time() + lease_seconds))
+        row = c.fetchone()
+        conn.commit()
+        return _job_row_to_dict(row) if row else None
+
+def renew_ingest_job_lease(job_id: int, owner: str, lease_seconds: float) -> bool:
+    """Extend owner's lease on a running job; False if the job is no longer running under owner."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute("UPDATE ingest_jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND claimed_by = ?",
+                  (time.time() + lease_seconds, job_id, owner))
+        conn.commit()
+        return c.rowcount > 0
+
+def finish_ingest_job(job_id: int, status: str, error: Optional[str] = None, stats: Optional[dict] = None,
+                      owner: Optional[str] = None):
+    """Record the outcome of a job. With owner, only if the job is still held by owner (its lease was not taken over)."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        query = 'UPDATE ingest_jobs SET status = ?, error = ?, finished_at = ?, stats = ? WHERE id = ?'
+        params = [status, error, datetime.utcnow().isoformat(), json.dumps(stats) if stats is not None else None, job_id]
+        if owner is not None:
+            query += " AND status = 'running' AND claimed_by = ?"
+            params.append(owner)
+        c.execute(query, params)
+        conn.commit()
+        return c.rowcount > 0
+
+def requeue_expired_ingest_jobs() -> int:
+    """
+    Put 'running' jobs whose lease expired back in the queue: their worker stopped, with
+    its process or machine. Jobs claimed before leases existed have none and count as expired.
+    """
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''UPDATE ingest_jobs SET status = 'queued', started_at = NULL, claimed_by = NULL, lease_until = NULL
+            WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)''', (time.time(),))
+        conn.commit()
+        return c.rowcount
+
+def set_ingest_job_file(job_id: int, filename: str, status: str, chunks: int = 0, error: Optional[str] = None):
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO ingest_job_files (job_id, filename, status, chunks, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (job_id, filename) DO UPDATE SET
+                status = excluded.status, chunks = excluded.chunks, error = excluded.error, updated_at = excluded.updated_at''',
+                  (job_id, filename, status, chunks, error, datetime.utcnow().isoformat()))
+        conn.commit()
+
+def get_ingest_job(job_id: int) -> Optional[dict]:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT id, kind, params, submitted_by, status, error, created_at, started_at, finished_at, stats FROM ingest_jobs WHERE id = ?', (job_id,))
+        row = c.fetchone()
+        if not row:
+            return None
+        job = _job_row_to_dict(row)
+        c.execute('SELECT filename, status, chunks, error, updated_at FROM ingest_job_files WHERE job_id = ? ORDER BY id', (job_id,))
+        job["files"] = [dict(filename=r[0], status=r[1], chunks=r[2], error=r[3], updated_at=r[4]) for r in c.fetchall()]
+        return job
+
+######################################
+# memory_ring
+######################################
+
+def claim_memory_slot(userid: str, default_limit: int) -> dict:
+    """
+    Reserve the next position in userid's chat memory ring. Returns {"seq", "limit",
+    "previous_limit"}: the message goes to slot seq % limit, where limit is the user's
+    memory_limit or default_limit. previous_limit is the ring size of the last append,
+    None if the user has no ring yet.
+    """
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        # The insert takes the write lock, so the read and the increment below are atomic
+        c.execute('INSERT OR IGNORE INTO memory_ring (userid) VALUES (?)', (userid,))
+        c.execute('SELECT next_seq, ring_size, memory_limit FROM memory_ring WHERE userid = ?', (userid,))
+        seq, previous_limit, memory_limit = c.fetchone()
+        limit = memory_limit or default_limit
+        c.execute('UPDATE memory_ring SET next_seq = next_seq + 1, ring_size = ? WHERE userid = ?', (limit, userid))
+        conn.commit()
+        return dict(seq=seq, limit=limit, previous_limit=previous_limit)
+
+def set_memory_seq(userid: str, next_seq: int):
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('UPDATE memory_ring SET next_seq = ? WHERE userid = ?', (next_seq, userid))
+        conn.commit()
+
+def reset_memory_ring(userid: Optional[str] = None):
+    """Restart the ring at slot 0 after the memory collection was cleared. All users if userid is None."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        if userid is None:
+            c.execute('UPDATE memory_ring SET next_seq = 0, ring_size = 0')
+        else:
+            c.execute('UPDATE memory_ring SET next_seq = 0, ring_size = 0 WHERE userid = ?', (userid,))
+        conn.commit()
+
+def get_memory_limit(userid: str) -> Optional[int]:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT memory_limit FROM memory_ring WHERE userid = ?', (userid,))
+        row = c.fetchone()
+        return row[0] if row else None
+
+def set_memory_limit(userid: str, memory_limit: Optional[int]):
+    """Per-user chat memory size; None falls back to the default. Applied from the next append."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO memory_ring (userid, memory_limit) VALUES (?, ?)
+            ON CONFLICT (userid) DO UPDATE SET memory_limit = excluded.memory_limit''', (userid, memory_limit))
+        conn.commit()
+
+######################################
+# chat_turns
+######################################
+
+def _turn_row_to_dict(row) -> dict:
+    return dict(id=row[0], message=row[1], response=row[2], prompt_tokens=row[3], response_tokens=row[4],
+                created_at=row[5])
+
+def add_chat_turn(userid: str, message: str, response: Optional[str] = None, prompt_tokens: Optional[int] = None,
+                  response_tokens: Optional[int] = None, created_at: Optional[str] = None) -> int:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO chat_turns (userid, message, response, prompt_tokens, response_tokens, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)''',
+                  (userid, message, response, prompt_tokens, response_tokens, created_at or datetime.utcnow().isoformat()))
+        conn.commit()
+        return c.lastrowid
+
+def add_chat_turns(userid: str, turns: List[Tuple[str, Optional[str], str]]):
+    """Bulk insert (message, response, created_at) turns in one transaction."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.executemany('INSERT INTO chat_turns (userid, message, response, created_at) VALUES (?, ?, ?, ?)',
+                      [(userid, message, response, created_at) for message, response, created_at in turns])
+        conn.commit()
+
+def get_chat_turns(userid: str, limit: int = 50, before_id: Optional[int] = None) -> list:
+    """Newest turns first, at most `limit`, only those with id < before_id when given. An index range scan."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''SELECT id, message, response, prompt_tokens, response_tokens, created_at FROM chat_turns
+            WHERE userid = ? AND id < ? ORDER BY id DESC LIMIT ?''',
+                  (userid, before_id if before_id is not None else 2 ** 63 - 1, limit))
+        return [_turn_row_to_dict(row) for row in c.fetchall()]
+
+def get_chat_turns_page(userid: str, limit: int = 50, cursor: Optional[int] = None) -> dict:
+    """
+    One page of chat turns, oldest first: {"turns", "next_cursor"}. Pages go back in time
+    from the newest turn; pass next_cursor to get the page before, None when there is none.
+    """
+    turns = get_chat_turns(userid, limit + 1, cursor)
+    next_cursor = turns[limit - 1]["id"] if len(turns) > limit else None
+    return {"turns": turns[:limit][::-1], "next_cursor": next_cursor}
+
+def delete_chat_turns(userid: Optional[str] = None) -> int:
+    """Delete a user's chat turns, or everyone's if userid is None."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        if userid is None:
+            c.execute('DELETE FROM chat_turns')
+        else:
+            c.execute('DELETE FROM chat_turns WHERE userid = ?', (userid,))
+        conn.commit()
+        return c.rowcount
+
+######################################
+# source catalog
+######################################
+# One row per ingested (source, owner) in the vector store, kept up to date by the
+# vectordb write paths so listing sources never reads chunks. bytes is the UTF-8 size
+# of the stored chunk text.
+
+_SOURCE_COLUMNS = "id, source, ingested_by, is_public, chunk_count, bytes, ingested_at"
+
+def _source_row_to_dict(row) -> dict:
+    return dict(id=row[0], source=row[1], ingested_by=row[2], is_public=row[3], chunk_count=row[4],
+                bytes=row[5], ingested_at=row[6])
+
+def set_source(source: str, ingested_by: str, is_public: int, chunk_count: int, size: int):
+    """Record the stored totals of one source, replacing what was recorded before."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO source_catalog (source, ingested_by, is_public, chunk_count, bytes, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source, ingested_by) DO UPDATE SET is_public = excluded.is_public,
+                chunk_count = excluded.chunk_count, bytes = excluded.bytes, ingested_at = excluded.ingested_at''',
+                  (source, ingested_by, is_public, chunk_count, size, datetime.utcnow().isoformat()))
+        conn.commit()
+
+def add_source_chunks(rows: List[Tuple[str, str, int, int, int]]):
+    """Add (source, ingested_by, is_public, chunk_count, bytes) to the recorded totals, in one transaction."""
+    now = datetime.utcnow().isoformat()
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.executemany('''INSERT INTO source_catalog (source, ingested_by, is_public, chunk_count, bytes, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source, ingested_by) DO UPDATE SET is_public = excluded.is_public,
+                chunk_count = chunk_count + excluded.chunk_count, bytes = bytes + excluded.bytes,
+                ingested_at = excluded.ingested_at''',
+                      [(*row, now) for row in rows])
+        conn.commit()
+
+def delete_sources(source: Optional[str] = None, ingested_by: Optional[str] = None) -> int:
+    """Delete the rows of a source, of an owner, of both, or all rows when neither is given."""
+    conditions = [condition for condition, value in (("source = ?", source), ("ingested_by = ?", ingested_by))
+                  if value is not None]
+    params = [value for value in (source, ingested_by) if value is not None]
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM source_catalog' + (f' WHERE {" AND ".join(conditions)}' if conditions else ''), params)
+        conn.commit()
+        return c.rowcount
+
+def replace_sources(rows: List[Tuple[str, str, int, int, int]]):
+    """Replace the whole catalog with (source, ingested_by, is_public, chunk_count, bytes) rows."""
+    now = datetime.utcnow().isoformat()
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM source_catalog')
+        c.executemany('''INSERT INTO source_catalog (source, ingested_by, is_public, chunk_count, bytes, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?)''', [(*row, now) for row in rows])
+        conn.commit()
+
+def get_all_sources() -> list:
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute(f'SELECT {_SOURCE_COLUMNS} FROM source_catalog ORDER BY id')
+        return [_source_row_to_dict(row) for row in c.fetchall()]
+
+def get_sources_page(limit: int = 100, cursor: Optional[int] = None, ingested_by: Optional[str] = None,
+                     is_public: Optional[int] = None, visible_to: Optional[str] = None) -> dict:
+    """Catalog rows in id order, filtered by owner, visibility, or what visible_to may see (own or public)."""
+    return _keyset_page("source_catalog", _SOURCE_COLUMNS, _source_row_to_dict,
+                        [("ingested_by = ?", ingested_by), ("is_public = ?", is_public),
+                         ("(ingested_by = ? OR is_public = 1)", visible_to)], limit, cursor)
+
+######################################
+# data_migrations
+######################################
+
+def claim_data_migration(name: str) -> bool:
+    """Record a one-off data migration as applied. False if it already was (by this or another process)."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('INSERT OR IGNORE INTO data_migrations (name, applied_at) VALUES (?, ?)',
+                  (name, datetime.utcnow().isoformat()))
+        conn.commit()
+        return c.rowcount > 0
+
+def release_data_migration(name: str):
+    """Undo claim_data_migration after the migration failed, so it runs again next time."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM data_migrations WHERE name = ?', (name,))
+        conn.commit()
+
 ######################################
 
 init_db() 
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+import hashlib
+import tempfile
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Largest single uploaded file, in bytes; 0 disables the limit
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+# Largest upload request (all its files), checked from Content-Length, else counted as the body arrives
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(1024 * 1024 * 1024)))
+# Bytes read, hashed and written per step while copying an upload to disk
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+class UploadTooLargeError(Exception):
+    """An uploaded file is larger than UPLOAD_MAX_BYTES."""
+
+class UploadSizeLimit:
+    """
+    ASGI middleware answering 413 to an upload request over max_bytes: up front when its
+    Content-Length says so, else as soon as the body received so far passes the limit, so a
+    chunked request without a length is cut off before it is spooled to disk whole.
+    Each file is also held to UPLOAD_MAX_BYTES by save_upload.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES, path_suffix: str = "/pdf/upload"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope, receive, send):
+        if not (self.max_bytes and scope["type"] == "http" and scope["path"].endswith(self.path_suffix)):
+            await self.app(scope, receive, send)
+            return
+        detail = f"Upload is over the {self.max_bytes} byte limit."
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised while FastAPI parses the form, which passes HTTPException through
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+def save_upload(upload, dest_path: str, max_bytes: int = UPLOAD_MAX_BYTES, chunk_bytes: int = UPLOAD_CHUNK_BYTES) -> dict:
+    """
+    Copy an UploadFile to dest_path, chunk_bytes at a time, and return {"sha256", "bytes"}.
+
+    The data goes to a temp file next to dest_path, which is renamed over it only once
+    complete, so a failed or oversized upload never leaves a partial or replaced PDF.
+    Memory use is one chunk whatever the file size. Raises UploadTooLargeError as soon as
+    the file is known to exceed max_bytes: up front when the size was sent, else while copying.
+    """
+    size_hint = getattr(upload, "size", None)
+    if max_bytes and size_hint is not None and size_hint > max_bytes:
+        raise UploadTooLargeError(f"{upload.filename} is {size_hint} bytes, over the {max_bytes} byte limit")
+    directory = os.path.dirname(dest_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for block in iter(lambda: upload.file.read(chunk_bytes), b""):
+                size += len(block)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLargeError(f"{upload.filename} is over the {max_bytes} byte limit")
+                h.update(block)
+                out.write(block)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return {"sha256": h.hexdigest(), "bytes": size}
@@ -1,204 +1,551 @@
 from dotenv import load_dotenv
 import os
-import uuid
+import re
 import time
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+import chromadb
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
+from utils.embeddings import build_embedding
+from utils.answer_cache import answer_cache
+from utils import sqlitedb
 
 load_dotenv(".env")
-embedding = OpenAIEmbeddings()
+# Cached OpenAI embeddings shared by ingestion, chat memory and retrieval
+embedding = build_embedding()
 splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=50)
 
-CHAT_HISTORY_LIMIT = 10
+# Messages kept in a user's chat memory unless set per user (sqlitedb.set_memory_limit)
+CHAT_HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", "10"))
+# Chunks embedded and written to Chroma per add_documents call (also the streaming ingest flush size);
+# embedding requests are split further by utils.embeddings
+INSERT_WINDOW = int(os.getenv("INSERT_WINDOW", "512"))
+# Chunk ids fetched per page when deleting by metadata filter
+DELETE_PAGE_SIZE = int(os.getenv("DELETE_PAGE_SIZE", "1000"))
 
 PERSIST_DIR = os.getenv("PERSIST_DIR", ".\\chroma")
 CHROMA_MEMORY_DIR = os.path.join(PERSIST_DIR, "chroma_memory")
 CHROMA_PDF_DIR = os.path.join(PERSIST_DIR, "chroma_pdf")
+# Default langchain_chroma collection name, kept so existing PDF stores still load
+PDF_COLLECTION = "langchain"
+# "shared" (default): every PDF chunk in PDF_COLLECTION, ownership only in metadata.
+# "tenant": each owner's private chunks in their own collection plus one shared public
+# collection. Convert an existing store with migrate_pdf_layout.py.
+PDF_STORE_LAYOUT = os.getenv("PDF_STORE_LAYOUT", "shared")
+PUBLIC_PDF_COLLECTION = "pdf_public"
+TENANT_PDF_PREFIX = "pdf_user_"
+
+######################################
+# Client / collection registry
+######################################
+
+_registry_lock = threading.Lock()
+_clients = {}
+_stores = {}
+
+def get_client(persist_dir):
+    """Return the process-wide persistent Chroma client for a directory."""
+    client = _clients.get(persist_dir)
+    if client is None:
+        with _registry_lock:
+            client = _clients.get(persist_dir)
+            if client is None:
+                client = chromadb.PersistentClient(path=persist_dir)
+                _clients[persist_dir] = client
+    return client
+
+def get_store(persist_dir, collection_name=PDF_COLLECTION):
+    """Return a cached Chroma wrapper for a collection, creating it on first use."""
+    key = (persist_dir, collection_name)
+    store = _stores.get(key)
+    if store is None:
+        client = get_client(persist_dir)
+        with _registry_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = Chroma(
+                    client=client,
+                    collection_name=collection_name,
+                    embedding_function=embedding,
+                )
+                _stores[key] = store
+    return store
+
+def get_collection(persist_dir, collection_name):
+    """
+    The chromadb collection itself, from the client's public API, for calls the Chroma
+    wrapper does not offer (count, upsert with stored embeddings).
+    """
+    return get_client(persist_dir).get_collection(collection_name)
+
+def invalidate_store(persist_dir, collection_name=None):
+    """Drop cached handles for one collection, or for every collection in the directory."""
+    with _registry_lock:
+        for key in list(_stores):
+            if key[0] == persist_dir and (collection_name is None or key[1] == collection_name):
+                del _stores[key]
+
+def list_collection_names(persist_dir):
+    # chromadb >= 0.6 returns names, older versions return Collection objects
+    return [getattr(col, "name", col) for col in get_client(persist_dir).list_collections()]
+
+def delete_collection(persist_dir, collection_name):
+    """Delete a collection and drop its cached handle. Missing collections are ignored."""
+    try:
+        if collection_name in list_collection_names(persist_dir):
+            get_client(persist_dir).delete_collection(collection_name)
+    finally:
+        invalidate_store(persist_dir, collection_name)
+
+def memory_store(user_id):
+    return get_store(CHROMA_MEMORY_DIR, f"user_{user_id}")
+
+def pdf_store(collection_name=PDF_COLLECTION):
+    return get_store(CHROMA_PDF_DIR, collection_name)
+
+######################################
+# PDF collection layout
+######################################
+
+def tenant_collection_name(user_id):
+    """Collection of user_id's private chunks in the tenant layout, within Chroma's name rules."""
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", str(user_id))
+    if safe != user_id or not safe[-1:].isalnum():
+        safe = f"{safe}_{hashlib.sha256(str(user_id).encode('utf-8')).hexdigest()[:8]}"
+    return TENANT_PDF_PREFIX + safe
+
+def pdf_collection_for(user_id, is_public, layout=None):
+    """Collection a chunk owned by user_id with this visibility is stored in."""
+    if (layout or PDF_STORE_LAYOUT) != "tenant":
+        return PDF_COLLECTION
+    return PUBLIC_PDF_COLLECTION if is_public else tenant_collection_name(user_id)
+
+def owner_collections(user_id, layout=None):
+    """
+    Collections that can hold chunks owned by user_id, which are also the ones its
+    retrieval searches: the shared collection, or the owner's and the public one.
+    """
+    if (layout or PDF_STORE_LAYOUT) != "tenant":
+        return [PDF_COLLECTION]
+    return [tenant_collection_name(user_id), PUBLIC_PDF_COLLECTION]
+
+def pdf_collections(layout=None):
+    """Names of the existing PDF collections that belong to a layout (default: the current one)."""
+    names = list_collection_names(CHROMA_PDF_DIR)
+    if (layout or PDF_STORE_LAYOUT) != "tenant":
+        return [n for n in names if n == PDF_COLLECTION]
+    return [n for n in names if n == PUBLIC_PDF_COLLECTION or n.startswith(TENANT_PDF_PREFIX)]
+
+def existing_pdf_stores(names):
+    """Stores for those of `names` that exist; reads never create empty collections."""
+    existing = None
+    stores = []
+    for name in names:
+        if (CHROMA_PDF_DIR, name) not in _stores:
+            if existing is None:
+                existing = set(list_collection_names(CHROMA_PDF_DIR))
+            if name not in existing:
+                continue
+        stores.append(pdf_store(name))
+    return stores
 
 ######################################
 # User message history embedding
 ######################################
 
+def _memory_slot_id(slot):
+    return f"slot-{slot}"
+
+def _compact_memory(db, user_id, keep):
+    """
+    Rewrite the user's memory as its newest `keep` messages in slots 0..keep-1, oldest first,
+    with their stored embeddings, and delete every other entry. Used when the ring is first
+    created over a collection written before it (random ids) and whenever its size changes,
+    since slot = seq % limit only holds for one limit. Returns how many were kept, which is
+    the seq of the message being appended.
+    """
+    existing = db.get(include=["embeddings", "documents", "metadatas"])
+    if not existing["ids"]:
+        sqlitedb.set_memory_seq(user_id, 1)
+        return 0
+    order = lambda i: ((existing["metadatas"][i] or {}).get("timestamp", 0), (existing["metadatas"][i] or {}).get("seq", 0))
+    rows = sorted(range(len(existing["ids"])), key=order)
+    rows = rows[len(rows) - keep:] if keep > 0 else []
+    if rows:
+        get_collection(CHROMA_MEMORY_DIR, f"user_{user_id}").upsert(
+            ids=[_memory_slot_id(seq) for seq in range(len(rows))],
+            embeddings=[existing["embeddings"][i] for i in rows],
+            documents=[existing["documents"][i] for i in rows],
+            metadatas=[{**(existing["metadatas"][i] or {}), "seq": seq} for seq, i in enumerate(rows)],
+        )
+    kept = {_memory_slot_id(seq) for seq in range(len(rows))}
+    stale = [cid for cid in existing["ids"] if cid not in kept]
+    if stale:
+        db.delete(ids=stale)
+    sqlitedb.set_memory_seq(user_id, len(rows) + 1)
+    return len(rows)
+
 def save_user_message(user_id, message):
-    db = Chroma(
-        collection_name=f"user_{user_id}",
-        embedding_function=embedding,
-        persist_directory=CHROMA_MEMORY_DIR
-    )
-    # Fetch all existing messages
-    all_docs = db.get()
-    all_ids = all_docs["ids"]
-    all_metadatas = all_docs["metadatas"]
-    # Sort by timestamp (if present), else keep as is
-    docs_with_time = []
-    for idx, meta in enumerate(all_metadatas):
-        ts = meta.get("timestamp", 0)
-        docs_with_time.append((all_ids[idx], ts))
-    docs_with_time.sort(key=lambda x: x[1])  # oldest first
-    # If at or above limit, delete oldest so only (limit-1) remain
-    if len(docs_with_time) >= CHAT_HISTORY_LIMIT:
-        num_to_delete = len(docs_with_time) - (CHAT_HISTORY_LIMIT - 1)
-        ids_to_delete = [doc[0] for doc in docs_with_time[:num_to_delete]]
-        db.delete(ids=ids_to_delete)
-    # Prepare new chunk(s) with timestamp
-    now = time.time()
-    doc = Document(page_content=message, metadata={"user_id": user_id, "timestamp": now})
-    db.add_documents([doc], ids=[str(uuid.uuid4())])
-
-def retrieve_user_memory(user_id, query, k=3):
-    db = Chroma(
-        collection_name=f"user_{user_id}",
-        embedding_function=embedding,
-        persist_directory=CHROMA_MEMORY_DIR
-    )
-    results = db.similarity_search(query, k=k)
+    """
+    Append a message to the user's memory, a ring of `limit` slots (CHAT_HISTORY_LIMIT or
+    the user's memory_limit). The position comes from a counter persisted in SQLite, so an
+    append overwrites exactly one id and never reads the collection, except on the first
+    append after the limit changed, which compacts the newest messages into the new ring.
+    """
+    # No answer cache invalidation here: cached answers are keyed by the recalled memory text
+    db = memory_store(user_id)
+    slot = sqlitedb.claim_memory_slot(user_id, CHAT_HISTORY_LIMIT)
+    seq, limit, previous_limit = slot["seq"], slot["limit"], slot["previous_limit"]
+    if previous_limit is None:
+        seq = _compact_memory(db, user_id, limit)
+    elif previous_limit and previous_limit != limit:
+        seq = _compact_memory(db, user_id, min(previous_limit, limit))
+    doc = Document(page_content=message, metadata={"user_id": user_id, "timestamp": time.time(), "seq": seq})
+    db.add_documents([doc], ids=[_memory_slot_id(seq % limit)])
+
+def embed_query(query):
+    """Embed a chat query once, so memory and PDF retrieval can share the vector."""
+    return embedding.embed_query(query)
+
+def retrieve_user_memory(user_id, query, k=3, query_vector=None):
+    db = memory_store(user_id)
+    if query_vector is None:
+        results = db.similarity_search(query, k=k)
+    else:
+        results = db.similarity_search_by_vector(query_vector, k=k)
     # Filter out any docs with None or empty page_content
     filtered_results = [doc for doc in results if getattr(doc, "page_content", None)]
     return filtered_results
 
 def get_all_history(user_id):
-    db = Chroma(
-        collection_name=f"user_{user_id}",
-        embedding_function=embedding,
-        persist_directory=CHROMA_MEMORY_DIR
-    )
+    db = memory_store(user_id)
     all_docs = db.get()
     docs = []
     for i, doc in enumerate(all_docs["documents"]):
         meta = all_docs["metadatas"][i]
-        ts = meta.get("timestamp", 0)
-        docs.append((ts, doc))
+        docs.append(((meta.get("timestamp", 0), meta.get("seq", 0)), doc))
     docs.sort(key=lambda x: x[0])  # oldest to newest
-    return [doc for ts, doc in docs]
+    return [doc for order, doc in docs]
+
+def import_memory_history():
+    """
+    One-off copy of messages that exist only in the memory collections (written before
+    chat turns were stored in SQLite) into chat_turns, so history keeps showing them.
+    Runs once per database; returns the number of messages copied.
+    """
+    if not sqlitedb.claim_data_migration("chat_turns_from_memory"):
+        return 0
+    try:
+        imported = 0
+        for user_id in get_available_user_ids():
+            docs = memory_store(user_id).get(include=["documents", "metadatas"])
+            rows = sorted(((meta or {}).get("timestamp", 0), text) for text, meta in zip(docs["documents"], docs["metadatas"]))
+            sqlitedb.add_chat_turns(user_id, [(text, None, datetime.utcfromtimestamp(ts).isoformat()) for ts, text in rows])
+            imported += len(rows)
+        return imported
+    except Exception:
+        sqlitedb.release_data_migration("chat_turns_from_memory")
+        raise
 
 def clear_history_by_user(user_id):
-    db = Chroma(
-        collection_name=f"user_{user_id}",
-        embedding_function=embedding,
-        persist_directory=CHROMA_MEMORY_DIR
-    )
-    db.delete_collection()
+    delete_collection(CHROMA_MEMORY_DIR, f"user_{user_id}")
+    sqlitedb.reset_memory_ring(user_id)
+    sqlitedb.delete_chat_turns(user_id)
+    answer_cache.invalidate(user_id)
 
 def clear_history_all():
     # Remove all user collections in memory dir
-    client = Chroma(persist_directory=CHROMA_MEMORY_DIR, embedding_function=None)._client
-    for col in client.list_collections():
-        db = Chroma(
-            collection_name=col.name,
-            embedding_function=embedding,
-            persist_directory=CHROMA_MEMORY_DIR
-        )
-        db.delete_collection()
+    for name in list_collection_names(CHROMA_MEMORY_DIR):
+        delete_collection(CHROMA_MEMORY_DIR, name)
+    sqlitedb.reset_memory_ring()
+    sqlitedb.delete_chat_turns()
+    answer_cache.clear()
 
 ######################################
 # PDF embedding
 ######################################
 
 def insert_new_chunks(chunks):
-    db = Chroma(
-        persist_directory=CHROMA_PDF_DIR,
-        embedding_function=embedding
-    )
-    # Chunks should be a list of Document objects with metadata
-    ids = [str(uuid.uuid4()) for _ in chunks]
-    db.add_documents(chunks, ids=ids)
+    """
+    Add chunks (Documents with user_id / source / is_public metadata) that are not stored yet.
+    Ids are content ids, as in sync_source_chunks, so inserting the same chunks again adds
+    nothing; the source catalog is credited with the chunks actually added.
+    """
+    by_collection = {}
+    next_id = ChunkIds()
+    for c in chunks:
+        name = pdf_collection_for(c.metadata.get("user_id"), c.metadata.get("is_public"))
+        docs, ids = by_collection.setdefault(name, ([], []))
+        docs.append(c)
+        ids.append(next_id(c))
+    totals = {}  # (source, owner) -> [is_public, chunks, bytes]
+    added = 0
+    for name, (docs, ids) in by_collection.items():
+        db = pdf_store(name)
+        for i in range(0, len(docs), INSERT_WINDOW):
+            window_ids = ids[i:i + INSERT_WINDOW]
+            stored = set(db.get(ids=window_ids, include=[])["ids"])
+            new = [(c, cid) for c, cid in zip(docs[i:i + INSERT_WINDOW], window_ids) if cid not in stored]
+            if not new:
+                continue
+            db.add_documents([c for c, _ in new], ids=[cid for _, cid in new])
+            added += len(new)
+            for c, _ in new:
+                if "source" in c.metadata and "user_id" in c.metadata:
+                    total = totals.setdefault((c.metadata["source"], c.metadata["user_id"]), [0, 0, 0])
+                    total[0] = c.metadata.get("is_public", 0)
+                    total[1] += 1
+                    total[2] += len(c.page_content.encode("utf-8"))
+    if totals:
+        sqlitedb.add_source_chunks([(source, owner, *total) for (source, owner), total in totals.items()])
+    if added:
+        answer_cache.clear()
     return True
 
+def source_filter(source, user_id):
+    """Chroma `where` clause for the chunks of one PDF ingested by one owner."""
+    return {"$and": [{"source": source}, {"user_id": user_id}]}
+
+class ChunkIds:
+    """
+    Content-addressed chunk ids: a hash of owner, source, visibility and text, plus
+    an occurrence counter so repeated text inside one PDF still gets distinct ids.
+    Stateful, so ids stay identical whether a PDF's chunks arrive at once or in windows.
+    """
+
+    def __init__(self):
+        self._seen = {}
+
+    def __call__(self, chunk):
+        meta = chunk.metadata
+        key = json.dumps([meta.get("user_id"), meta.get("source"), meta.get("is_public"), chunk.page_content])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        n = self._seen.get(digest, 0)
+        self._seen[digest] = n + 1
+        return digest if n == 0 else hashlib.sha256(f"{digest}#{n}".encode("utf-8")).hexdigest()
+
+def count_source_chunks(source, user_id, limit=None):
+    count = 0
+    for db in existing_pdf_stores(owner_collections(user_id)):
+        count += len(db.get(where=source_filter(source, user_id), limit=limit, include=[])["ids"])
+        if limit is not None and count >= limit:
+            break
+    return count
+
+# Striped locks: syncs of one (source, owner), e.g. from two ingest jobs of the same
+# user on different worker threads, must not diff and write the same chunks at once
+_source_locks = [threading.Lock() for _ in range(64)]
+
+def _source_lock(source, user_id):
+    return _source_locks[hash((source, user_id)) % len(_source_locks)]
+
+def sync_source_chunks(chunks, source, user_id, window=INSERT_WINDOW):
+    """
+    Make the stored chunks of (source, user_id) match `chunks`: only chunks whose
+    content id is new get embedded and added, and ids no longer produced are deleted.
+
+    `chunks` may be any iterable. It is consumed in windows of `window` chunks, each
+    embedded and written before the next is read, so only ids are kept for the whole PDF.
+    In the tenant layout a chunk goes to the owner's or the public collection by its
+    is_public flag, and stale chunks are deleted from wherever they are stored.
+    Syncs of the same (source, user_id) run one at a time within a process.
+    """
+    with _source_lock(source, user_id):
+        return _sync_source_chunks(chunks, source, user_id, window)
+
+def _sync_source_chunks(chunks, source, user_id, window):
+    homes = {}  # stored chunk id -> its store
+    for db in existing_pdf_stores(owner_collections(user_id)):
+        for cid in db.get(where=source_filter(source, user_id), include=[])["ids"]:
+            homes[cid] = db
+    existing = set(homes)
+    next_id = ChunkIds()
+    wanted = set()
+    added = 0
+    size = 0
+    is_public = 0
+    batches = {}  # collection name -> (docs, ids)
+
+    def flush(name):
+        nonlocal added
+        batch_docs, batch_ids = batches.pop(name)
+        pdf_store(name).add_documents(batch_docs, ids=batch_ids)
+        added += len(batch_docs)
+
+    for c in chunks:
+        cid = next_id(c)
+        wanted.add(cid)
+        size += len(c.page_content.encode("utf-8"))
+        is_public = c.metadata.get("is_public", 0)
+        if cid in existing:
+            continue
+        name = pdf_collection_for(user_id, c.metadata.get("is_public"))
+        batch_docs, batch_ids = batches.setdefault(name, ([], []))
+        batch_docs.append(c)
+        batch_ids.append(cid)
+        if len(batch_docs) >= window:
+            flush(name)
+    for name in list(batches):
+        flush(name)
+    stale = list(existing - wanted)
+    by_store = {}
+    for cid in stale:
+        by_store.setdefault(id(homes[cid]), (homes[cid], []))[1].append(cid)
+    for db, ids in by_store.values():
+        db.delete(ids=ids)
+    if wanted:
+        sqlitedb.set_source(source, user_id, is_public, len(wanted), size)
+    else:
+        sqlitedb.delete_sources(source, user_id)
+    if added or stale:
+        # Public chunks are shared, so any user's cached answers may depend on this source
+        answer_cache.clear()
+    return {"added": added, "removed": len(stale), "unchanged": len(wanted & existing)}
+
+def embedding_stats():
+    """Cache and scheduler counters (hit ratio, embeddings per second) for the shared embedding."""
+    return embedding.stats() if hasattr(embedding, "stats") else {}
+
 def get_available_user_ids():
     import re
-    client = Chroma(persist_directory=CHROMA_MEMORY_DIR, embedding_function=None)._client
     user_ids = []
-    for col in client.list_collections():
-        match = re.match(r"user_(.+)", col.name)
+    for name in list_collection_names(CHROMA_MEMORY_DIR):
+        match = re.match(r"user_(.+)", name)
         if match:
             user_ids.append(match.group(1))
     return user_ids
 
 def get_pdf_sources():
-    db = Chroma(
-        persist_directory=CHROMA_PDF_DIR,
-        embedding_function=embedding
-    )
-    all_docs = db.get()
-    sources = set()
-    for meta in all_docs["metadatas"]:
-        if "source" in meta and "user_id" in meta:
-            sources.add((meta["source"], meta["user_id"]))
-    return [{"source": s, "ingested_by": u} for s, u in sources]
-
-def retrieve_pdf_for_user(user_id, query, k=3):
-    db = Chroma(
-        persist_directory=CHROMA_PDF_DIR,
-        embedding_function=embedding
-    )
-    all_docs = db.get()
+    """Every ingested (source, owner) with its chunk count and size, from the source catalog."""
+    return sqlitedb.get_all_sources()
 
-    # Filter docs by user_id or is_public
-    filtered_docs = []
-    for i, meta in enumerate(all_docs["metadatas"]):
-        # print(meta.get("user_id"), meta.get("is_public"))
-        if meta.get("user_id") == user_id or meta.get("is_public") == 1:
-            doc_text = all_docs["documents"][i]
-            filtered_docs.append(Document(page_content=doc_text, metadata=meta))
-    if not filtered_docs:
-        return []
-
-    # Create a temporary Chroma collection for filtered docs
-    temp_db = Chroma.from_documents(filtered_docs, embedding=embedding)
-    results = temp_db.similarity_search(query, k=k)
-    return results
-
-def clear_pdf_by_source(source_name):
-    """
-    Delete all vector chunks for a given PDF source that belong to the specified user.
-    Only deletes chunks where both source (or filename) and user_id match.
-    For public PDFs, only deletes the user's own ingested copy.
-    """
-    db = Chroma(
-        persist_directory=CHROMA_PDF_DIR,
-        embedding_function=embedding
-    )
-    all_docs = db.get()
-    ids_to_delete = []
-    for i, meta in enumerate(all_docs["metadatas"]):
-        if (
-            (meta.get("source") == source_name or meta.get("filename") == source_name)
-            # and meta.get("user_id") == user_id
-        ):
-            ids_to_delete.append(all_docs["ids"][i])
-    if ids_to_delete:
-        db.delete(ids=ids_to_delete)
+def get_pdf_sources_page(limit=100, cursor=None, owner=None, is_public=None, visible_to=None):
+    """
+    One page of the source catalog: {"sources", "next_cursor"}, filtered by owner, visibility,
+    or visible_to (the user's own sources and public ones). Reads no chunks.
+    """
+    page = sqlitedb.get_sources_page(limit, cursor, owner, is_public, visible_to)
+    return {"sources": page["items"], "next_cursor": page["next_cursor"]}
+
+def rebuild_source_catalog(page_size=1000):
+    """
+    Recompute the source catalog from the chunks in the PDF store, a page at a time.
+    Only needed for stores written before the catalog existed, or to repair it.
+    Returns the number of sources found.
+    """
+    totals = {}
+    for name in pdf_collections():
+        db = pdf_store(name)
+        offset = 0
+        while True:
+            page = db.get(include=["metadatas", "documents"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            for meta, text in zip(page["metadatas"], page["documents"]):
+                meta = meta or {}
+                if "source" in meta and "user_id" in meta:
+                    total = totals.setdefault((meta["source"], meta["user_id"]), [0, 0, 0])
+                    total[0] = meta.get("is_public", 0)
+                    total[1] += 1
+                    total[2] += len((text or "").encode("utf-8"))
+            offset += len(page["ids"])
+    sqlitedb.replace_sources([(source, owner, *total) for (source, owner), total in totals.items()])
+    return len(totals)
+
+def build_source_catalog():
+    """Fill the source catalog from an existing PDF store, once per database. Returns the number of sources."""
+    if not sqlitedb.claim_data_migration("source_catalog"):
+        return 0
+    try:
+        return rebuild_source_catalog()
+    except Exception:
+        sqlitedb.release_data_migration("source_catalog")
+        raise
 
+def pdf_owner_filter(user_id):
+    """Chroma `where` clause matching chunks the user owns or that are public."""
+    return {"$or": [{"user_id": user_id}, {"is_public": 1}]}
+
+def retrieve_pdf_for_user(user_id, query, k=3, query_vector=None):
+    if PDF_STORE_LAYOUT != "tenant":
+        db = pdf_store()
+        # Single similarity search over the persisted index, restricted by ownership
+        if query_vector is None:
+            return db.similarity_search(query, k=k, filter=pdf_owner_filter(user_id))
+        return db.similarity_search_by_vector(query_vector, k=k, filter=pdf_owner_filter(user_id))
+    # Tenant layout: the owner's and the public collection hold exactly what the user may
+    # see, so search both without a filter and merge the top k by distance
+    if query_vector is None:
+        query_vector = embed_query(query)
+    scored = []
+    for db in existing_pdf_stores(owner_collections(user_id)):
+        scored.extend(db.similarity_search_by_vector_with_relevance_scores(query_vector, k=k))
+    scored.sort(key=lambda pair: pair[1])
+    return [doc for doc, _ in scored[:k]]
+
+def delete_where(db, where, page_size=DELETE_PAGE_SIZE):
+    """
+    Delete every chunk of a store matching a Chroma `where` clause. Only ids are fetched,
+    a page at a time, so memory stays bounded by page_size. Returns the number deleted.
+    """
+    removed = 0
+    while True:
+        ids = db.get(where=where, limit=page_size, include=[])["ids"]
+        if not ids:
+            return removed
+        db.delete(ids=ids)
+        removed += len(ids)
+
+def clear_pdf_by_source(source_name, user_id=None):
+    """
+    Delete the vector chunks of a PDF (matched by source or filename). With user_id,
+    only that owner's copy is deleted; a public PDF ingested by others is kept.
+    Returns the number of chunks removed.
+    """
+    where = {"$or": [{"source": source_name}, {"filename": source_name}]}
+    if user_id is None:
+        stores = [pdf_store(name) for name in pdf_collections()]
+    else:
+        where = {"$and": [where, {"user_id": user_id}]}
+        stores = existing_pdf_stores(owner_collections(user_id))
+    removed = sum(delete_where(db, where) for db in stores)
+    sqlitedb.delete_sources(source_name, user_id)
+    if removed:
+        answer_cache.clear()
+    return removed
 
 def clear_pdf_by_user(user_id):
     """
     Delete all vector chunks for all PDFs ingested by the specified user.
     Does not delete public PDFs ingested by other users.
+    Returns the number of chunks removed.
     """
-    db = Chroma(
-        persist_directory=CHROMA_PDF_DIR,
-        embedding_function=embedding
-    )
-    all_docs = db.get()
-    ids_to_delete = []
-    for i, meta in enumerate(all_docs["metadatas"]):
-        if meta.get("user_id") == user_id:
-            ids_to_delete.append(all_docs["ids"][i])
-    if ids_to_delete:
-        db.delete(ids=ids_to_delete)
+    removed = 0
+    if PDF_STORE_LAYOUT == "tenant":
+        # The private chunks are a whole collection; only the public one needs a filter
+        name = tenant_collection_name(user_id)
+        if name in list_collection_names(CHROMA_PDF_DIR):
+            removed += get_collection(CHROMA_PDF_DIR, name).count()
+        delete_collection(CHROMA_PDF_DIR, tenant_collection_name(user_id))
+    for db in existing_pdf_stores(owner_collections(user_id)):
+        removed += delete_where(db, {"user_id": user_id})
+    sqlitedb.delete_sources(ingested_by=user_id)
+    if removed:
+        # Public chunks are in other users' answers too, so drop every cached answer once
+        answer_cache.clear()
+    return removed
 
 def clear_all_pdf():
-    client = Chroma(persist_directory=CHROMA_PDF_DIR, embedding_function=None)._client
-    for col in client.list_collections():
-        db = Chroma(
-            collection_name=col.name,
-            embedding_function=embedding,
-            persist_directory=CHROMA_PDF_DIR
-        )
-        db.delete_collection()
+    for name in list_collection_names(CHROMA_PDF_DIR):
+        delete_collection(CHROMA_PDF_DIR, name)
+    sqlitedb.delete_sources()
+    answer_cache.clear()
 
 if __name__ == "__main__":
     print("=== Vectordb Test ===")
@@ -225,7 +572,7 @@ if __name__ == "__main__":
     print("PDF sources:", get_pdf_sources())
     print("Retrieve PDF for user (should get both public and own):", retrieve_pdf_for_user(test_user, "AI", k=2))
     print("Clearing PDF by source 'ml.pdf'...")
-    clear_pdf_by_source("ml.pdf", test_user)
+    print("Chunks removed:", clear_pdf_by_source("ml.pdf", test_user))
     print("Retrieve PDF for user after clear by source:", retrieve_pdf_for_user(test_user, "machine", k=2))
     print("Clearing all PDF data...")
     clear_all_pdf()
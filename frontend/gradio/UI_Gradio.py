@@ -1,8 +1,9 @@
 import gradio as gr
 import requests
-from requests.auth import HTTPBasicAuth
+from requests.auth import AuthBase
 import pandas as pd
 import os
+import json
 import logging
 from typing import List, Tuple, Dict, Any
 
@@ -13,35 +14,57 @@ logging.basicConfig(
 )
 # --- Configuration ---
 BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+PAGE_SIZE = 50
 
-# --- API Helper Functions --- (No changes here)
-def get_api_data(endpoint: str, auth_state: Dict[str, Any], key: str) -> list:
-    logging.info(f"Attempting to GET data from endpoint: {endpoint}")
+class TokenAuth(AuthBase):
+    """Sends the session token issued by /user/login or /admin/login as a Bearer header."""
+    def __init__(self, token: str):
+        self.token = token
+
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {self.token}"
+        return r
+
+# --- API Helper Functions ---
+def get_api_page(endpoint: str, auth_state: Dict[str, Any], key: str, params: dict = None) -> Tuple[list, Any]:
+    """One page of a list endpoint: (items, next_cursor), next_cursor None on the last page."""
+    logging.info(f"Attempting to GET data from endpoint: {endpoint} with params: {params}")
     auth_object = auth_state.get('auth') if auth_state else None
     if not auth_object:
         logging.warning(f"API call to {endpoint} failed: No auth object provided.")
-        return []
+        return [], None
     try:
-        res = requests.get(f"{BASE_URL}/{endpoint}", auth=auth_object, timeout=5)
+        res = requests.get(f"{BASE_URL}/{endpoint}", auth=auth_object, params=params, timeout=5)
         if res.status_code == 200:
             response_json = res.json()
+            next_cursor = None
             if isinstance(response_json, dict):
                 data = response_json.get(key, [])
+                next_cursor = response_json.get("next_cursor")
             elif isinstance(response_json, list):
                 data = response_json
             else:
                 logging.error(f"Unexpected JSON response type from {endpoint}: {type(response_json)}")
                 data = []
             logging.info(f"Successfully fetched {len(data)} items from {endpoint}.")
-            return data
+            return data, next_cursor
         else:
             logging.error(f"API call to {endpoint} failed with status {res.status_code}: {res.text}")
             gr.Warning(f"Failed to fetch data from {endpoint}. Status: {res.status_code}")
-            return []
+            return [], None
     except requests.exceptions.RequestException as e:
         logging.error(f"Exception during API call to {endpoint}: {e}")
         gr.Error(f"Connection Error: Could not reach the server at {BASE_URL}.")
-        return []
+        return [], None
+
+def get_api_data(endpoint: str, auth_state: Dict[str, Any], key: str) -> list:
+    """Every item of a list endpoint, following next_cursor page by page (for dropdowns)."""
+    items, cursor = [], None
+    while True:
+        data, cursor = get_api_page(endpoint, auth_state, key, {"limit": 1000, "cursor": cursor})
+        items.extend(data)
+        if cursor is None:
+            return items
 
 def get_all_users(auth_state: Dict[str, Any]) -> List[str]:
     users_data = get_api_data("admin/users", auth_state, "users")
@@ -66,12 +89,12 @@ def login(role: str, username: str, password: str):
     if not username or not password:
         gr.Warning("Username and password are required.")
         return None, gr.update(visible=True), gr.update(visible=False), gr.update(visible=False)
-    auth = HTTPBasicAuth(username, password)
-    endpoint = "admin/auth/check" if role == "Admin" else "user/auth/check"
+    endpoint = "admin/login" if role == "Admin" else "user/login"
     try:
-        res = requests.get(f"{BASE_URL}/{endpoint}", auth=auth, timeout=5)
+        # Log in once; later calls send the session token instead of the password
+        res = requests.post(f"{BASE_URL}/{endpoint}", json={"username": username, "password": password}, timeout=5)
         if res.status_code == 200:
-            auth_state = {"role": role.lower(), "username": username, "auth": auth}
+            auth_state = {"role": role.lower(), "username": username, "auth": TokenAuth(res.json()["token"])}
             gr.Info(f"{role} login successful!")
             logging.info(f"Login successful for user: '{username}'")
             return auth_state, gr.update(visible=False), gr.update(visible=role=="Admin"), gr.update(visible=role=="User")
@@ -138,9 +161,19 @@ def handle_api_delete(endpoint: str, auth_state: Dict[str, Any]):
         logging.error(f"Exception on DELETE to {endpoint}: {e}")
 
 # --- Chat Function ---
+def read_sse(res):
+    """Yield (event, data) pairs from a server-sent-events response."""
+    event = None
+    for line in res.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
 def user_chat(auth_state: dict, message: str, history: List[Dict[str, str]]):
     if not message:
-        return "", history
+        yield "", history
+        return
     logging.info(f"User '{auth_state.get('username')}' sent chat message: '{message}'")
     auth_object = auth_state.get('auth') if auth_state else None
     
@@ -148,17 +181,31 @@ def user_chat(auth_state: dict, message: str, history: List[Dict[str, str]]):
 
     if not auth_object:
         history.append({"role": "assistant", "content": "Authentication error. Please log out and log back in."})
-        return "", history
+        yield "", history
+        return
+    history.append({"role": "assistant", "content": ""})
     try:
         payload = {"user_id": auth_state['username'], "message": message}
-        res = requests.post(f"{BASE_URL}/user/chat", json=payload, auth=auth_object)
-        bot_response = "Answer : \n" + res.json().get("response", "Sorry, an error occurred.") + "\nPrompt : \n\n" + res.json().get("prompt", "Sorry, an error occurred.") if res.status_code == 200 else f"Error: {res.text}"
+        # Tokens arrive as server-sent events; update the last message as each one comes in
+        with requests.post(f"{BASE_URL}/user/chat/stream", json=payload, auth=auth_object, stream=True) as res:
+            if res.status_code != 200:
+                history[-1]["content"] = f"Error: {res.text}"
+                yield "", history
+                return
+            answer = ""
+            for event, data in read_sse(res):
+                if event == "token":
+                    answer += data["text"]
+                    history[-1]["content"] = "Answer : \n" + answer
+                elif event == "done":
+                    history[-1]["content"] = "Answer : \n" + answer + "\nPrompt : \n\n" + data.get("prompt", "")
+                elif event == "error":
+                    history[-1]["content"] = f"Error: {data.get('detail')}"
+                yield "", history
     except Exception as e:
-        bot_response = f"An error occurred: {e}"
+        history[-1]["content"] = f"An error occurred: {e}"
         logging.error(f"Chat request failed: {e}")
-    
-    history.append({"role": "assistant", "content": bot_response})
-    return "", history
+        yield "", history
 
 # --- UI Functions ---
 def list_data(endpoint: str, auth_state: dict, key: str):
@@ -166,6 +213,22 @@ def list_data(endpoint: str, auth_state: dict, key: str):
     data = get_api_data(endpoint, auth_state, key)
     return pd.DataFrame(data) if data else pd.DataFrame()
 
+def list_page(endpoint: str, auth_state: dict, key: str, pages: dict = None, move: int = 0):
+    """
+    One page of a list endpoint for a paged table: (DataFrame, pages, label). `pages` keeps the
+    cursors of the pages visited and the next page's cursor; move is 1 (next), -1 (previous)
+    or 0 (back to the first page).
+    """
+    pages = pages or {"cursors": [None], "next": None}
+    cursors = list(pages["cursors"]) if move else [None]
+    if move > 0 and pages["next"] is not None:
+        cursors.append(pages["next"])
+    elif move < 0 and len(cursors) > 1:
+        cursors.pop()
+    data, next_cursor = get_api_page(endpoint, auth_state, key, {"limit": PAGE_SIZE, "cursor": cursors[-1]})
+    label = f"Page {len(cursors)}" + ("" if next_cursor is not None else " (last)")
+    return (pd.DataFrame(data) if data else pd.DataFrame()), {"cursors": cursors, "next": next_cursor}, label
+
 def upload_files_action(auth_state: dict, files: list, is_public: str, role: str):
     if not files:
         gr.Warning("Please select at least one file to upload.")
@@ -200,6 +263,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="RAG Chatbot Portal") as demo:
                 with gr.Tabs():
                     with gr.Tab("List Users"):
                         admin_users_df = gr.Dataframe(interactive=False)
+                        admin_users_pages = gr.State()
+                        with gr.Row():
+                            admin_users_prev_btn = gr.Button("Previous page")
+                            admin_users_page_label = gr.Markdown()
+                            admin_users_next_btn = gr.Button("Next page")
                         admin_list_users_btn = gr.Button("Refresh User List")
                     with gr.Tab("Add User"):
                         with gr.Row():
@@ -225,6 +293,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="RAG Chatbot Portal") as demo:
                         admin_upload_btn = gr.Button("Upload PDF(s)", variant="primary")
                     with gr.Tab("List & Delete PDFs"):
                         admin_pdfs_df = gr.Dataframe(interactive=False)
+                        admin_pdfs_pages = gr.State()
+                        with gr.Row():
+                            admin_pdfs_prev_btn = gr.Button("Previous page")
+                            admin_pdfs_page_label = gr.Markdown()
+                            admin_pdfs_next_btn = gr.Button("Next page")
                         admin_list_pdfs_btn = gr.Button("Refresh PDF List")
                         admin_delete_files_select = gr.Dropdown(label="Select PDFs to delete", multiselect=True)
                         admin_delete_files_btn = gr.Button("Delete Selected PDFs", variant="stop")
@@ -250,6 +323,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="RAG Chatbot Portal") as demo:
                         admin_remove_user_data_btn = gr.Button("Remove All Data for User", variant="stop")
                     with gr.Tab("List Ingested"):
                         admin_ingested_df = gr.Dataframe(interactive=False)
+                        admin_ingested_pages = gr.State()
+                        with gr.Row():
+                            admin_ingested_prev_btn = gr.Button("Previous page")
+                            admin_ingested_page_label = gr.Markdown()
+                            admin_ingested_next_btn = gr.Button("Next page")
                         admin_list_ingested_btn = gr.Button("Refresh Ingested List")
                     with gr.Tab("Clear Memory"):
                         gr.Markdown("### Clear Specific User's Memory")
@@ -318,14 +396,14 @@ with gr.Blocks(theme=gr.themes.Soft(), title="RAG Chatbot Portal") as demo:
 
     # --- Refresh Functions --- (No changes here)
     def refresh_admin_view(auth_st):
-        if not auth_st: return (pd.DataFrame(), pd.DataFrame(), *[gr.update(choices=[], value=None)]*9)
+        if not auth_st: return (pd.DataFrame(), None, "", pd.DataFrame(), None, "", *[gr.update(choices=[], value=None)]*9)
         logging.info("Refreshing admin view.")
         users = get_all_users(auth_st)
         pdfs = get_all_pdfs(auth_st)
         sources_data = get_api_data("admin/vectordb/pdf", auth_st, "sources")
         sources_list = [s.get('source') for s in sources_data] if sources_data else []
         return (
-            list_data("admin/pdf", auth_st, "pdfs"), pd.DataFrame(sources_data) if sources_data else pd.DataFrame(),
+            *list_page("admin/pdf", auth_st, "pdfs"), *list_page("admin/vectordb/pdf", auth_st, "sources"),
             gr.update(choices=users), gr.update(choices=users), gr.update(choices=users),
             gr.update(choices=pdfs), gr.update(choices=pdfs), gr.update(choices=users),
             gr.update(choices=sources_list), gr.update(choices=users), gr.update(choices=users)
@@ -341,7 +419,7 @@ with gr.Blocks(theme=gr.themes.Soft(), title="RAG Chatbot Portal") as demo:
             gr.update(choices=pdfs), gr.update(choices=pdfs), gr.update(choices=ingested_pdfs)
         )
 
-    admin_outputs_for_refresh = [admin_pdfs_df, admin_ingested_df, admin_delete_user_select, admin_reset_pw_select, admin_chat_user_select, admin_delete_files_select, admin_ingest_pdf_select, admin_ingest_user_select, admin_remove_pdf_select, admin_remove_user_data_select, admin_clear_user_mem_select]
+    admin_outputs_for_refresh = [admin_pdfs_df, admin_pdfs_pages, admin_pdfs_page_label, admin_ingested_df, admin_ingested_pages, admin_ingested_page_label, admin_delete_user_select, admin_reset_pw_select, admin_chat_user_select, admin_delete_files_select, admin_ingest_pdf_select, admin_ingest_user_select, admin_remove_pdf_select, admin_remove_user_data_select, admin_clear_user_mem_select]
     user_outputs_for_refresh = [user_pdfs_df, user_ingested_df, user_delete_storage_select, user_ingest_select, user_remove_one_data_select]
     
     admin_tabs.select(refresh_admin_view, auth_state, admin_outputs_for_refresh)
@@ -350,20 +428,29 @@ with gr.Blocks(theme=gr.themes.Soft(), title="RAG Chatbot Portal") as demo:
     admin_ingest_type.change(lambda x: gr.update(visible=x=="Private"), admin_ingest_type, admin_ingest_user_select)
 
     # ... (rest of event handlers are unchanged)
-    admin_list_users_btn.click(lambda auth: list_data("admin/users", auth, "users"), auth_state, admin_users_df)
+    admin_users_outputs = [admin_users_df, admin_users_pages, admin_users_page_label]
+    admin_list_users_btn.click(lambda auth: list_page("admin/users", auth, "users"), auth_state, admin_users_outputs)
+    admin_users_prev_btn.click(lambda auth, p: list_page("admin/users", auth, "users", p, -1), [auth_state, admin_users_pages], admin_users_outputs)
+    admin_users_next_btn.click(lambda auth, p: list_page("admin/users", auth, "users", p, 1), [auth_state, admin_users_pages], admin_users_outputs)
     admin_add_user_btn.click(lambda auth, u, p: handle_api_post("admin/users", auth, json_data={"username":u, "password":p}), [auth_state, admin_add_user_username, admin_add_user_password], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_delete_user_btn.click(lambda auth, u: handle_api_delete(f"admin/users/{u}", auth), [auth_state, admin_delete_user_select], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_reset_pw_btn.click(lambda auth, u, p: handle_api_post(f"admin/users/{u}/reset_password", auth, json_data={"password":p}), [auth_state, admin_reset_pw_select, admin_reset_pw_new_pw], None)
-    admin_view_chat_btn.click(lambda auth, u: "\n".join(get_api_data(f"admin/chat/history/{u}", auth, "history")), [auth_state, admin_chat_user_select], admin_chat_history_display)
+    admin_view_chat_btn.click(lambda auth, u: "\n".join(get_api_page(f"admin/chat/history/{u}", auth, "history")[0]), [auth_state, admin_chat_user_select], admin_chat_history_display)
     admin_upload_btn.click(lambda auth, f, p: upload_files_action(auth, f, p, "admin"), [auth_state, admin_upload_files, admin_upload_is_public], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh).then(lambda: gr.update(value=None), None, admin_upload_files)
-    admin_list_pdfs_btn.click(lambda auth: list_data("admin/pdf", auth, "pdfs"), auth_state, admin_pdfs_df)
+    admin_pdfs_outputs = [admin_pdfs_df, admin_pdfs_pages, admin_pdfs_page_label]
+    admin_list_pdfs_btn.click(lambda auth: list_page("admin/pdf", auth, "pdfs"), auth_state, admin_pdfs_outputs)
+    admin_pdfs_prev_btn.click(lambda auth, p: list_page("admin/pdf", auth, "pdfs", p, -1), [auth_state, admin_pdfs_pages], admin_pdfs_outputs)
+    admin_pdfs_next_btn.click(lambda auth, p: list_page("admin/pdf", auth, "pdfs", p, 1), [auth_state, admin_pdfs_pages], admin_pdfs_outputs)
     admin_delete_files_btn.click(lambda auth, f: handle_api_post("admin/pdf/delete", auth, json_data={"filenames": f}), [auth_state, admin_delete_files_select], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_delete_public_btn.click(lambda auth: handle_api_post("admin/pdf/delete_public", auth), auth_state, None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_ingest_all_public_btn.click(lambda auth: handle_api_post("admin/vectordb/ingest/all", auth), auth_state, None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_ingest_specific_btn.click(lambda auth, f, t, u: handle_api_post(f"admin/vectordb/ingest/{'private' if t=='Private' else 'public'}/{f}", auth, params={"user_id": u} if t=='Private' else None), [auth_state, admin_ingest_pdf_select, admin_ingest_type, admin_ingest_user_select], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_remove_pdf_btn.click(lambda auth, f: handle_api_delete(f"admin/vectordb/pdf/{f}", auth), [auth_state, admin_remove_pdf_select], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
     admin_remove_user_data_btn.click(lambda auth, u: handle_api_delete(f"admin/vectordb/pdf/user/{u}", auth), [auth_state, admin_remove_user_data_select], None).then(refresh_admin_view, auth_state, admin_outputs_for_refresh)
-    admin_list_ingested_btn.click(lambda auth: list_data("admin/vectordb/pdf", auth, "sources"), auth_state, admin_ingested_df)
+    admin_ingested_outputs = [admin_ingested_df, admin_ingested_pages, admin_ingested_page_label]
+    admin_list_ingested_btn.click(lambda auth: list_page("admin/vectordb/pdf", auth, "sources"), auth_state, admin_ingested_outputs)
+    admin_ingested_prev_btn.click(lambda auth, p: list_page("admin/vectordb/pdf", auth, "sources", p, -1), [auth_state, admin_ingested_pages], admin_ingested_outputs)
+    admin_ingested_next_btn.click(lambda auth, p: list_page("admin/vectordb/pdf", auth, "sources", p, 1), [auth_state, admin_ingested_pages], admin_ingested_outputs)
     admin_clear_user_mem_btn.click(lambda auth, u: handle_api_delete(f"admin/vectordb/memory/{u}", auth), [auth_state, admin_clear_user_mem_select], None)
     admin_clear_all_mem_btn.click(lambda auth: handle_api_delete("admin/vectordb/memory", auth), auth_state, None)
     user_msg_box.submit(user_chat, [auth_state, user_msg_box, user_chatbot], [user_msg_box, user_chatbot])
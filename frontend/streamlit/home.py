@@ -1,6 +1,6 @@
 import streamlit as st
 import requests
-from requests.auth import HTTPBasicAuth
+from requests.auth import AuthBase
 import os
 
 # --- Configuration ---
@@ -8,6 +8,15 @@ BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 
 st.set_page_config(page_title="RAG Chatbot Portal", layout="wide")
 
+class TokenAuth(AuthBase):
+    """Sends the session token issued by /user/login or /admin/login as a Bearer header."""
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {self.token}"
+        return r
+
 # --- Session State Initialization ---
 def init_session_state():
     """Initializes all required session state variables."""
@@ -32,11 +41,12 @@ def login(role, username, password):
         return
 
     try:
-        auth = HTTPBasicAuth(username, password)
         endpoint = "admin" if role == "Admin" else "user"
-        res = requests.get(f"{BASE_URL}/{endpoint}/auth/check", auth=auth)
+        # Log in once; the dashboards send the session token instead of the password
+        res = requests.post(f"{BASE_URL}/{endpoint}/login", json={"username": username, "password": password})
 
         if res.status_code == 200:
+            auth = TokenAuth(res.json()["token"])
             st.session_state['logged_in'] = True
             st.session_state['role'] = role.lower()
             st.session_state['username'] = username
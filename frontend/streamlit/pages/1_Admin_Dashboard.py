@@ -13,25 +13,55 @@ if not st.session_state.get('logged_in') or st.session_state.get('role') != 'adm
 # --- Shared Variables ---
 BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 auth = st.session_state.get('auth')
+PAGE_SIZE = 50
+VISIBILITY = {"All": None, "Public": 1, "Private": 0}
 
 # --- Helper Functions ---
-def get_all_users():
+def fetch_all(endpoint, key):
+    """Every item of a paginated list endpoint, following next_cursor (for select boxes)."""
+    items, cursor = [], None
     try:
-        res = requests.get(f"{BASE_URL}/admin/users", auth=auth)
-        if res.status_code == 200:
-            return [u['username'] for u in res.json()]
-        return []
+        while True:
+            res = requests.get(f"{BASE_URL}/{endpoint}", params={"limit": 1000, "cursor": cursor}, auth=auth)
+            if res.status_code != 200:
+                return items
+            data = res.json()
+            items.extend(data.get(key, []))
+            cursor = data.get("next_cursor")
+            if cursor is None:
+                return items
     except Exception:
-        return []
+        return items
+
+def get_all_users():
+    return [u['username'] for u in fetch_all("admin/users", "users")]
 
 def get_all_pdfs():
+    return [pdf['filename'] for pdf in fetch_all("admin/pdf", "pdfs")]
+
+def paged_table(name, endpoint, key, params=None):
+    """One page of a list endpoint with Previous/Next buttons; the cursors of the visited pages stay in session state."""
+    params = {k: v for k, v in (params or {}).items() if v not in (None, "")}
+    state_key = f"{name}_cursors_{sorted(params.items())}"  # new filters start again at the first page
+    cursors = st.session_state.setdefault(state_key, [None])
+    if st.button("Refresh", key=f"{name}_refresh"):
+        cursors[:] = [None]
     try:
-        res = requests.get(f"{BASE_URL}/admin/pdf", auth=auth)
-        if res.status_code == 200:
-            return [pdf['filename'] for pdf in res.json().get("pdfs", [])]
-        return []
-    except Exception:
-        return []
+        res = requests.get(f"{BASE_URL}/{endpoint}", params={**params, "limit": PAGE_SIZE, "cursor": cursors[-1]}, auth=auth)
+    except Exception as e:
+        st.error(f"Error: {e}")
+        return None
+    if res.status_code != 200:
+        st.error(f"Failed to fetch {key}: {res.text}")
+        return None
+    data = res.json()
+    st.dataframe(pd.DataFrame(data.get(key, [])), use_container_width=True)
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    prev_col.button("Previous page", key=f"{name}_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+    page_col.caption(f"Page {len(cursors)}")
+    next_col.button("Next page", key=f"{name}_next", disabled=data.get("next_cursor") is None,
+                    on_click=cursors.append, args=(data.get("next_cursor"),))
+    return data
 
 # --- Main UI ---
 st.title("👑 Admin Dashboard")
@@ -51,15 +81,8 @@ if menu == "User Management":
     
     with tabs[0]: # List Users
         st.subheader("List All Users")
-        if st.button("Refresh User List"):
-            try:
-                res = requests.get(f"{BASE_URL}/admin/users", auth=auth)
-                if res.status_code == 200:
-                    st.dataframe(pd.DataFrame(res.json()), use_container_width=True)
-                else:
-                    st.error(f"Failed to fetch users: {res.text}")
-            except Exception as e:
-                st.error(f"Error: {e}")
+        name_prefix = st.text_input("Username starts with", key="users_prefix")
+        paged_table("users", "admin/users", "users", {"prefix": name_prefix})
 
     with tabs[1]: # Add User
         st.subheader("Add a New User")
@@ -122,22 +145,9 @@ elif menu == "Chat Management":
     st.subheader("View User Chat History")
     users_list = get_all_users()
     selected_user = st.selectbox("Select a user", users_list)
-    if st.button("View Chat History"):
-        if selected_user:
-            try:
-                res = requests.get(f"{BASE_URL}/admin/chat/history/{selected_user}", auth=auth)
-                if res.status_code == 200:
-                    history = res.json().get("history", [])
-                    if history:
-                        st.write(f"Chat History for **{selected_user}**:")
-                        for msg in history:
-                            st.text(f"- {msg}")
-                    else:
-                        st.info(f"No chat history found for '{selected_user}'.")
-                else:
-                    st.error(f"Failed to fetch history: {res.text}")
-            except Exception as e:
-                st.error(f"Error: {e}")
+    if selected_user:
+        st.write(f"Chat History for **{selected_user}** (latest turns first; the next page goes back in time):")
+        paged_table(f"history_{selected_user}", f"admin/chat/history/{selected_user}", "turns")
 
 # --- Data Management ---
 elif menu == "Data Management":
@@ -182,15 +192,10 @@ elif menu == "Data Management":
 
     with tabs[1]: # List
         st.subheader("List All Stored PDFs")
-        if st.button("Refresh PDF List"):
-            try:
-                res = requests.get(f"{BASE_URL}/admin/pdf", auth=auth)
-                if res.status_code == 200:
-                    st.dataframe(pd.DataFrame(res.json().get("pdfs", [])), use_container_width=True)
-                else:
-                    st.error(f"Failed to fetch PDFs: {res.text}")
-            except Exception as e:
-                st.error(f"Error: {e}")
+        owner_col, visibility_col = st.columns(2)
+        pdf_owner = owner_col.text_input("Uploaded by", key="pdfs_owner")
+        pdf_visibility = visibility_col.selectbox("Visibility", list(VISIBILITY), key="pdfs_visibility")
+        paged_table("pdfs", "admin/pdf", "pdfs", {"uploaded_by": pdf_owner, "is_public": VISIBILITY[pdf_visibility]})
 
     with tabs[2]: # Delete
         st.subheader("Delete Specific PDFs from Storage")
@@ -241,7 +246,7 @@ elif menu == "VectorDB Management":
             try:
                 res = requests.post(f"{BASE_URL}/admin/vectordb/ingest/all", auth=auth)
                 if res.status_code == 200:
-                    st.success("Successfully started ingestion of all public PDFs.")
+                    st.success(f"Ingestion of all public PDFs queued (job {res.json().get('job_id')}).")
                 else:
                     st.error(f"Ingestion failed: {res.text}")
             except Exception as e:
@@ -309,15 +314,10 @@ elif menu == "VectorDB Management":
 
     with tabs[2]: # List Ingested
         st.subheader("List All Ingested Data Sources")
-        if st.button("Refresh Ingested List"):
-            try:
-                res = requests.get(f"{BASE_URL}/admin/vectordb/pdf", auth=auth)
-                if res.status_code == 200:
-                    st.dataframe(pd.DataFrame(res.json().get("sources", [])), use_container_width=True)
-                else:
-                    st.error(f"Failed to fetch sources: {res.text}")
-            except Exception as e:
-                st.error(f"Error: {e}")
+        owner_col, visibility_col = st.columns(2)
+        source_owner = owner_col.text_input("Ingested by", key="sources_owner")
+        source_visibility = visibility_col.selectbox("Visibility", list(VISIBILITY), key="sources_visibility")
+        paged_table("sources", "admin/vectordb/pdf", "sources", {"owner": source_owner, "is_public": VISIBILITY[source_visibility]})
                 
     with tabs[3]: # Clear Memory
         st.subheader("Clear Chat Memory from VectorDB")
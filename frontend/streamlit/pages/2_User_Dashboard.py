@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 import pandas as pd
 import os
+import json
 
 # --- Page Configuration and Access Control ---
 st.set_page_config(page_title="User Dashboard", layout="wide")
@@ -16,23 +17,27 @@ auth = st.session_state.get('auth')
 username = st.session_state.get('username')
 
 # --- Helper Functions ---
-def get_my_pdfs():
+def fetch_all(endpoint, key):
+    """Every item of a paginated list endpoint, following next_cursor."""
+    items, cursor = [], None
     try:
-        res = requests.get(f"{BASE_URL}/user/pdf", auth=auth)
-        if res.status_code == 200:
-            return res.json().get("pdfs", [])
-        return []
+        while True:
+            res = requests.get(f"{BASE_URL}/{endpoint}", params={"limit": 1000, "cursor": cursor}, auth=auth)
+            if res.status_code != 200:
+                return items
+            data = res.json()
+            items.extend(data.get(key, []))
+            cursor = data.get("next_cursor")
+            if cursor is None:
+                return items
     except Exception:
-        return []
+        return items
+
+def get_my_pdfs():
+    return fetch_all("user/pdf", "pdfs")
 
 def get_my_ingested_pdfs():
-    try:
-        res = requests.get(f"{BASE_URL}/user/vectordb/pdf", auth=auth)
-        if res.status_code == 200:
-            return res.json().get("sources", [])
-        return []
-    except Exception:
-        return []
+    return fetch_all("user/vectordb/pdf", "sources")
 
 # --- Main UI ---
 st.title(f"👋 Welcome, {username}!")
@@ -45,6 +50,15 @@ menu = st.sidebar.radio("User Menu", [
 
 st.header(menu)
 
+def read_sse(res):
+    """Yield (event, data) pairs from a server-sent-events response."""
+    event = None
+    for line in res.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
 # --- Chat ---
 if menu == "Chat":
     st.subheader("Chat with the RAG Model")
@@ -68,11 +82,21 @@ if menu == "Chat":
             full_response = ""
             try:
                 payload = {"user_id": username, "message": prompt}
-                res = requests.post(f"{BASE_URL}/user/chat", json=payload, auth=auth)
-                if res.status_code == 200:
-                    full_response = "Answer : \n" + res.json().get("response", "Sorry, I encountered an error.") + "\n\n Prompt \n" + res.json().get("prompt", "Sorry, I encountered an error.")
-                else:
-                    full_response = f"Error: {res.text}"
+                # Tokens arrive as server-sent events; render each one as it comes in
+                with requests.post(f"{BASE_URL}/user/chat/stream", json=payload, auth=auth, stream=True) as res:
+                    if res.status_code == 200:
+                        answer = ""
+                        for event, data in read_sse(res):
+                            if event == "token":
+                                answer += data["text"]
+                                message_placeholder.markdown("Answer : \n" + answer + "▌")
+                            elif event == "done":
+                                full_response = "Answer : \n" + answer + "\n\n Prompt \n" + data.get("prompt", "")
+                            elif event == "error":
+                                full_response = f"Error: {data.get('detail')}"
+                        full_response = full_response or "Answer : \n" + answer
+                    else:
+                        full_response = f"Error: {res.text}"
             except Exception as e:
                 full_response = f"An error occurred: {e}"
             
@@ -161,7 +185,7 @@ elif menu == "VectorDB Management":
             try:
                 res = requests.post(f"{BASE_URL}/user/vectordb/ingest/all", auth=auth)
                 if res.status_code == 200:
-                    st.success("Successfully started ingestion for all your PDFs.")
+                    st.success(f"Ingestion of all your PDFs queued (job {res.json().get('job_id')}).")
                 else:
                     st.error(f"Ingestion failed: {res.text}")
             except Exception as e:
@@ -186,10 +210,10 @@ elif menu == "VectorDB Management":
         st.subheader("List Your Ingested PDFs")
         if st.button("Refresh PDF List"):
             try:
-                res = requests.get(f"{BASE_URL}/user/ingested_pdfs", auth=auth)
-                if res.status_code == 200:
+                ingested = fetch_all("user/ingested_pdfs", "ingested_pdfs")
+                if ingested:
                     st.success("PDF list refreshed.")
-                    st.dataframe(pd.DataFrame(res.json().get("ingested_pdfs", [])), use_container_width=True)
+                    st.dataframe(pd.DataFrame(ingested), use_container_width=True)
                 else:
                     st.info("You have not ingested any PDFs yet.")
             except Exception as e:
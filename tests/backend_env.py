@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Shared setup for the offline benchmarks and unit tests
+
+Makes the backend package importable and points it at a throwaway PERSIST_DIR
+with the deterministic fake embedding, so nothing touches real data or needs
+an OpenAI key. Call it before importing any backend module: they read their
+settings from the environment at import time.
+
+Usage:
+    from backend_env import setup_backend
+    WORK_DIR = setup_backend("rag_retrieval_bench_")
+"""
+
+import os
+import sys
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(TESTS_DIR, "..", "backend")
+
+
+def add_backend_to_path():
+    """Make the backend modules importable, for scripts that set up their own data directories."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def setup_backend(prefix="rag_test_", fake_embeddings=True):
+    """Put backend/ on sys.path, give it a fresh PERSIST_DIR and return that directory."""
+    add_backend_to_path()
+    work_dir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["PERSIST_DIR"] = work_dir
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    if fake_embeddings:
+        os.environ["EMBEDDING_BACKEND"] = "fake"
+    return work_dir
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the chat answer cache on a repeated-question workload
+
+Replays the locust chat messages (a handful of questions, asked over and over,
+with some rewording) against routes.user.chat_manage.chat with the fake
+embedding and LLM backends, first with the answer cache disabled and then
+enabled. Each chat stores its message in the user's memory, as in the app.
+Reports p50/p95 latency, the hit ratio (exact and similar) and the LLM time saved.
+
+Usage:
+    python benchmark_answer_cache.py [--requests 200] [--llm-latency 0.3] [--similarity 0.97]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--requests", type=int, default=200)
+parser.add_argument("--embed-latency", type=float, default=0.0, help="fake embedding seconds per call")
+parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM seconds per call")
+parser.add_argument("--similarity", type=float, default=0.97, help="ANSWER_CACHE_SIMILARITY")
+parser.add_argument("--chunks", type=int, default=2000)
+args = parser.parse_args()
+
+setup_backend("rag_answer_cache_bench_")
+os.environ["EMBEDDING_FAKE_LATENCY"] = str(args.embed_latency)
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_FAKE_LATENCY"] = str(args.llm_latency)
+os.environ["ANSWER_CACHE_SIMILARITY"] = str(args.similarity)
+
+from fastapi import BackgroundTasks
+from fastapi.security import HTTPBasicCredentials
+from langchain_core.documents import Document
+import utils.vectordb as vectordb
+from utils.answer_cache import answer_cache
+from routes.user import chat_manage
+
+# The locustfile's chat messages, plus rewordings that normalize to the same question
+MESSAGES = [
+    "Hello, can you help me?",
+    "What is the capital of France?",
+    "Tell me about the documents I have uploaded.",
+    "Summarize the key points.",
+    "summarize the key points",
+    "What is the capital of France ?",
+]
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def fill(chunks):
+    docs = [Document(page_content=f"Chunk {i} of a document about topic {i % 97}.",
+                     metadata={"user_id": "public", "filename": f"doc_{i % 50}.pdf",
+                               "source": f"doc_{i % 50}.pdf", "is_public": 1})
+            for i in range(chunks)]
+    vectordb.insert_new_chunks(docs)
+
+
+async def run(user):
+    rng = random.Random(0)
+    latencies, hits = [], 0
+    for _ in range(args.requests):
+        tasks = BackgroundTasks()
+        req = chat_manage.ChatRequest(user_id=user, message=rng.choice(MESSAGES))
+        start = time.perf_counter()
+        result = await chat_manage.chat(req, tasks, ConnectedRequest(), HTTPBasicCredentials(username=user, password=""))
+        latencies.append(time.perf_counter() - start)
+        hits += result["cache"] is not None
+        await tasks()  # the history write, outside the measured latency
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000, hits
+
+
+if __name__ == "__main__":
+    fill(args.chunks)
+    print(f"{args.requests} requests over {len(MESSAGES)} messages, LLM latency {args.llm_latency * 1000:.0f} ms")
+    print(f"{'cache':>6} {'p50 ms':>8} {'p95 ms':>8} {'hits':>6}")
+    answer_cache.enabled = False
+    off = asyncio.run(run("cache_off"))
+    answer_cache.enabled = True
+    on = asyncio.run(run("cache_on"))
+    print(f"{'off':>6} {off[0]:>8.1f} {off[1]:>8.1f} {off[2]:>6}")
+    print(f"{'on':>6} {on[0]:>8.1f} {on[1]:>8.1f} {on[2]:>6}")
+    stats = answer_cache.stats()
+    print(f"hit ratio {stats['hit_ratio']:.2f} (exact {stats['exact_hits']}, similar {stats['similar_hits']}), "
+          f"LLM time saved {stats['saved_seconds']:.1f} s")
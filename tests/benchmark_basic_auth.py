@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput of HTTP Basic authentication: credential cache off vs. on
+
+Calls routes.user.user_auth.verify_user_credentials, the dependency every
+/user route uses, from several threads at once as the server's threadpool
+does, and times just that call (an HTTP round trip through a test client
+costs ~1 ms and hides the difference). Runs once with AUTH_CACHE_TTL=0 (the
+previous behaviour: SQLite checks the password on every request) and once
+with the default TTL, each in a fresh subprocess, first idle and then while
+writer threads record ingests as ingest jobs do, competing for the pooled
+connections. "db reads" counts password checks that reached SQLite.
+
+Usage:
+    python benchmark_basic_auth.py [--requests 3000] [--users 200] [--threads 8] [--writers 2]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from backend_env import setup_backend
+
+
+def child(args):
+    """Time the checks and print 'p50_ms p95_ms checks_per_s db_reads'."""
+    setup_backend("rag_basic_auth_bench_")
+    from fastapi.security import HTTPBasicCredentials
+    import utils.sqlitedb as db
+    from utils.auth_cache import credential_cache
+    from routes.user.user_auth import verify_user_credentials
+
+    db.init_db()
+    for i in range(args.users):
+        db.add_user(f"user{i}", f"password{i}")
+    stop = threading.Event()
+
+    def writer(offset):
+        i = offset
+        while not stop.is_set():
+            db.ingest(f"doc_{i % 500}.pdf", f"user{i % args.users}", 0, f"hash{i}")
+            i += args.writers
+
+    def reader(offset, timings):
+        for i in range(offset, args.requests, args.threads):
+            user = i % args.users
+            credentials = HTTPBasicCredentials(username=f"user{user}", password=f"password{user}")
+            start = time.perf_counter()
+            verify_user_credentials(credentials, None)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    if args.write_contention:
+        for offset in range(args.writers):
+            threading.Thread(target=writer, args=(offset,), daemon=True).start()
+    timings = []
+    readers = [threading.Thread(target=reader, args=(offset, timings)) for offset in range(args.threads)]
+    start = time.perf_counter()
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    timings.sort()
+    stats = credential_cache.stats()
+    db_reads = args.requests if credential_cache.ttl <= 0 else stats["misses"]
+    print(f"{statistics.median(timings):.4f}", f"{timings[int(len(timings) * 0.95)]:.4f}",
+          f"{len(timings) / elapsed:.0f}", db_reads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=30000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--write-contention", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        sys.exit(0)
+
+    print(f"{args.requests} checks over {args.users} users from {args.threads} threads; ms per check")
+    print(f"{'load':>8} {'cache':>6} {'p50':>8} {'p95':>8} {'checks/s':>9} {'db reads':>9}")
+    for contention in (False, True):
+        for ttl in ("0", "60"):
+            command = [sys.executable, __file__, "--child", "--requests", str(args.requests),
+                       "--users", str(args.users), "--threads", str(args.threads), "--writers", str(args.writers)]
+            if contention:
+                command.append("--write-contention")
+            out = subprocess.run(command, capture_output=True, text=True, check=True,
+                                 env={**os.environ, "AUTH_CACHE_TTL": ttl}).stdout.split()
+            p50, p95, rate, reads = out[-4:]
+            print(f"{'writes' if contention else 'idle':>8} {'off' if ttl == '0' else 'on':>6} {p50:>8} {p95:>8} {rate:>9} {reads:>9}")
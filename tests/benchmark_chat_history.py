@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Chat history read latency: Chroma memory collection vs. SQLite chat_turns pages
+
+Compares the previous history endpoint (utils.vectordb.get_all_history: read a
+user's whole memory collection and sort it by timestamp) with one keyset page
+of utils.sqlitedb.get_chat_turns_page, and with walking back through every
+page. Each user gets the same history in both stores, alongside other users'
+turns in the same table. Uses the fake embedding backend.
+
+Usage:
+    python benchmark_chat_history.py [--turns 100 1000 5000] [--users 20] [--page 50] [--reads 50]
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--turns", type=int, nargs="+", default=[100, 1000, 5000])
+parser.add_argument("--users", type=int, default=20, help="other users sharing the chat_turns table")
+parser.add_argument("--page", type=int, default=50)
+parser.add_argument("--reads", type=int, default=50)
+args = parser.parse_args()
+
+setup_backend("rag_history_bench_")
+
+from langchain_core.documents import Document
+import utils.sqlitedb as sqlitedb
+import utils.vectordb as vectordb
+
+
+def fill(user_id, turns):
+    messages = [f"Message {i} of {user_id}" for i in range(turns)]
+    docs = [Document(page_content=m, metadata={"user_id": user_id, "timestamp": float(i)})
+            for i, m in enumerate(messages)]
+    vectordb.memory_store(user_id).add_documents(docs, ids=[str(uuid.uuid4()) for _ in docs])
+    sqlitedb.add_chat_turns(user_id, [(m, f"Answer to {m}", f"2026-01-01T00:00:{i % 60:02d}")
+                                      for i, m in enumerate(messages)])
+
+
+def timed(read):
+    timings = []
+    for _ in range(args.reads):
+        start = time.perf_counter()
+        read()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def all_pages(user_id):
+    cursor = None
+    while True:
+        cursor = sqlitedb.get_chat_turns_page(user_id, args.page, cursor)["next_cursor"]
+        if cursor is None:
+            return
+
+
+if __name__ == "__main__":
+    for u in range(args.users):
+        sqlitedb.add_chat_turns(f"other{u}", [(f"Other {i}", "Answer", "2026-01-01T00:00:00") for i in range(1000)])
+    print(f"{args.reads} reads per size, page size {args.page}, {args.users} other users with 1000 turns each")
+    print(f"{'turns':>6} {'chroma all p50/p95 ms':>22} {'sqlite page p50/p95 ms':>23} {'sqlite all pages p50 ms':>24}")
+    for turns in sorted(args.turns):
+        user_id = f"user{turns}"
+        fill(user_id, turns)
+        chroma = timed(lambda: vectordb.get_all_history(user_id))
+        page = timed(lambda: sqlitedb.get_chat_turns_page(user_id, args.page))
+        walk = timed(lambda: all_pages(user_id))
+        print(f"{turns:>6} {chroma[0]:>12.2f}/{chroma[1]:<9.2f} {page[0]:>12.2f}/{page[1]:<10.2f} {walk[0]:>14.2f}")
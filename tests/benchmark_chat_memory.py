@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Per-turn write latency of the chat memory as the history limit grows
+
+Compares the previous save_user_message (read the whole memory collection,
+sort it by timestamp, delete the oldest, then add) with the ring buffer in
+utils.vectordb.save_user_message (one counter update in SQLite, one upsert of
+a fixed slot id). Each user's memory is filled to its limit first, so every
+measured append also evicts. Uses the fake embedding backend.
+
+Usage:
+    python benchmark_chat_memory.py [--limits 10 100 1000] [--appends 50]
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--limits", type=int, nargs="+", default=[10, 100, 1000])
+parser.add_argument("--appends", type=int, default=50)
+args = parser.parse_args()
+
+setup_backend("rag_memory_bench_")
+
+from langchain_core.documents import Document
+import utils.sqlitedb as sqlitedb
+import utils.vectordb as vectordb
+
+
+def previous_save(user_id, message, limit):
+    # The append before the ring buffer: read all, sort, delete the oldest, add with a random id
+    db = vectordb.memory_store(user_id)
+    all_docs = db.get()
+    docs_with_time = sorted(zip(all_docs["ids"], (m.get("timestamp", 0) for m in all_docs["metadatas"])),
+                            key=lambda x: x[1])
+    if len(docs_with_time) >= limit:
+        db.delete(ids=[doc[0] for doc in docs_with_time[:len(docs_with_time) - (limit - 1)]])
+    doc = Document(page_content=message, metadata={"user_id": user_id, "timestamp": time.time()})
+    db.add_documents([doc], ids=[str(uuid.uuid4())])
+
+
+def ring_save(user_id, message, limit):
+    vectordb.save_user_message(user_id, message)
+
+
+def measure(save, user_id, limit):
+    for i in range(limit):
+        save(user_id, f"Earlier message {i} of {user_id}", limit)
+    timings = []
+    for i in range(args.appends):
+        start = time.perf_counter()
+        save(user_id, f"New message {i} of {user_id}", limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+if __name__ == "__main__":
+    print(f"{args.appends} appends per user after filling memory to the limit")
+    print(f"{'limit':>6} {'previous p50/p95 ms':>20} {'ring p50/p95 ms':>18}")
+    for limit in sorted(args.limits):
+        sqlitedb.set_memory_limit(f"ring{limit}", limit)
+        before = measure(previous_save, f"previous{limit}", limit)
+        after = measure(ring_save, f"ring{limit}", limit)
+        print(f"{limit:>6} {before[0]:>10.2f}/{before[1]:<9.2f} {after[0]:>8.2f}/{after[1]:<9.2f}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for the /user/chat pipeline
+
+Uses the fake embedding and fake LLM backends, each sleeping a fixed latency
+per call to stand in for the remote providers. Compares the previous handler
+(memory search, PDF search, history write and LLM call one after another) with
+routes.user.chat_manage.chat, which embeds the message once, runs both
+searches concurrently and writes the history after the response. Reports
+p50/p95 request latency and the per-stage timings of the new handler, then the
+time to first token of the streaming endpoint (/user/chat/stream).
+
+Usage:
+    python benchmark_chat_pipeline.py [--requests 30] [--embed-latency 0.05] [--llm-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--requests", type=int, default=30)
+parser.add_argument("--embed-latency", type=float, default=0.05, help="fake embedding seconds per call")
+parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM seconds per call")
+parser.add_argument("--token-latency", type=float, default=0.01, help="fake LLM seconds per streamed token")
+parser.add_argument("--chunks", type=int, default=2000)
+args = parser.parse_args()
+
+setup_backend("rag_chat_bench_")
+os.environ["EMBEDDING_FAKE_LATENCY"] = str(args.embed_latency)
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_FAKE_LATENCY"] = str(args.llm_latency)
+os.environ["LLM_FAKE_TOKEN_LATENCY"] = str(args.token_latency)
+
+from fastapi import BackgroundTasks
+from fastapi.security import HTTPBasicCredentials
+from langchain_core.documents import Document
+import utils.vectordb as vectordb
+from utils.llm import LLM as chatmodel
+from utils.metrics import stage_summary
+from routes.user import chat_manage
+
+USER = "benchuser"
+
+
+def fill(chunks):
+    docs = [Document(page_content=f"Chunk {i} of a document about topic {i % 97}.",
+                     metadata={"user_id": USER if i % 2 else "public", "filename": f"doc_{i % 50}.pdf",
+                               "source": f"doc_{i % 50}.pdf", "is_public": 0 if i % 2 else 1})
+            for i in range(chunks)]
+    vectordb.insert_new_chunks(docs)
+    for i in range(5):
+        vectordb.save_user_message(USER, f"Earlier question number {i}")
+
+
+async def previous_handler(message):
+    # The handler before this change: every stage awaited in turn, history written before the LLM call
+    mem_docs = await asyncio.to_thread(vectordb.retrieve_user_memory, USER, message, 3)
+    pdf_docs = await asyncio.to_thread(vectordb.retrieve_pdf_for_user, USER, message, 3)
+    prompt = chat_manage.build_prompt(message, mem_docs, pdf_docs)
+    await asyncio.to_thread(vectordb.save_user_message, USER, message)
+    return await asyncio.to_thread(chatmodel.predict, prompt)
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+async def current_handler(message):
+    tasks = BackgroundTasks()
+    req = chat_manage.ChatRequest(user_id=USER, message=message)
+    result = await chat_manage.chat(req, tasks, ConnectedRequest(), HTTPBasicCredentials(username=USER, password=""))
+    return result, tasks
+
+
+async def stream_handler(message):
+    req = chat_manage.ChatRequest(user_id=USER, message=message)
+    response = await chat_manage.chat_stream(req, HTTPBasicCredentials(username=USER, password=""))
+    async for _ in response.body_iterator:
+        pass
+    return None, response.background
+
+
+async def run(handler, label):
+    latencies = []
+    for i in range(args.requests):
+        # Unique messages, so the embedding cache cannot answer the query
+        message = f"{label} question {i} about topic {i % 97}?"
+        start = time.perf_counter()
+        result = await handler(message)
+        latencies.append(time.perf_counter() - start)
+        if isinstance(result, tuple):
+            await result[1]()  # the deferred history write, outside the measured latency
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+if __name__ == "__main__":
+    fill(args.chunks)
+    print(f"{args.requests} requests, embed latency {args.embed_latency * 1000:.0f} ms, "
+          f"LLM latency {args.llm_latency * 1000:.0f} ms")
+    print(f"{'handler':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    before = asyncio.run(run(previous_handler, "previous"))
+    after = asyncio.run(run(current_handler, "current"))
+    print(f"{'previous':>10} {before[0]:>8.1f} {before[1]:>8.1f}")
+    print(f"{'current':>10} {after[0]:>8.1f} {after[1]:>8.1f}")
+    print(f"p50 reduction: {before[0] - after[0]:.1f} ms ({(1 - after[0] / before[0]) * 100:.0f}%)")
+    print("current handler stages (ms):")
+    for stage, s in stage_summary().get("chat", {}).items():
+        print(f"  {stage:>8} p50 {s['p50_ms']:>8.1f}  p95 {s['p95_ms']:>8.1f}")
+    # Token pacing applies to streaming only, so the answer takes longer in total
+    asyncio.run(run(stream_handler, "stream"))
+    stream = stage_summary().get("chat_stream", {})
+    print(f"streaming: time to first token p50 {stream['ttft']['p50_ms']:.1f} ms, "
+          f"full answer p50 {stream['total']['p50_ms']:.1f} ms")
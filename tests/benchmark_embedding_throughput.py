@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Embedding throughput benchmark for utils.embeddings.BatchedEmbeddings
+
+Runs the batching scheduler against the local FakeEmbeddings backend, which
+sleeps a fixed latency per request to mimic a remote provider, and reports
+embeddings per second for several concurrency levels. No network or API key
+is needed.
+
+Usage:
+    python benchmark_embedding_throughput.py [--chunks 5000] [--latency 0.2] [--batch-tokens 4000]
+"""
+
+import argparse
+
+from backend_env import add_backend_to_path
+
+add_backend_to_path()
+
+from utils.embeddings import BatchedEmbeddings, FakeEmbeddings
+
+
+def make_chunks(n):
+    # Roughly the size of a 500-character ingest chunk
+    return [f"Chunk {i}: " + "lorem ipsum dolor sit amet " * 18 for i in range(n)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake provider seconds per request")
+    parser.add_argument("--batch-tokens", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    texts = make_chunks(args.chunks)
+    print(f"{'concurrency':>11} {'batches':>8} {'seconds':>8} {'emb/s':>10}")
+    for concurrency in args.concurrency:
+        scheduler = BatchedEmbeddings(FakeEmbeddings(latency=args.latency),
+                                      batch_tokens=args.batch_tokens, concurrency=concurrency)
+        scheduler.embed_documents(texts)
+        stats = scheduler.stats()
+        print(f"{concurrency:>11} {stats['batches']:>8} {stats['seconds']:>8.2f} {stats['embeddings_per_second']:>10.1f}")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Latency of the PDF list as the pdfs table grows: whole table vs. keyset pages
+
+Compares the previous /admin/pdf listing (utils.sqlitedb.get_all_pdfs, every
+row in one response) with one page of utils.sqlitedb.get_pdfs_page: the first
+page, the last page (reached by its cursor, as a client paging through would)
+and a page filtered by uploader. Rows are spread over --owners uploaders, a
+tenth of them public.
+
+Usage:
+    python benchmark_list_pagination.py [--rows 1000 10000 100000] [--owners 500] [--page 100] [--reads 20]
+"""
+
+import argparse
+import statistics
+import time
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+parser.add_argument("--owners", type=int, default=500)
+parser.add_argument("--page", type=int, default=100)
+parser.add_argument("--reads", type=int, default=20)
+args = parser.parse_args()
+
+setup_backend("rag_pagination_bench_")
+
+import utils.sqlitedb as sqlitedb
+
+
+def fill(start, stop):
+    with sqlitedb.get_db_connection() as conn:
+        conn.executemany('INSERT INTO pdfs (filename, filepath, uploaded_by, is_public, created_at) VALUES (?, ?, ?, ?, ?)',
+                         [(f"doc_{i}.pdf", f"owner{i % args.owners}/doc_{i}.pdf", f"owner{i % args.owners}",
+                           int(i % 10 == 0), f"2026-01-01T00:00:{i % 60:02d}") for i in range(start, stop)])
+        conn.commit()
+
+
+def timed(read):
+    timings = []
+    for _ in range(args.reads):
+        start = time.perf_counter()
+        read()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    sqlitedb.init_db()
+    print(f"{args.reads} reads each, page size {args.page}, {args.owners} uploaders; p50 ms")
+    print(f"{'rows':>7} {'all rows':>9} {'first page':>11} {'last page':>10} {'by owner':>9} {'public':>7}")
+    filled = 0
+    for rows in sorted(args.rows):
+        fill(filled, rows)
+        filled = rows
+        # The cursor of the last page is the id just before its first row
+        last_cursor = max(rows - args.page, 0)
+        full = timed(sqlitedb.get_all_pdfs)
+        first = timed(lambda: sqlitedb.get_pdfs_page(args.page))
+        last = timed(lambda: sqlitedb.get_pdfs_page(args.page, last_cursor))
+        owner = timed(lambda: sqlitedb.get_pdfs_page(args.page, uploaded_by="owner7"))
+        public = timed(lambda: sqlitedb.get_pdfs_page(args.page, is_public=1))
+        print(f"{rows:>7} {full:>9.2f} {first:>11.2f} {last:>10.2f} {owner:>9.2f} {public:>7.2f}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Responsiveness benchmark for many concurrent /user/chat requests
+
+Sends a burst of concurrent chats through the FastAPI app (in-process, via
+httpx's ASGI transport) with the fake LLM backend sleeping a fixed latency per
+call, and meanwhile probes /user/auth/check and /user/pdf. Compares the
+previous LLM call (the blocking predict() in a worker thread) with the async
+adapter (LanguageModel.apredict, bounded by LLM_MAX_CONCURRENCY). Reports the
+burst wall time, chat p50/p95, probe p50/p95 and the LLM queue wait.
+
+Usage:
+    python benchmark_llm_concurrency.py [--chats 64] [--llm-latency 1.0] [--max-concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--chats", type=int, default=64, help="concurrent /user/chat requests")
+parser.add_argument("--llm-latency", type=float, default=1.0, help="fake LLM seconds per call")
+parser.add_argument("--max-concurrency", type=int, default=16, help="LLM_MAX_CONCURRENCY for the async adapter")
+parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between auth/list probes")
+args = parser.parse_args()
+
+setup_backend("rag_llm_bench_")
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_FAKE_LATENCY"] = str(args.llm_latency)
+os.environ["LLM_MAX_CONCURRENCY"] = str(args.max_concurrency)
+
+import httpx
+import main
+import utils.sqlitedb as db
+from utils.llm import LLM as chatmodel
+
+USER, PASSWORD = "benchuser", "benchpassword"
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+async def run(label):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        res = await client.post("/user/login", json={"username": USER, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {res.json()['token']}"}
+
+        async def chat(i):
+            start = time.perf_counter()
+            res = await client.post("/user/chat", headers=headers,
+                                    json={"user_id": USER, "message": f"{label} question {i}"})
+            res.raise_for_status()
+            return time.perf_counter() - start
+
+        probes = {"/user/auth/check": [], "/user/pdf": []}
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                for path, latencies in probes.items():
+                    start = time.perf_counter()
+                    (await client.get(path, headers=headers)).raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(args.probe_interval)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        chats = await asyncio.gather(*(chat(i) for i in range(args.chats)))
+        wall = time.perf_counter() - start
+        done.set()
+        await prober
+    return wall, chats, probes
+
+
+async def blocking_apredict(prompt, timeout=None, timings=None):
+    # The call before the async adapter: predict() in the default thread pool, no limit or deadline
+    return await asyncio.to_thread(chatmodel.predict, prompt)
+
+
+def report(label, wall, chats, probes):
+    chat_p50, chat_p95 = percentiles(chats)
+    print(f"{label:>9} {wall:>7.2f} {chat_p50:>9.0f} {chat_p95:>9.0f}", end="")
+    for latencies in probes.values():
+        p50, p95 = percentiles(latencies)
+        print(f" {p50:>7.1f}/{p95:<7.1f}", end="")
+    print()
+
+
+if __name__ == "__main__":
+    db.init_db()
+    db.add_user(USER, PASSWORD)
+    print(f"{args.chats} concurrent chats, LLM latency {args.llm_latency * 1000:.0f} ms, "
+          f"max concurrency {args.max_concurrency}")
+    print(f"{'mode':>9} {'wall s':>7} {'chat p50':>9} {'chat p95':>9} {'auth p50/p95 ms':>15} {'list p50/p95 ms':>15}")
+    apredict = chatmodel.apredict
+    chatmodel.apredict = blocking_apredict
+    report("previous", *asyncio.run(run("previous")))
+    chatmodel.apredict = apredict
+    report("async", *asyncio.run(run("async")))
+    stats = chatmodel.stats()
+    print(f"async adapter: {stats['calls']} calls, avg queue wait {stats['avg_queue_wait_seconds'] * 1000:.0f} ms, "
+          f"max queue wait {stats['max_queue_wait_seconds'] * 1000:.0f} ms, timeouts {stats['timeouts']}")
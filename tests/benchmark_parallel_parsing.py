@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+PDF parsing throughput benchmark for utils.parsing.parse_pdfs
+
+Replicates the PDFs under tests/data_* into a temporary folder (500 files by
+default) and parses + splits them with an increasing number of pool workers,
+reporting files/s and chunks/s for each worker count.
+
+Usage:
+    python benchmark_parallel_parsing.py [--files 500] [--workers 1 2 4 8]
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from backend_env import add_backend_to_path
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+add_backend_to_path()
+
+from utils import parsing
+
+
+def replicate(n, target_dir):
+    sources = sorted(glob.glob(os.path.join(TESTS_DIR, "data_*", "*.pdf")))
+    if not sources:
+        raise SystemExit("No PDFs found under tests/data_*")
+    paths = []
+    for i in range(n):
+        src = sources[i % len(sources)]
+        dst = os.path.join(target_dir, f"{i:04d}_{os.path.basename(src)}")
+        shutil.copyfile(src, dst)
+        paths.append(dst)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=500)
+    default_workers = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="rag_parse_bench_")
+    try:
+        paths = replicate(args.files, work_dir)
+        print(f"{len(paths)} files, {os.cpu_count()} CPU(s)")
+        print(f"{'workers':>7} {'seconds':>8} {'files/s':>8} {'chunks/s':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            chunks = 0
+            for _, parsed, error in parsing.parse_pdfs(((p, p) for p in paths), workers=workers):
+                if parsed:
+                    chunks += len(parsed)
+            elapsed = time.perf_counter() - start
+            parsing.shutdown()
+            baseline = baseline or elapsed
+            print(f"{workers:>7} {elapsed:>8.2f} {len(paths) / elapsed:>8.1f} {chunks / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Retrieval latency benchmark for utils.vectordb.retrieve_pdf_for_user
+
+Fills a throwaway PDF collection with 1k, 10k and 100k chunks (split between
+private and public owners) using a deterministic fake embedding, then times
+retrieve_pdf_for_user. Latency should stay roughly flat as the corpus grows,
+because the query is a single filtered search over the persisted index.
+
+Usage:
+    python benchmark_retrieval.py [--sizes 1000 10000 100000] [--queries 50]
+"""
+
+import argparse
+import time
+import statistics
+
+from backend_env import setup_backend
+
+setup_backend("rag_bench_", fake_embeddings=False)
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import utils.vectordb as vectordb
+
+vectordb.embedding = DeterministicFakeEmbedding(size=256)
+
+USERS = [f"testuser{i}" for i in range(1, 21)]
+INSERT_BATCH = 2000
+
+
+def fill(total, start):
+    """Insert chunks until the collection holds `total` documents."""
+    docs = []
+    for i in range(start, total):
+        owner = USERS[i % len(USERS)]
+        is_public = 1 if i % 5 == 0 else 0
+        docs.append(Document(
+            page_content=f"Chunk {i} of a document about topic {i % 97}.",
+            metadata={"user_id": "public" if is_public else owner, "filename": f"doc_{i % 300}.pdf",
+                      "source": f"doc_{i % 300}.pdf", "is_public": is_public},
+        ))
+        if len(docs) >= INSERT_BATCH:
+            vectordb.insert_new_chunks(docs)
+            docs = []
+    if docs:
+        vectordb.insert_new_chunks(docs)
+
+
+def run(sizes, queries):
+    filled = 0
+    print(f"{'chunks':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in sizes:
+        fill(size, filled)
+        filled = size
+        timings = []
+        for q in range(queries):
+            user = USERS[q % len(USERS)]
+            start = time.perf_counter()
+            vectordb.retrieve_pdf_for_user(user, f"What is topic {q}?", 3)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{size:>8} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    run(sorted(args.sizes), args.queries)
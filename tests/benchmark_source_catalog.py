@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Latency of listing ingested sources: chunk metadata scan vs. the source catalog
+
+Compares the previous get_pdf_sources (read the metadata of every chunk in the
+PDF store and collect the distinct (source, owner) pairs) with the source
+catalog that the ingest and delete paths now maintain in SQLite: the whole
+catalog, and one page of it filtered as /user/vectordb/pdf does. Chunks are
+spread over sources of --chunks-per-source each, using the fake embedding backend.
+
+Usage:
+    python benchmark_source_catalog.py [--chunks 10000 50000 100000] [--chunks-per-source 100] [--reads 10]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 50000, 100000])
+parser.add_argument("--chunks-per-source", type=int, default=100)
+parser.add_argument("--owners", type=int, default=20)
+parser.add_argument("--reads", type=int, default=10)
+args = parser.parse_args()
+
+setup_backend("rag_catalog_bench_")
+
+from langchain_core.documents import Document
+import utils.vectordb as vectordb
+
+
+def previous_sources():
+    # The listing before the catalog: every chunk's metadata, reduced to distinct pairs
+    sources = set()
+    for name in vectordb.pdf_collections():
+        for meta in vectordb.pdf_store(name).get(include=["metadatas"])["metadatas"]:
+            if "source" in meta and "user_id" in meta:
+                sources.add((meta["source"], meta["user_id"]))
+    return [{"source": s, "ingested_by": u} for s, u in sources]
+
+
+def fill(start, stop):
+    docs = []
+    for i in range(start, stop):
+        source = i // args.chunks_per_source
+        owner = f"owner{source % args.owners}"
+        docs.append(Document(page_content=f"Chunk {i} of document {source} about topic {i % 97}.",
+                             metadata={"user_id": owner, "filename": f"doc_{source}.pdf",
+                                       "source": f"doc_{source}.pdf", "is_public": int(source % 10 == 0)}))
+    vectordb.insert_new_chunks(docs)
+
+
+def timed(read):
+    timings = []
+    for _ in range(args.reads):
+        start = time.perf_counter()
+        read()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    print(f"{args.chunks_per_source} chunks per source, {args.owners} owners, {args.reads} reads each; p50 ms")
+    print(f"{'chunks':>7} {'sources':>8} {'metadata scan':>14} {'catalog all':>12} {'catalog page':>13}")
+    filled = 0
+    for chunks in sorted(args.chunks):
+        fill(filled, chunks)
+        filled = chunks
+        try:
+            scan = f"{timed(previous_sources):.2f}"
+        except Exception as e:
+            # Chroma cannot return this many chunks in one get()
+            scan = "fails"
+            print(f"metadata scan at {chunks} chunks: {e}", file=sys.stderr)
+        catalog = timed(vectordb.get_pdf_sources)
+        page = timed(lambda: vectordb.get_pdf_sources_page(100, visible_to="owner3"))
+        sources = len(vectordb.get_pdf_sources())
+        print(f"{chunks:>7} {sources:>8} {scan:>14} {catalog:>12.2f} {page:>13.2f}")
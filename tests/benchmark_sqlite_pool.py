@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+SQLite throughput benchmark for utils.sqlitedb
+
+Runs the queries behind every request (authenticate_user) and the per-file
+lookups (get_pdf, get_ingest_state) from many threads at once, while one writer
+thread keeps recording ingests the way an ingest job does. Compares the previous
+behaviour (a fresh connection per call, rollback journal) with the pooled WAL
+connections, reporting reads/s and read latency.
+
+Usage:
+    python benchmark_sqlite_pool.py [--threads 16] [--seconds 5] [--users 200]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import threading
+import time
+
+from backend_env import setup_backend
+
+WORK_DIR = setup_backend("rag_sqlite_bench_")
+
+import utils.sqlitedb as db
+
+POOLED_CONNECTION = db.get_db_connection
+
+
+def unpooled_connection():
+    # Previous behaviour: sqlite3's own context manager, a new connection per call
+    return sqlite3.connect(db.DB_PATH)
+
+
+def use_database(path, pooled):
+    db.DB_PATH = path
+    db._pool = db.ConnectionPool(path)
+    db.get_db_connection = POOLED_CONNECTION if pooled else unpooled_connection
+
+
+def populate(users):
+    db.init_db()
+    for i in range(users):
+        db.add_user(f"user{i}", "pw")
+        for j in range(5):
+            db.add_pdf(f"doc{j}.pdf", f"user{i}", 0, f"user{i}/doc{j}.pdf")
+            db.ingest(f"doc{j}.pdf", f"user{i}", 0, "0" * 64)
+
+
+def run(threads, seconds, users):
+    stop = threading.Event()
+    latencies = [[] for _ in range(threads)]
+    writes = [0]
+    errors = [0]
+
+    def reader(n):
+        i = n
+        while not stop.is_set():
+            user = f"user{i % users}"
+            start = time.perf_counter()
+            try:
+                db.authenticate_user(user, "pw")
+                db.get_pdf(f"doc{i % 5}.pdf", user)
+                db.get_ingest_state(f"doc{i % 5}.pdf", user)
+            except sqlite3.OperationalError:
+                errors[0] += 1
+                continue
+            latencies[n].append(time.perf_counter() - start)
+            i += threads
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                db.ingest(f"doc{i % 5}.pdf", f"user{i % users}", 0, f"{i:064d}")
+                writes[0] += 1
+            except sqlite3.OperationalError:
+                errors[0] += 1
+            i += 1
+
+    workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+
+    all_latencies = sorted(l for per_thread in latencies for l in per_thread)
+    p95 = all_latencies[int(len(all_latencies) * 0.95)] if all_latencies else 0.0
+    return {
+        "reads_per_second": len(all_latencies) / seconds,
+        "p50_ms": statistics.median(all_latencies) * 1000 if all_latencies else 0.0,
+        "p95_ms": p95 * 1000,
+        "writes_per_second": writes[0] / seconds,
+        "errors": errors[0],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        print(f"{args.threads} reader threads + 1 writer, {args.seconds:.0f}s per mode")
+        print(f"{'mode':>16} {'reads/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'writes/s':>9} {'errors':>7}")
+        for name, pooled in (("connect-per-call", False), ("pooled WAL", True)):
+            use_database(os.path.join(WORK_DIR, f"{name.replace(' ', '_')}.db"), pooled)
+            populate(args.users)
+            r = run(args.threads, args.seconds, args.users)
+            print(f"{name:>16} {r['reads_per_second']:>9.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                  f"{r['writes_per_second']:>9.0f} {r['errors']:>7}")
+            if pooled:
+                print(f"pool: {db.pool_stats()}")
+            db._pool.close()
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
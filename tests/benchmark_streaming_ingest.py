@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Peak memory benchmark for streaming PDF ingestion
+
+Builds PDFs of increasing page count from the pages of the tests/data_* PDFs,
+then ingests each one in a fresh subprocess with either the streaming path
+(utils.parsing.iter_pdf_chunks: lazy pages, fixed-size flush windows) or the
+previous load-everything path (utils.parsing.parse_pdf, one write for the
+whole document), and reports peak RSS.
+Embeddings come from the local fake backend at OpenAI's 1536 dimensions.
+
+Usage:
+    python benchmark_streaming_ingest.py [--pages 50 200 800]
+"""
+
+import argparse
+import glob
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend_env import add_backend_to_path
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_pdf(pages, path):
+    from pypdf import PdfReader, PdfWriter
+    sources = [PdfReader(p) for p in sorted(glob.glob(os.path.join(TESTS_DIR, "data_*", "*.pdf")))]
+    source_pages = [page for reader in sources for page in reader.pages]
+    writer = PdfWriter()
+    for i in range(pages):
+        writer.add_page(source_pages[i % len(source_pages)])
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def child(mode, path):
+    """Ingest one PDF and print 'chunks seconds peak_rss_mb'."""
+    add_backend_to_path()
+    from utils import parsing, vectordb
+    source = os.path.basename(path)
+    start = time.perf_counter()
+    if mode == "stream":
+        chunks = parsing.iter_pdf_chunks(path)
+        window = vectordb.INSERT_WINDOW
+    else:
+        # Previous behaviour: every page and chunk in memory, embedded and written in one call
+        chunks = parsing.parse_pdf(path)
+        window = max(len(chunks), 1)
+
+    def tagged():
+        for c in chunks:
+            c.metadata = {"user_id": "bench", "filename": source, "source": source, "is_public": 0}
+            yield c
+    result = vectordb.sync_source_chunks(tagged(), source, "bench", window=window)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(result["added"], f"{elapsed:.2f}", f"{peak_mb:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        sys.exit(0)
+
+    work_dir = tempfile.mkdtemp(prefix="rag_stream_bench_")
+    print(f"{'pages':>6} {'mode':>7} {'chunks':>7} {'seconds':>8} {'peak MB':>8}")
+    for pages in args.pages:
+        pdf_path = os.path.join(work_dir, f"doc_{pages}.pdf")
+        build_pdf(pages, pdf_path)
+        for mode in ("load", "stream"):
+            env = dict(os.environ, PERSIST_DIR=tempfile.mkdtemp(dir=work_dir), EMBEDDING_BACKEND="fake",
+                       EMBEDDING_FAKE_SIZE="1536", EMBEDDING_CACHE="0", INGEST_PARSE_WORKERS="1")
+            out = subprocess.run([sys.executable, __file__, "--child", mode, pdf_path], env=env,
+                                 capture_output=True, text=True, check=True).stdout.split()
+            chunks, seconds, peak = out[-3:]
+            print(f"{pages:>6} {mode:>7} {chunks:>7} {seconds:>8} {peak:>8}")
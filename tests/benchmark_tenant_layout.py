@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Query latency of the shared vs. tenant PDF store layouts as tenants are added
+
+Fills both layouts side by side in a throwaway store (each tenant owning the
+same number of private chunks, plus a fixed set of public chunks) using the
+fake embedding backend, then times retrieve_pdf_for_user for random tenants
+in each layout. In the shared layout every query is a filtered search over
+the whole corpus; in the tenant layout it searches the tenant's and the
+public collection only. Every tenant is queried once before measuring, as an
+active tenant's index stays loaded; the p50 of those first queries is reported
+as the cold cost. Also times clear_pdf_by_user at the largest size.
+
+Usage:
+    python benchmark_tenant_layout.py [--tenants 10 100 500] [--chunks-per-tenant 100] [--queries 100]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from backend_env import setup_backend
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--tenants", type=int, nargs="+", default=[10, 100, 500])
+parser.add_argument("--chunks-per-tenant", type=int, default=100)
+parser.add_argument("--public-chunks", type=int, default=2000)
+parser.add_argument("--queries", type=int, default=100)
+args = parser.parse_args()
+
+setup_backend("rag_tenant_bench_")
+
+from langchain_core.documents import Document
+import utils.vectordb as vectordb
+
+LAYOUTS = ["shared", "tenant"]
+
+
+def chunks(owner, count, is_public=0):
+    return [Document(page_content=f"Chunk {i} from {owner} about topic {i % 97}.",
+                     metadata={"user_id": owner, "filename": f"{owner}_{i % 10}.pdf",
+                               "source": f"{owner}_{i % 10}.pdf", "is_public": is_public})
+            for i in range(count)]
+
+
+def fill(tenants):
+    for layout in LAYOUTS:
+        vectordb.PDF_STORE_LAYOUT = layout
+        vectordb.insert_new_chunks(tenants)
+
+
+def query_latency(layout, tenant_count):
+    vectordb.PDF_STORE_LAYOUT = layout
+    cold = []
+    for t in range(tenant_count):
+        start = time.perf_counter()
+        vectordb.retrieve_pdf_for_user(f"tenant{t}", "warm up", 3)
+        cold.append((time.perf_counter() - start) * 1000)
+    rng = random.Random(0)
+    timings = []
+    for q in range(args.queries):
+        user = f"tenant{rng.randrange(tenant_count)}"
+        start = time.perf_counter()
+        vectordb.retrieve_pdf_for_user(user, f"What is topic {q}?", 3)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)], statistics.median(cold)
+
+
+if __name__ == "__main__":
+    for layout in LAYOUTS:
+        vectordb.PDF_STORE_LAYOUT = layout
+        vectordb.insert_new_chunks(chunks("public", args.public_chunks, is_public=1))
+    print(f"{args.chunks_per_tenant} chunks per tenant, {args.public_chunks} public chunks, {args.queries} queries")
+    print(f"{'tenants':>8} {'chunks':>8} {'shared p50/p95/cold ms':>24} {'tenant p50/p95/cold ms':>24}")
+    filled = 0
+    for tenant_count in sorted(args.tenants):
+        for t in range(filled, tenant_count):
+            fill(chunks(f"tenant{t}", args.chunks_per_tenant))
+        filled = tenant_count
+        row = [query_latency(layout, tenant_count) for layout in LAYOUTS]
+        total = tenant_count * args.chunks_per_tenant + args.public_chunks
+        print(f"{tenant_count:>8} {total:>8} " + " ".join(f"{p50:>8.2f}/{p95:.2f}/{cold:<6.2f}" for p50, p95, cold in row))
+    for layout in LAYOUTS:
+        vectordb.PDF_STORE_LAYOUT = layout
+        start = time.perf_counter()
+        vectordb.clear_pdf_by_user("tenant0")
+        print(f"clear_pdf_by_user ({layout}): {(time.perf_counter() - start) * 1000:.1f} ms")
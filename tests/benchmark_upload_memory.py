@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Peak memory benchmark for PDF upload writes
+
+Writes an upload of increasing size to disk in a fresh subprocess, either the
+previous way (f.write(file.file.read()): the whole upload in memory at once)
+or through utils.uploads.save_upload (fixed-size chunks through a temp file,
+hashed on the fly, renamed into place), and reports peak RSS. The upload is an
+UploadFile over a file on disk, as Starlette spools large request bodies to a
+temporary file before the handler runs.
+
+Usage:
+    python benchmark_upload_memory.py [--sizes-mb 16 64 256]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend_env import add_backend_to_path
+
+
+def build_upload(size_mb, path):
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def child(mode, path):
+    """Write one upload to disk and print 'seconds peak_rss_mb'."""
+    add_backend_to_path()
+    from fastapi import UploadFile
+    from utils import uploads
+    dest = path + f".{mode}.pdf"
+    with open(path, "rb") as body:
+        upload = UploadFile(file=body, filename=os.path.basename(dest))
+        start = time.perf_counter()
+        if mode == "stream":
+            uploads.save_upload(upload, dest, max_bytes=0)
+        else:
+            # Previous behaviour: read the whole upload, then write it
+            with open(dest, "wb") as f:
+                f.write(upload.file.read())
+        elapsed = time.perf_counter() - start
+    os.remove(dest)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f}", f"{peak_mb:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "UPLOAD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        sys.exit(0)
+
+    work_dir = tempfile.mkdtemp(prefix="rag_upload_bench_")
+    print(f"{'MB':>6} {'mode':>7} {'seconds':>8} {'peak MB':>8}")
+    for size_mb in args.sizes_mb:
+        upload_path = os.path.join(work_dir, f"upload_{size_mb}")
+        build_upload(size_mb, upload_path)
+        for mode in ("read", "stream"):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, upload_path],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            seconds, peak = out[-2:]
+            print(f"{size_mb:>6} {mode:>7} {seconds:>8} {peak:>8}")
+        os.remove(upload_path)
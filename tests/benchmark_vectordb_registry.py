@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead benchmark for the utils.vectordb client/collection registry
+
+Compares opening a fresh Chroma wrapper on every call (the old behaviour of
+every vectordb helper) against handing out the cached handle from the
+registry. Both paths then run the same small collection lookup.
+
+Usage:
+    python benchmark_vectordb_registry.py [--calls 500]
+"""
+
+import argparse
+import time
+
+from backend_env import setup_backend
+
+setup_backend("rag_bench_", fake_embeddings=False)
+
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import utils.vectordb as vectordb
+
+vectordb.embedding = DeterministicFakeEmbedding(size=256)
+
+
+def fresh_wrapper():
+    return Chroma(
+        collection_name="user_bench",
+        embedding_function=vectordb.embedding,
+        persist_directory=vectordb.CHROMA_MEMORY_DIR,
+    )
+
+
+def registry_handle():
+    return vectordb.memory_store("bench")
+
+
+def timed(factory, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        factory().get(limit=1)
+    return (time.perf_counter() - start) * 1e6 / calls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    vectordb.save_user_message("bench", "warm up the collection")
+    fresh = timed(fresh_wrapper, args.calls)
+    cached = timed(registry_handle, args.calls)
+    print(f"fresh Chroma wrapper per call: {fresh:10.1f} us/call")
+    print(f"registry cached handle:        {cached:10.1f} us/call")
+    print(f"speedup:                       {fresh / cached:10.1f}x")
@@ -0,0 +1,12 @@
+"""
+pytest setup for the backend unit tests: every test module imports the backend
+against one throwaway PERSIST_DIR with fake embeddings (see backend_env.py).
+"""
+
+import os
+
+from backend_env import setup_backend
+
+setup_backend("rag_unit_test_")
+# Parse in-process: the tests ingest a few small PDFs
+os.environ.setdefault("INGEST_PARSE_WORKERS", "1")
@@ -2,7 +2,7 @@ import random
 import os
 import logging
 from locust import HttpUser, task, between, events
-from requests.auth import HTTPBasicAuth
+from requests.auth import AuthBase
 
 # --- Event Hooks for Detailed Logging ---
 # This code will run for every request that Locust makes.
@@ -31,6 +31,15 @@ ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "adminpassword" # Should match your docker-compose.yml or backend config
 
 # --- Helper Functions ---
+class TokenAuth(AuthBase):
+    """Sends a session token from /user/login or /admin/login as a Bearer header."""
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {self.token}"
+        return r
+
 def get_random_user_credentials():
     """Picks a random user from the pool of test users."""
     user_id = random.randint(1, NUM_TEST_USERS)
@@ -67,18 +76,18 @@ class WebsiteUser(HttpUser):
     def on_start(self):
         """
         This method is called when a new WebsiteUser is started.
-        It sets the user's credentials and performs an initial authentication check to simulate a login.
+        It logs in with the user's credentials and keeps the returned session token.
         """
         username, password = get_random_user_credentials()
-        self.auth = HTTPBasicAuth(username, password)
         self.username = username
         
-        # Perform an initial auth check to simulate a login request
-        self.client.get(
-            "/user/auth/check",
-            auth=self.auth,
-            name="/user/auth/check"
+        # Log in once; every later request sends the session token
+        res = self.client.post(
+            "/user/login",
+            json={"username": username, "password": password},
+            name="/user/login"
         )
+        self.auth = TokenAuth(res.json().get("token", "")) if res.status_code == 200 else None
 
     @task(3) # This task is 3 times more likely to be chosen than upload_pdf
     def chat(self):
@@ -98,6 +107,15 @@ class WebsiteUser(HttpUser):
             name="/user/chat" # Group all chat requests under one name in stats
         )
 
+    @task(3)
+    def auth_check(self):
+        """Simulates the auth check the frontends run on every page load."""
+        self.client.get(
+            "/user/auth/check",
+            auth=self.auth,
+            name="/user/auth/check"
+        )
+
     @task(1) # This task is less frequent than chatting
     def upload_pdf(self):
         """Simulates a user uploading a random PDF."""
@@ -134,16 +152,15 @@ class AdminUser(HttpUser):
     def on_start(self):
         """
         Called when a new AdminUser is started.
-        Sets the admin's credentials and performs an initial authentication check to simulate a login.
+        Logs in with the admin credentials and keeps the returned session token.
         """
-        self.auth = HTTPBasicAuth(ADMIN_USERNAME, ADMIN_PASSWORD)
-        
-        # Perform an initial auth check to simulate a login request
-        self.client.get(
-            "/admin/auth/check",
-            auth=self.auth,
-            name="/admin/auth/check"
+        # Log in once; every later request sends the session token
+        res = self.client.post(
+            "/admin/login",
+            json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD},
+            name="/admin/login"
         )
+        self.auth = TokenAuth(res.json().get("token", "")) if res.status_code == 200 else None
     
     @task(5)
     def list_all_users(self):
@@ -12,6 +12,7 @@ from requests.auth import HTTPBasicAuth
 import logging
 import os
 import glob
+import time
 from pathlib import Path
 
 # --- Configuration ---
@@ -21,6 +22,8 @@ BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
 NUM_API_USERS = 2 # Number of test users to create (e.g., testuser1, testuser2)
 # Directory containing PDFs to be uploaded and ingested as public
 PDF_PUBLIC_DIR = Path("./data_pdfs_for_all_users") 
+INGEST_TIMEOUT = 600 # Max seconds to wait for the background ingest job
+INGEST_POLL_SECONDS = 2
 
 # --- Logging Setup ---
 logging.basicConfig(
@@ -55,7 +58,7 @@ class TestEnvironmentSetup:
         """Creates test users via API if they don't already exist."""
         logging.info("--- Starting Test User Creation via API ---")
         try:
-            res = requests.get(f"{BASE_URL}/admin/users", auth=self.auth)
+            res = requests.get(f"{BASE_URL}/admin/users", params={"prefix": "testuser", "limit": 1000}, auth=self.auth)
             res.raise_for_status()
             
             response_data = res.json()
@@ -132,20 +135,47 @@ class TestEnvironmentSetup:
             for _, (_, f, _) in files_to_upload:
                 f.close()
 
-        # Step 2: Ingest all public PDFs
+        # Step 2: Ingest all public PDFs (queued as a background job)
         try:
             logging.info("Triggering ingestion of all public PDFs...")
             res_ingest = requests.post(
                 f"{BASE_URL}/admin/vectordb/ingest/all",
                 auth=self.auth,
-                timeout=90 # Ingestion can be slow
+                timeout=10
             )
             res_ingest.raise_for_status()
-            logging.info("PDF ingestion command sent successfully.")
-            return True
+            job_id = res_ingest.json().get("job_id")
+            logging.info(f"PDF ingestion queued as job {job_id}.")
         except requests.exceptions.RequestException as e:
             logging.error(f"Failed to ingest PDFs: {e}")
             return False
+        return self.wait_for_ingest_job(job_id)
+
+    def wait_for_ingest_job(self, job_id, timeout=INGEST_TIMEOUT):
+        """Polls the ingest job status endpoint until the job finishes."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                res = requests.get(f"{BASE_URL}/admin/vectordb/ingest/jobs/{job_id}", auth=self.auth, timeout=5)
+                res.raise_for_status()
+                job = res.json()
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Failed to fetch ingest job {job_id}: {e}")
+                return False
+            logging.info(
+                f"Ingest job {job_id}: {job['status']} | files {job['files_done']}/{job['files_total']} "
+                f"| chunks {job['chunks_embedded']} | errors {len(job['errors'])}"
+            )
+            if job["status"] in ("done", "partial"):
+                for err in job["errors"]:
+                    logging.warning(f"Ingest error for {err['filename']}: {err['error']}")
+                return True
+            if job["status"] == "failed":
+                logging.error(f"Ingest job {job_id} failed: {job['errors']}")
+                return False
+            time.sleep(INGEST_POLL_SECONDS)
+        logging.error(f"Ingest job {job_id} did not finish within {timeout}s.")
+        return False
 
 def main():
     """Main function to run the setup."""
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Checks for utils.auth_cache.CredentialCache
+
+A cached credential skips the database check until it expires or its user is
+invalidated, and expired entries do not pile up.
+
+Usage:
+    python -m pytest test_auth_cache.py
+"""
+
+from utils.auth_cache import CredentialCache
+
+
+class Database:
+    def __init__(self, passwords):
+        self.passwords = passwords
+        self.checks = 0
+
+    def authenticate(self, userid, password):
+        self.checks += 1
+        return self.passwords.get(userid) == password
+
+
+def test_hit_skips_database():
+    database = Database({"alice": "pw"})
+    cache = CredentialCache(ttl=60, max_entries=10)
+    assert cache.verify("alice", "pw", database.authenticate)
+    assert cache.verify("alice", "pw", database.authenticate)
+    assert not cache.verify("alice", "wrong", database.authenticate)
+    assert database.checks == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidate_forgets_old_password():
+    database = Database({"alice": "pw"})
+    cache = CredentialCache(ttl=60, max_entries=10)
+    assert cache.verify("alice", "pw", database.authenticate)
+    database.passwords["alice"] = "new"
+    cache.invalidate("alice")
+    assert not cache.verify("alice", "pw", database.authenticate)
+
+
+def test_expired_entries_are_pruned(monkeypatch):
+    import utils.auth_cache as auth_cache
+    now = [1000.0]
+    monkeypatch.setattr(auth_cache.time, "monotonic", lambda: now[0])
+    database = Database({f"user{i}": "pw" for i in range(5)})
+    cache = CredentialCache(ttl=10, max_entries=10)
+    for i in range(5):
+        assert cache.verify(f"user{i}", "pw", database.authenticate)
+    assert cache.stats()["entries"] == 5
+    now[0] += 11
+    assert cache.verify("user0", "pw", database.authenticate)
+    assert cache.stats()["entries"] == 1
+    assert database.checks == 6
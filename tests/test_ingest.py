@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Checks for incremental ingestion in utils.ingest and the ingest_state table
+
+Re-ingesting an unchanged PDF is skipped by its hash, a changed one replaces
+its chunks, and every (filename, owner) pair has exactly one ingest_state row,
+also in databases upgraded from before that was enforced.
+
+Usage:
+    python -m pytest test_ingest.py
+"""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+import utils.sqlitedb as db
+from utils.ingest import IngestSpec, run_ingest
+from utils.vectordb import count_source_chunks
+
+PDF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_user1_pdfs")
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    """Path of a PDF named story.pdf; call it with another sample to change its content."""
+    path = tmp_path / "story.pdf"
+
+    def write(sample):
+        shutil.copyfile(os.path.join(PDF_DIR, sample), path)
+        return str(path)
+    return write
+
+
+def state_rows(filename, owner):
+    with db.get_db_connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM ingest_state WHERE filename = ? AND ingested_by = ?',
+                            (filename, owner)).fetchone()[0]
+
+
+def test_unchanged_file_is_skipped(pdf):
+    db.init_db()
+    spec = IngestSpec("story.pdf", pdf("Barnaby_the_Badger.pdf"), "ingest1", 0)
+    first = run_ingest([spec])
+    assert first["ingested"] == 1 and first["chunks_added"] > 0
+    second = run_ingest([spec])
+    assert second["skipped"] == 1 and second["ingested"] == 0 and second["chunks_added"] == 0
+    assert count_source_chunks("story.pdf", "ingest1") == first["chunks_added"]
+    assert state_rows("story.pdf", "ingest1") == 1
+
+
+def test_duplicate_specs_ingest_once(pdf):
+    db.init_db()
+    spec = IngestSpec("story.pdf", pdf("Barnaby_the_Badger.pdf"), "ingest2", 0)
+    stats = run_ingest([spec, spec])
+    assert stats["files"] == 1 and stats["ingested"] == 1
+
+
+def test_changed_file_replaces_chunks(pdf):
+    db.init_db()
+    first = run_ingest([IngestSpec("story.pdf", pdf("Barnaby_the_Badger.pdf"), "ingest3", 0)])
+    old_hash = db.get_ingest_state("story.pdf", "ingest3")["file_hash"]
+    second = run_ingest([IngestSpec("story.pdf", pdf("The_Girl_Who.pdf"), "ingest3", 0)])
+    assert second["ingested"] == 1 and second["chunks_removed"] == first["chunks_added"]
+    assert count_source_chunks("story.pdf", "ingest3") == second["chunks_added"]
+    assert db.get_ingest_state("story.pdf", "ingest3")["file_hash"] != old_hash
+    assert state_rows("story.pdf", "ingest3") == 1
+
+
+def test_migration_removes_duplicate_state_rows(tmp_path):
+    # ingest_state as it was at schema version 6, with duplicate rows
+    conn = sqlite3.connect(tmp_path / "old.db")
+    c = conn.cursor()
+    c.execute('''CREATE TABLE ingest_state (id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL,
+        ingested_by TEXT NOT NULL, is_public INTEGER DEFAULT 0, created_at TEXT, file_hash TEXT)''')
+    c.execute('CREATE INDEX idx_ingest_state_owner_file ON ingest_state (ingested_by, filename)')
+    c.execute('CREATE TABLE ingest_jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, stats TEXT)')
+    c.executemany('INSERT INTO ingest_state (filename, ingested_by, file_hash) VALUES (?, ?, ?)',
+                  [("a.pdf", "u1", "old"), ("a.pdf", "u1", "new"), ("a.pdf", "u2", "x"), ("b.pdf", "u1", "y")])
+    c.execute('PRAGMA user_version = 6')
+    db._migrate(c)
+    rows = c.execute('SELECT filename, ingested_by, file_hash FROM ingest_state ORDER BY id').fetchall()
+    assert rows == [("a.pdf", "u1", "new"), ("a.pdf", "u2", "x"), ("b.pdf", "u1", "y")]
+    with pytest.raises(sqlite3.IntegrityError):
+        c.execute("INSERT INTO ingest_state (filename, ingested_by) VALUES ('a.pdf', 'u1')")
+    assert c.execute('PRAGMA user_version').fetchone()[0] == db.SCHEMA_VERSION
+    conn.close()
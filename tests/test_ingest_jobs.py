@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Checks for the SQLite ingest job queue and its leases
+
+A running job belongs to the worker that claimed it until its lease lapses:
+requeueing on startup must leave jobs of other live workers alone.
+
+Usage:
+    python -m pytest test_ingest_jobs.py
+"""
+
+import pytest
+import utils.sqlitedb as db
+
+
+@pytest.fixture(autouse=True)
+def empty_queue():
+    db.init_db()
+    with db.get_db_connection() as conn:
+        conn.execute("DELETE FROM ingest_jobs")
+        conn.commit()
+
+
+def test_claim_takes_oldest_once():
+    first = db.create_ingest_job("admin_ingest_all", {}, "admin")
+    second = db.create_ingest_job("admin_ingest_all", {}, "admin")
+    assert db.claim_next_ingest_job("worker-a", 60)["id"] == first
+    assert db.claim_next_ingest_job("worker-b", 60)["id"] == second
+    assert db.claim_next_ingest_job("worker-c", 60) is None
+
+
+def test_live_lease_is_not_requeued():
+    job_id = db.create_ingest_job("admin_ingest_all", {}, "admin")
+    db.claim_next_ingest_job("worker-a", 60)
+    assert db.requeue_expired_ingest_jobs() == 0
+    assert db.claim_next_ingest_job("worker-b", 60) is None
+    assert db.renew_ingest_job_lease(job_id, "worker-a", 60)
+    assert db.finish_ingest_job(job_id, "done", owner="worker-a")
+    assert db.get_ingest_job(job_id)["status"] == "done"
+
+
+def test_expired_lease_is_requeued():
+    job_id = db.create_ingest_job("admin_ingest_all", {}, "admin")
+    db.claim_next_ingest_job("worker-a", -1)
+    assert db.requeue_expired_ingest_jobs() == 1
+    assert db.claim_next_ingest_job("worker-b", 60)["id"] == job_id
+    # The first worker lost the job: it can neither renew nor finish it
+    assert not db.renew_ingest_job_lease(job_id, "worker-a", 60)
+    assert not db.finish_ingest_job(job_id, "failed", "stopped", owner="worker-a")
+    assert db.finish_ingest_job(job_id, "done", owner="worker-b")
+
+
+def test_job_without_lease_is_requeued():
+    job_id = db.create_ingest_job("admin_ingest_all", {}, "admin")
+    with db.get_db_connection() as conn:
+        # As left by a version that claimed jobs without a lease
+        conn.execute("UPDATE ingest_jobs SET status = 'running' WHERE id = ?", (job_id,))
+        conn.commit()
+    assert db.requeue_expired_ingest_jobs() == 1
+    assert db.get_ingest_job(job_id)["status"] == "queued"
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Checks for the chat memory ring in utils.vectordb
+
+Memory holds the user's newest `limit` messages in slots seq % limit. Changing
+the limit must keep the newest messages that still fit and go on overwriting
+the oldest one, never a newer one.
+
+Usage:
+    python -m pytest test_memory_ring.py
+"""
+
+import itertools
+
+import pytest
+import utils.sqlitedb as sqlitedb
+import utils.vectordb as vectordb
+
+_users = itertools.count()
+
+
+@pytest.fixture
+def user():
+    sqlitedb.init_db()
+    return f"ring{next(_users)}"
+
+
+def memory(user):
+    """Messages in the memory collection, oldest first, and the number of entries."""
+    data = vectordb.memory_store(user).get()
+    rows = sorted(zip(data["metadatas"], data["documents"]), key=lambda row: row[0]["seq"])
+    return [doc for meta, doc in rows], len(data["ids"])
+
+
+def send(user, first, last):
+    for i in range(first, last + 1):
+        vectordb.save_user_message(user, f"msg {i}")
+
+
+def test_wrap_around(user):
+    sqlitedb.set_memory_limit(user, 4)
+    send(user, 1, 11)
+    assert memory(user) == ([f"msg {i}" for i in range(8, 12)], 4)
+    assert vectordb.get_all_history(user) == [f"msg {i}" for i in range(8, 12)]
+
+
+def test_shrink_keeps_newest(user):
+    sqlitedb.set_memory_limit(user, 10)
+    send(user, 0, 14)
+    sqlitedb.set_memory_limit(user, 3)
+    send(user, 15, 15)
+    assert memory(user) == (["msg 13", "msg 14", "msg 15"], 3)
+    send(user, 16, 17)
+    assert memory(user) == (["msg 15", "msg 16", "msg 17"], 3)
+
+
+def test_grow_after_shrink(user):
+    sqlitedb.set_memory_limit(user, 10)
+    send(user, 0, 14)
+    sqlitedb.set_memory_limit(user, 3)
+    send(user, 15, 15)
+    sqlitedb.set_memory_limit(user, 6)
+    send(user, 16, 16)
+    assert memory(user) == (["msg 13", "msg 14", "msg 15", "msg 16"], 4)
+    send(user, 17, 20)
+    assert memory(user) == ([f"msg {i}" for i in range(15, 21)], 6)
+
+
+def test_grow_keeps_everything(user):
+    sqlitedb.set_memory_limit(user, 3)
+    send(user, 0, 4)
+    sqlitedb.set_memory_limit(user, 5)
+    send(user, 5, 6)
+    assert memory(user) == ([f"msg {i}" for i in range(2, 7)], 5)
+
+
+def test_cleared_history_starts_over(user):
+    sqlitedb.set_memory_limit(user, 3)
+    send(user, 0, 4)
+    vectordb.clear_history_by_user(user)
+    send(user, 5, 6)
+    assert memory(user) == (["msg 5", "msg 6"], 2)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Checks for migrate_pdf_layout.py, which converts the PDF vector store between
+the shared and tenant layouts (PDF_STORE_LAYOUT)
+
+Every chunk must land in its owner's collection with its stored embedding,
+retrieval must return the same chunks before and after, and converting back
+must restore the shared collection.
+
+Usage:
+    python -m pytest test_pdf_layout_migration.py
+"""
+
+import pytest
+from langchain_core.documents import Document
+
+import migrate_pdf_layout
+import utils.vectordb as vectordb
+
+CHUNKS = {
+    ("u1", "a.pdf", 0): ["alpha one", "alpha two", "alpha three"],
+    ("u2", "b.pdf", 0): ["beta one", "beta two"],
+    ("admin", "public.pdf", 1): ["gamma one", "gamma two", "gamma three", "gamma four"],
+}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A PDF store of its own in the shared layout, holding CHUNKS."""
+    monkeypatch.setattr(vectordb, "CHROMA_PDF_DIR", str(tmp_path / "chroma_pdf"))
+    monkeypatch.setattr(vectordb, "PDF_STORE_LAYOUT", "shared")
+    for (owner, source, is_public), texts in CHUNKS.items():
+        docs = [Document(page_content=text, metadata={"user_id": owner, "filename": source, "source": source,
+                                                      "is_public": is_public}) for text in texts]
+        vectordb.sync_source_chunks(docs, source, owner)
+    yield
+    vectordb.invalidate_store(vectordb.CHROMA_PDF_DIR)
+
+
+def retrieved(user_id):
+    return sorted(doc.page_content for doc in vectordb.retrieve_pdf_for_user(user_id, "alpha beta gamma", k=20))
+
+
+def collection_counts():
+    return {name: vectordb.get_collection(vectordb.CHROMA_PDF_DIR, name).count()
+            for name in vectordb.list_collection_names(vectordb.CHROMA_PDF_DIR)}
+
+
+def test_shared_to_tenant_and_back(store, monkeypatch):
+    before = {user: retrieved(user) for user in ("u1", "u2", "admin")}
+    assert before["u1"] == sorted(CHUNKS[("u1", "a.pdf", 0)] + CHUNKS[("admin", "public.pdf", 1)])
+
+    stats = migrate_pdf_layout.migrate("tenant", batch=2)
+    assert stats == {"collections": 1, "chunks": 9, "targets": 3}
+    assert collection_counts() == {
+        vectordb.tenant_collection_name("u1"): 3,
+        vectordb.tenant_collection_name("u2"): 2,
+        vectordb.PUBLIC_PDF_COLLECTION: 4,
+    }
+    monkeypatch.setattr(vectordb, "PDF_STORE_LAYOUT", "tenant")
+    assert {user: retrieved(user) for user in before} == before
+    assert vectordb.count_source_chunks("a.pdf", "u1") == 3
+
+    stats = migrate_pdf_layout.migrate("shared")
+    assert stats == {"collections": 3, "chunks": 9, "targets": 1}
+    assert collection_counts() == {vectordb.PDF_COLLECTION: 9}
+    monkeypatch.setattr(vectordb, "PDF_STORE_LAYOUT", "shared")
+    assert {user: retrieved(user) for user in before} == before
+
+
+def test_interrupted_run_can_be_repeated(store):
+    migrate_pdf_layout.migrate("tenant", keep=True)
+    stats = migrate_pdf_layout.migrate("tenant")
+    assert stats["chunks"] == 9
+    assert sum(collection_counts().values()) == 9
+    assert vectordb.PDF_COLLECTION not in collection_counts()
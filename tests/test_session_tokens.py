@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Checks for utils.session token verification
+
+A malformed or tampered bearer token must be rejected (None), never raise, so
+it gets a 401 from the auth dependencies rather than a 500.
+
+Usage:
+    python -m pytest test_session_tokens.py
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import pytest
+from utils.session import issue_token, verify_token
+
+
+def test_valid_token():
+    token = issue_token("alice", "user")["token"]
+    assert verify_token(token, "user") == "alice"
+    assert verify_token(token, "admin") is None
+
+
+def test_expired_token():
+    token = issue_token("alice", "user", ttl=-1)["token"]
+    assert verify_token(token, "user") is None
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda payload, signature: f"{payload}.é",
+    lambda payload, signature: f"é{payload}.{signature}",
+    lambda payload, signature: f"{payload}.{signature[:-1]}ü",
+    lambda payload, signature: f"{payload}.{signature}x",
+    lambda payload, signature: payload,
+    lambda payload, signature: "",
+    lambda payload, signature: ".",
+    lambda payload, signature: "not-base64!.sig",
+])
+def test_malformed_token(mangle):
+    payload, signature = issue_token("alice", "user")["token"].split(".")
+    assert verify_token(mangle(payload, signature), "user") is None
+
+
+def test_token_version():
+    versions = {"alice": "1.0"}
+    token = issue_token("alice", "user", versions["alice"])["token"]
+    assert verify_token(token, "user", versions.get) == "alice"
+    # Password change bumps the version; delete removes it
+    versions["alice"] = "1.1"
+    assert verify_token(token, "user", versions.get) is None
+    del versions["alice"]
+    assert verify_token(token, "user", versions.get) is None
+
+
+def test_token_version_revoked_despite_cache():
+    import utils.sqlitedb as db
+    db.init_db()
+    db.add_user("carol", "secret")
+    token = issue_token("carol", "user", db.get_token_version("carol"))["token"]
+    assert verify_token(token, "user", db.get_token_version) == "carol"
+    db.update_user_password("carol", "changed")
+    assert verify_token(token, "user", db.get_token_version) is None
+    token = issue_token("carol", "user", db.get_token_version("carol"))["token"]
+    assert verify_token(token, "user", db.get_token_version) == "carol"
+    db.delete_user("carol")
+    assert verify_token(token, "user", db.get_token_version) is None
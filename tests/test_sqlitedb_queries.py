@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Checks for the pdfs / ingest_state query layer in utils.sqlitedb
+
+Single-row lookups and filtered pages go through indexes, and keyset pages
+walk every matching row exactly once, in id order, ending with a None cursor.
+
+Usage:
+    python -m pytest test_sqlitedb_queries.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import utils.sqlitedb as db
+
+
+@pytest.fixture(autouse=True)
+def schema():
+    db.init_db()
+
+
+def walk(page, **kwargs):
+    """Every item from following next_cursor, and the number of pages."""
+    items, pages, cursor = [], 0, None
+    while True:
+        result = page(cursor=cursor, **kwargs)
+        items += result["items"]
+        pages += 1
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+def uses_index(query, params):
+    with db.get_db_connection() as conn:
+        steps = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+    return all(step.startswith("SEARCH") and "INDEX" in step for step in steps)
+
+
+def test_get_pdf_by_uploader():
+    db.add_pdf("shared.pdf", "lookup_a")
+    second = db.add_pdf("shared.pdf", "lookup_b")
+    assert db.get_pdf("shared.pdf", "lookup_b")["id"] == second
+    assert db.get_pdf("shared.pdf", "lookup_b")["uploaded_by"] == "lookup_b"
+    assert db.get_pdf("shared.pdf", "nobody") is None
+    assert db.get_pdf("missing.pdf") is None
+
+
+def test_lookups_use_indexes():
+    assert uses_index("SELECT id FROM pdfs WHERE filename = ? AND uploaded_by = ?", ("a", "b"))
+    assert uses_index("SELECT id FROM pdfs WHERE uploaded_by = ? AND id > ? ORDER BY id", ("a", 0))
+    assert uses_index("SELECT id FROM pdfs WHERE is_public = ? AND id > ? ORDER BY id", (1, 0))
+    assert uses_index("SELECT id FROM ingest_state WHERE filename = ? AND ingested_by = ?", ("a", "b"))
+    assert uses_index("SELECT id FROM ingest_state WHERE ingested_by = ? AND id > ? ORDER BY id", ("a", 0))
+
+
+def test_pdfs_pages_cover_every_row_once():
+    ids = [db.add_pdf(f"page{i}.pdf", "pager", is_global=i % 3 == 0) for i in range(25)]
+    items, pages = walk(db.get_pdfs_page, limit=10, uploaded_by="pager")
+    assert [item["id"] for item in items] == ids
+    assert pages == 3
+    public, _ = walk(db.get_pdfs_page, limit=4, uploaded_by="pager", is_public=1)
+    assert [item["id"] for item in public] == ids[::3]
+
+
+def test_exact_last_page_has_no_cursor():
+    for i in range(4):
+        db.add_pdf(f"exact{i}.pdf", "exact")
+    first = db.get_pdfs_page(limit=4, uploaded_by="exact")
+    assert len(first["items"]) == 4 and first["next_cursor"] is None
+    assert db.get_pdfs_page(limit=4, uploaded_by="nobody") == {"items": [], "next_cursor": None}
+
+
+def test_ingested_pages_filter_by_time():
+    before = datetime.utcnow() - timedelta(seconds=1)
+    for i in range(7):
+        db.ingest(f"timed{i}.pdf", "timed", 0)
+    items, _ = walk(db.get_ingested_pdfs_page, limit=3, ingested_by="timed", created_after=before)
+    assert [item["filename"] for item in items] == [f"timed{i}.pdf" for i in range(7)]
+    items, _ = walk(db.get_ingested_pdfs_page, limit=3, ingested_by="timed", created_before=before)
+    assert items == []
+
+
+def test_users_page_prefix_is_literal():
+    for name in ("pre_x", "pre_y", "preZ", "other"):
+        db.add_user(name, "pw")
+    items, _ = walk(db.get_users_page, limit=1, prefix="pre_")
+    assert [item["userid"] for item in items] == ["pre_x", "pre_y"]